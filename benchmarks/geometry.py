@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+
+"""
+Benchmark of the geometries in src/geometry.py.
+Prints the cost per call of distance/destination for one point and per point
+for arrays of points. Run with: python3 -m benchmarks.geometry
+"""
+
+import timeit
+import numpy as np
+
+from src.geometry import GEOMETRIES
+
+
+# a scooter and the city center in Södertälje
+SCOOTER = (59.193475, 17.640142)
+CITY = (59.19554, 17.62525)
+
+# number of points in the array calls
+SIZE = 1000
+
+
+def per_call(statement, number: int) -> float:
+    """ Returns the best time per call in microseconds of 5 runs. """
+    return min(timeit.repeat(statement, number = number, repeat = 5)) / number * 1e6
+
+
+def main() -> None:
+    """ Print the cost per call/point of every geometry. """
+    rng = np.random.default_rng(0)
+    lats = SCOOTER[0] + rng.uniform(-0.02, 0.02, SIZE)
+    lons = SCOOTER[1] + rng.uniform(-0.02, 0.02, SIZE)
+    bearings = rng.integers(0, 4, SIZE) * 90
+
+    print("{0:<10} {1:>14} {2:>14} {3:>14} {4:>14}".format(
+        "geometry", "distance", "destination", "distances", "destinations"
+    ))
+
+    for name, geometry in GEOMETRIES.items():
+        geometry = geometry()
+        number = 200 if name == "geodesic" else 20000
+        array_number = 1 if name == "geodesic" else 200
+
+        results = (
+            per_call(lambda: geometry.distance(*SCOOTER, *CITY), number),
+            per_call(lambda: geometry.destination(*SCOOTER, 0.0833, 90), number),
+            per_call(lambda: geometry.distances(lats, lons, *CITY), array_number) / SIZE,
+            per_call(lambda: geometry.destinations(lats, lons, 0.0833, bearings), array_number)
+            / SIZE,
+        )
+
+        print("{0:<10} {1:>11.3f} us {2:>11.3f} us {3:>11.3f} us {4:>11.3f} us".format(
+            name, *results
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+
+"""
+Benchmark of one movement step, Scooter.change_location + Scooter.move_scooter.
+Compares the current numeric pipeline with the old one, which saved repr() of
+the new geopy Point and parsed it back with a regex.
+Run with: python3 -m benchmarks.movement
+"""
+
+import random
+import re
+import timeit
+
+from src.geometry import GEOMETRIES
+from src.scooter import Scooter
+from src.state import ScooterState
+
+
+# steps per run, the battery starts at 100% and drops 1% per step
+STEPS = 90
+
+
+def old_step(scooter: Scooter) -> None:
+    """ One step of the old pipeline, coordinates as text. """
+    lat, lon = scooter.geometry.destination(
+        scooter.data.lat,
+        scooter.data.lon,
+        scooter.data.speed * (15 / 3600),
+        [0, 90, 180, 270][random.randint(0, 3)]
+    )
+    location = "Point({0}, {1}, 0.0)".format(lat, lon)
+
+    points = re.split("Point|, ", location)
+    scooter.data.lat = float(points[1][1:])
+    scooter.data.lon = float(points[2])
+    scooter.data.speed = random.randrange(1, 21)
+    scooter.data.battery -= 1
+
+
+def new_step(scooter: Scooter) -> None:
+    """ One step of the current pipeline. """
+    scooter.change_location()
+    scooter.move_scooter()
+
+
+def per_call(step, scooter: Scooter, number: int) -> float:
+    """ Returns the best time per step in microseconds of 5 runs. """
+    def run():
+        scooter.data.battery = 100
+        for _ in range(number):
+            step(scooter)
+
+    return min(timeit.repeat(run, number = 1, repeat = 5)) / number * 1e6
+
+
+def main() -> None:
+    """ Print the cost per step of both pipelines for every geometry. """
+    print("{0:<10} {1:>12} {2:>12} {3:>12}".format("geometry", "old step", "new step", "saved"))
+
+    for name, geometry in GEOMETRIES.items():
+        scooter = Scooter()
+        scooter.geometry = geometry()
+        scooter.data = ScooterState("1", 59.193475, 17.640142, 10, 100)
+
+        old = per_call(old_step, scooter, STEPS)
+        new = per_call(new_step, scooter, STEPS)
+
+        print("{0:<10} {1:>9.3f} us {2:>9.3f} us {3:>9.3f} us".format(name, old, new, old - new))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/python3
+
+"""
+Benchmark suite, results as JSON for comparison across commits.
+
+operations  cost per call in microseconds of Scooter.change_location,
+            move_scooter and check_scooter_in_city, and per scooter of the
+            same Fleet methods.
+simulation  Simulation on a virtual clock against an in-process FakeBackend,
+            for every fleet size: scooter steps per second and API requests
+            per tick while the scooters move.
+
+All random numbers are seeded (SEED), every run does the same work.
+
+Run with: python3 -m benchmarks.suite --output benchmark.json
+Compare with an earlier run: python3 -m benchmarks.suite --compare old.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from simulation import Simulation
+from src.api import ApiData
+from src.backend import FakeBackend, FakeTransport
+from src.clock import VirtualClock
+from src.scooter import Scooter, Fleet
+from src.state import ScooterState
+
+
+# fleet sizes of the simulation benchmark
+SIZES = (100, 1000, 5000)
+
+# seed of the scooters' random numbers and the fake backend
+SEED = 0
+
+# simulated seconds and seconds between two passes over all scooters
+DURATION = 60
+TICK = 15
+
+# a scooter in Södertälje
+SCOOTER = {"id": "1", "lat": 59.193475, "lon": 17.640142, "speed": 10, "battery": 100}
+CITY = {"id": "2", "area": "25.84", "latitude": "59.19554", "longitude": "17.62525"}
+
+
+def per_call(function, number: int) -> float:
+    """ Returns the best time per call in microseconds of 5 runs. """
+    return min(timeit.repeat(function, number = number, repeat = 5)) / number * 1e6
+
+
+def operations(number: int = 2000, size: int = 10000) -> dict:
+    """ Returns the cost of the scooter operations, per call and per fleet scooter. """
+    scooter = Scooter(random.Random(SEED))
+    scooter.data = ScooterState(**SCOOTER)
+    scooter.add_city_to_dict(CITY)
+    scooter.change_location()
+
+    def move():
+        scooter.move_scooter()
+        scooter.data.battery = SCOOTER["battery"]
+
+    fleet = Fleet.from_data(
+        [{
+            "id": str(index),
+            "latitude": SCOOTER["lat"],
+            "longitude": SCOOTER["lon"],
+            "speed": SCOOTER["speed"],
+            "battery": SCOOTER["battery"]
+        } for index in range(size)],
+        [CITY] * size,
+        seed = SEED
+    )
+    fleet.change_location()
+
+    return {
+        "geometry": Scooter.geometry.name,
+        "scooter_us": {
+            "change_location": per_call(scooter.change_location, number),
+            "move_scooter": per_call(move, number),
+            "check_scooter_in_city": per_call(scooter.check_scooter_in_city, number),
+        },
+        "fleet_us_per_scooter": {
+            "change_location": per_call(fleet.change_location, 20) / size,
+            "move_scooter": per_call(fleet.move_scooter, 20) / size,
+            "check_scooter_in_city": per_call(fleet.check_scooter_in_city, 20) / size,
+        },
+    }
+
+
+def simulation(size: int, local_state: bool = True) -> dict:
+    """ Returns throughput of a Simulation of size scooters against a FakeBackend. """
+    # cities and stations are cached by class, every run starts with empty caches
+    ApiData.clear_cache()
+
+    backend = FakeBackend(scooters = size, seed = SEED)
+    sim = Simulation(
+        FakeTransport(backend),
+        local_state = local_state,
+        clock = VirtualClock(),
+        seed = SEED
+    )
+    sim.duration = DURATION
+    sim.tick = TICK
+
+    # measure the move phase only, renting and returning are one-off
+    moving = {}
+    move = sim.move
+
+    def timed_move():
+        start, requests = time.perf_counter(), backend.requests
+        move()
+        moving["seconds"] = time.perf_counter() - start
+        moving["requests"] = backend.requests - requests
+
+    sim.move = timed_move
+
+    start = time.perf_counter()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = sim.simulate(range(1, size + 1))
+
+    return {
+        "scooters": size,
+        "local_state": local_state,
+        "seconds": time.perf_counter() - start,
+        "move_seconds": moving["seconds"],
+        "steps": stats["moves"],
+        "steps_per_second": stats["moves"] / moving["seconds"],
+        "ticks": stats["ticks"],
+        "requests": backend.requests,
+        "requests_per_tick": moving["requests"] / stats["ticks"],
+        "errors": stats["errors"],
+    }
+
+
+def commit() -> str:
+    """ Returns the current git commit, None outside a git repository. """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output = True, check = True, text = True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: tuple) -> dict:
+    """ Returns the results of all benchmarks. """
+    return {
+        "commit": commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "operations": operations(),
+        "simulation": [simulation(size) for size in sizes]
+        + [simulation(sizes[0], local_state = False)],
+    }
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """ Returns the numbers of results by path, e.g. 'simulation.1000.steps_per_second'. """
+    numbers = {}
+
+    for key, value in results.items():
+        path = prefix + str(key)
+
+        if isinstance(value, dict):
+            numbers.update(flatten(value, path + "."))
+        elif isinstance(value, list):
+            for item in value:
+                name = "{0}{1}".format(item["scooters"], "" if item["local_state"] else "-api")
+                numbers.update(flatten(item, "{0}.{1}.".format(path, name)))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            numbers[path] = value
+
+    return numbers
+
+
+def compare(old: dict, new: dict) -> None:
+    """ Prints every number of both runs and the change in percent. """
+    old, new = flatten(old), flatten(new)
+
+    for path in sorted(set(old) & set(new)):
+        change = (new[path] - old[path]) / old[path] * 100 if old[path] else 0.0
+        print("{0:<52} {1:>14.3f} {2:>14.3f} {3:>+8.1f}%".format(
+            path, old[path], new[path], change
+        ), file = sys.stderr)
+
+
+def main() -> None:
+    """ Run all benchmarks and print or save the results as JSON. """
+    parser = argparse.ArgumentParser(description = "Scooter benchmark suite")
+    parser.add_argument(
+        "--sizes", type = int, nargs = "+", default = SIZES,
+        help = "fleet sizes of the simulation benchmark"
+    )
+    parser.add_argument("--output", help = "save the JSON results to this file")
+    parser.add_argument("--compare", help = "JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    results = run(tuple(args.sizes))
+    text = json.dumps(results, indent = 2)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            compare(json.load(file), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,18 @@
 
 """ Main file for scooter program with Handler class. """
 
-import math
 import sys
 import inspect
-import time
-from threading import Thread
-from datetime import datetime, timedelta
+from datetime import timedelta
 
-from src.api import ApiData
+from src.engine import RentalEngine
+from src.profiling import profiled
+from src.rentals import Rental
 from src.scooter import Scooter
+from src.transport import Transport
 
 class Handler():
-    """ Handler class """
+    """ Handler class, the terminal menu of one user's rental. """
 
     # menu options
     _OPTIONS = {
@@ -25,23 +25,28 @@ class Handler():
         "5": "charge_scooter",
     }
 
-    # scooter status
-    _running = False
+    # user id (random user)
+    user_id = 6
 
-    # Leave the scooter, stop the thread
-    _return = False
+    # seconds a position update may wait in the queue, a newer position replaces it
+    update_interval = 10
 
-    # start renting time, a list of integers [H:M:S]
-    start_time = None
 
+    def __init__(self, transport: Transport = None, clock = None) -> None:
+        """ Initialize class, the rental time is read from clock (default SystemClock). """
+        self.engine = RentalEngine(transport, clock)
+        self.engine.on_stop = self.stopped
 
-    def __init__(self) -> None:
-        """ Initialize class """
-        self.scooter = Scooter()
-        self.api = ApiData(user_id = 6)   # user id (random user)
+        # position updates are sent by the batch's worker thread
+        self.engine.api.batch.max_delay = self.update_interval
+        self.engine.api.batch.background = True
+
+        self.clock = self.engine.clock
+        self.api = self.engine.api
 
-        # create a Thread
-        self._thread = Thread(target=self.run, name="Move scooter")
+        # the rented scooter, its data is the rental's state
+        self.scooter = Scooter()
+        self.rental = None
 
 
     def _get_method(self, method_name):
@@ -66,151 +71,79 @@ class Handler():
         print(menu)
 
 
-    def run(self) -> None:
-        """ Starts a Thread. """
-        while True:
-            if self._return:
-                break
-            if self.scooter.check_scooter_in_city() is False:
-                print("\nScooter is outside of the city\n")
-                print("You can't use the scooter anymore. Press 4 to cancel the rental.")
-
-                self.stop_running()
-                time.sleep(10)
-            elif self._running:
-                self.battery_check()
-                time.sleep(5)
-
-
-    def battery_check(self) -> None:
-        """ Checks battery level, if battery < 20% print warning message and stop the scooter. """
-        if self.scooter.check_battery():
-            self.stop_running()
-            print("\n\033[1;31m*\033[1;0m Low battery!! the scooter needs to be charged.")
+    def rent(self, scooter_id: int) -> bool:
+        """
+        Rents the scooter if it is available and starts the rental time.
+        Returns False if it is not available or does not exist.
+        """
+        rental = self.engine.rent(scooter_id, self.user_id, self.api.get_scooter_data(scooter_id))
+
+        if rental is None:
+            print("\n\033[1;31m*\033[1;0m Scooter is not available.\n")
+            return False
+        if rental == -1:
+            print("\nScooter's city could not be read: {0}\n".format(self.api.error))
+            return False
+
+        self.rental = rental
+        self.scooter.data = rental.state
+        self.scooter.city = rental.city
+        return True
+
+
+    @staticmethod
+    def stopped(_rental: Rental, reason: str) -> None:
+        """ Prints why the engine stopped the scooter. """
+        if reason == "outside":
+            print("\nScooter is outside of the city\n")
+            print("You can't use the scooter anymore. Press 4 to cancel the rental.")
         else:
-            self.scooter.change_location()
-            self.scooter.move_scooter()
-
-            # update API
-            self.api.update_rented_scooter()
+            print("\n\033[1;31m*\033[1;0m Low battery!! the scooter needs to be charged.")
 
 
     def start_scooter(self) -> None:
         """ Move the scooter to a random location. """
-        if self.scooter.check_battery():
+        if not self.engine.start(self.rental):
             print("\n\033[1;31m*\033[1;0m Low battery!! the scooter needs to be charged.")
             print("\nPress 4 to end the rental and leave the scooter at charging station.")
             print("Or you can press 5 to fully charge the scooter and end the rental.")
-        else:
-            self._running = True
 
 
     def stop_running(self) -> None:
         """ Stop the scooter. """
-        if self._running is True:
-            self._running = False
-            self.scooter.stop_scooter()
-
-            # update API
-            self.api.update_rented_scooter()
+        self.engine.stop_running(self.rental)
 
 
     def rental_time(self) -> timedelta:
         """ Returns the time the scooter has been rented by a user. """
-        current = datetime.now().time().strftime("%H:%M:%S")
-
-        current_time = timedelta(
-            hours = int(current[0:2]),
-            minutes = int(current[3:5]),
-            seconds = int(current[6:8])
-        )
-
-        start_time = timedelta(
-            hours = self.start_time[0],
-            minutes = self.start_time[1],
-            seconds = self.start_time[2]
-        )
-
-        return current_time - start_time
+        return self.engine.rental_time(self.rental)
 
 
     def get_scooter_info(self) -> None:
         """ Get the scooter information. """
-        if self._running:
+        if self.rental.running:
             print("\nScooter is running.")
         else:
             print("\nScooter is in sleep mode.")
 
-        print(self.scooter.__str__())
+        print(str(self.scooter))
         print("Rent time: " + str(self.rental_time()))
 
 
     def charge_scooter(self) -> None:
         """Charge the scooter and end the rental. """
-        # Stop thread
-        self._return = True
-        self._running = False
-        self._thread.join()
-
-        # Fully charges the battery and leave it at the charging Station
-        charging = self.api.get_station("1")
-
-        self.scooter.data["battery"] = 100
-        self.scooter.stop_scooter(status = "1")          # Available status
-        self.scooter.move_to_station(charging)
-
-
-        # update API
-        self.api.return_scooter(math.ceil(self.rental_time().seconds / 60))
-        self.api.update_scooter()
+        self.engine.charge_scooter(self.rental)
+        self.engine.close()
         sys.exit()
 
 
     def return_scooter(self):
         """ Stop the rental and leave the scooter. """
-        # Stop thread
-        self._return = True
-        self._running = False
-        self._thread.join()
-
-        self.end_rental()
+        self.engine.end_rental(self.rental)
+        self.engine.close()
         sys.exit()
 
 
-    def end_rental(self) -> None:
-        """ Checks scooter's battery/maintenance/zone and stops the scooter. """
-        if self.scooter.check_scooter_in_city() is False:
-            self.scooter.stop_scooter(status = "2")                  ## Unavailable status
-
-            # update API
-            self.api.return_scooter(math.ceil(self.rental_time().seconds / 60))
-            self.api.update_rented_scooter()
-        elif self.scooter.check_battery():
-            charging = self.api.get_station("1")                     ## Charging Station
-
-            self.scooter.stop_scooter(status = "4")                  ## Charging status
-            self.scooter.move_to_station(charging)
-
-            # update api
-            self.api.return_scooter(math.ceil(self.rental_time().seconds / 60))
-            self.api.update_scooter()
-        elif self.scooter.check_maintenance():
-            maintenance = self.api.get_station("4")                  ## Maintenance Station
-
-            self.scooter.stop_scooter(status = "3")                  ## Maintenance status
-            self.scooter.move_to_station(maintenance)
-
-            # update api
-            self.api.return_scooter(math.ceil(self.rental_time().seconds / 60))
-            self.api.update_scooter()
-        else:
-            self.scooter.stop_scooter(status = "1")                  ## Available status
-
-            # update API
-            self.api.return_scooter(math.ceil(self.rental_time().seconds / 60))
-            self.api.update_rented_scooter()
-
-
     def rent_scooter(self):
         """ Print menu """
         while True:
@@ -226,45 +159,27 @@ class Handler():
 
 
     def start(self):
-        """
-        Makes requests to the API, creates log, gets cities and
-        stations data. start a thread and view rent menu.
-        """
-        # Create new payment/log and update customer's account
-        self.api.rent_scooter()
-
-        # get city data and add it to dict
-        city = self.api.get_city_data()
-        self.scooter.add_city_to_dict(city)
-
-        # start a Thread and show a rent menu
-        self._thread.start()
+        """ Starts the engine's thread, which moves the scooter, and view rent menu. """
+        self.engine.run_in_thread()
         self.rent_scooter()
 
 
     def main(self):
-        """ Main method """
-        try:
-            print("\n************ Welcome to Scooter program **************\n")
-
-            while True:
-                scooter = int(input("Enter scooter id: "))
-                data = self.api.get_scooter_data(scooter)
-
-                try:
-                    if self.scooter.check_scooter_status(data):
-                        # Start renting time
-                        current = datetime.now().time().strftime("%H:%M:%S")
-                        self.start_time = [int(current[:2]), int(current[3:5]), int(current[6:8])]
-                        break
-
-                    print("\n\033[1;31m*\033[1;0m Scooter is not available.\n")
-                except TypeError:
-                    print("\nScooter does not exist.\n")
-
-            self.start()
-        except ValueError:
-            print("\nScooter id must be a number.")
+        """ Main method, profiled if SCOOTER_PROFILE is set, see src/profiling.py. """
+        with profiled():
+            try:
+                print("\n************ Welcome to Scooter program **************\n")
+
+                while True:
+                    try:
+                        if self.rent(int(input("Enter scooter id: "))):
+                            break
+                    except TypeError:
+                        print("\nScooter does not exist.\n")
+
+                self.start()
+            except ValueError:
+                print("\nScooter id must be a number.")
 
 
 if __name__ == "__main__":
@@ -1,171 +1,531 @@
 #!/usr/bin/python3
-# pylint: disable=no-value-for-parameter
+# pylint: disable=too-many-instance-attributes
 
 """
 Mainprogram for scooter simulation
 """
 
 
-from datetime import datetime
+import argparse
+import asyncio
+import math
+import threading
 import time
-from src.scooter import Scooter
+from concurrent.futures import ProcessPoolExecutor
+from src.scooter import Scooter, scooter_rng
 from src.api import ApiData
-from main import Handler
-
+from src.async_api import AsyncApiData
+from src.backend import FakeBackend, serve, url
+from src.clock import SystemClock, VirtualClock
+from src.engine import RentalEngine, return_status
+from src.metrics import Exporter
+from src.profiling import PROFILERS, profiled
+from src.recording import RecordingTransport, ReplayTransport
+from src.rentals import Rental
+from src.transport import Transport
 
 
 class Simulation():
     """ Simulation class """
 
-    # saves scooter id in an array
-    _scooter_id = []
+    # simulation time in seconds
+    duration = 120
 
-    # saves station in an array
-    _station = []
+    # seconds between two passes over all scooters
+    tick = 1
 
-    # saves user id in an array
-    _user_id = []
 
-    # saves city info in an array
-    _city_data = []
+    def __init__(self, transport: Transport = None, batch_size: int = 100, local_state = False,
+                 clock = None, seed: int = None):
+        """
+        Initialize class, all API calls share one transport (connection pool).
+        Position updates are sent in batches of batch_size scooters.
+        If local_state is True the scooters are read from the API once at start and
+        the simulation keeps their data locally instead of reading it on every pass.
+        Time is read from clock (default SystemClock), with a VirtualClock the
+        simulation runs faster than real time.
+        With a seed every scooter moves the same way in every run, see scooter_rng.
+        """
+        self.seed = seed
+        self.local_state = local_state
 
+        # all rentals are moved by one engine, a stopped scooter is returned at once
+        self.engine = RentalEngine(transport, clock, local_state, auto_return = True)
+        self.engine.api.batch.max_size = batch_size
+        self.engine.on_stop = self.stopped
+        self.engine.on_error = self.failed
 
-    def __init__(self):
-        """ Initialize class """
-        self.scooter = Scooter()
-        self.handler = Handler()
-        self.api = ApiData(1)
+        self.clock = self.engine.clock
+        self.api = self.engine.api
+        self.rentals = self.engine.rentals
 
+        # number of rented, moved and returned scooters, passes over them and failed reads
+        self.stats = self.engine.stats
 
-    def move(self) -> None:
-        """ Moves scooters around the cities. Simulation time is 2 minutes. """
-        end_time = time.time() + 120    # 2 minutes
 
+    def move(self) -> None:
+        """ Moves scooters around the cities. Simulation time is duration seconds. """
         print("\nStep 2 - Moving scooters . . . . . . . .")
 
-        while time.time() <= end_time:
-            count = 0
+        self.engine.run(until = self.clock.now() + self.duration)
 
-            while count < len(self._scooter_id):
-                data = self.api.get_scooter_data(self._scooter_id[count])
 
-                self.scooter.add_scooter_to_dict(data)
-                self.scooter.add_city_to_dict(self._city_data[count])
+    def failed(self, scooter_id: int, error) -> None:
+        """ Prints why a read failed (timeout, circuit open, ...). """
+        print("Scooter {0} skipped: {1}".format(scooter_id, error))
 
-                count = self.run(count)
 
-                count += 1
-                time.sleep(0.001)
+    @staticmethod
+    def stopped(rental: Rental, reason: str) -> None:
+        """ Prints why a scooter was returned, it is outside the city or has low battery. """
+        scooter_id = rental.scooter_id
+
+        if reason == "outside":
+            print("\nScooter {} is outside of the city\n".format(scooter_id))
+        else:
+            print(
+                "\n\033[1;31m*\033[1;0m Low battery!! the scooter {} needs to be charged."
+                .format(scooter_id)
+            )
+
+        print("Scooter {} will be returned.".format(scooter_id))
+
+
+    def return_scooters(self):
+        """ All scooters will be returned when simulation time ends. """
+        print("\nStep 3 - Returning scooters . . . . . . . .")
+        print("\nThe simulation has finished, the scooters will be returned.\n")
+
+        # a scooter that can not be read stays rented and is counted as error
+        self.engine.return_all()
 
 
-    def delete_and_remove(self, count) -> None:
-        """ Removes a specific element from the list and stop the scooter """
-        self.end(count)
+    def main(self, total:int, profile: str = None, output: str = None) -> dict:
+        """
+        Start simulation program. With profile ('cprofile' or 'sample', default
+        from SCOOTER_PROFILE) the run is profiled and the stats written to output.*.
+        """
+        print("\n************ Welcome to Scooter simulation program **************\n")
+        print("\nThe simulation takes around 3 minutes, do not try to break/stop the program.\n")
 
-        del self._scooter_id[count]
-        del self._station[count]
-        del self._user_id[count]
-        del self._city_data[count]
+        with profiled(profile, output):
+            return self.simulate(range(1, total + 1))
 
 
-    def run(self, count: int) -> int:
+    def simulate(self, scooter_ids, user: int = 6) -> dict:
         """
-        Checks if the scooter is inside the city and check battery level, if TRUE
-        the scooter will be returned otherwise the scooter will continue moving.
+        Rent, move and return the scooters with the given ids, the first rented
+        scooter gets user id user. Returns the simulation's stats.
         """
-        scooter_id = self._scooter_id[count]
+        print("\nStep 1 - Renting scooters . . . . . . . .")
 
-        if self.scooter.check_scooter_in_city() is False:
-            print("\nScooter {} is outside of the city\n".format(scooter_id))
-            print("Scooter {} will be returned.".format(scooter_id))
+        self.engine.tick = self.tick
 
-            self.delete_and_remove()
-            count -= 1
-        elif self.scooter.check_battery():
-            print(
-                "\n\033[1;31m*\033[1;0m Low battery!! the scooter {} needs to be charged."
-                .format(id)
+        # read all scooters in a few requests
+        scooters = self.api.get_scooters_data(scooter_ids) if self.local_state else None
+
+        if scooters == -1:
+            scooters = {}
+
+        for scooter_id in scooter_ids:
+            if self.local_state:
+                data = scooters.get(str(scooter_id), {"status": {"status": None}})
+            else:
+                data = self.api.get_scooter_data(scooter_id = scooter_id)
+
+                if data == -1:
+                    self.engine.failed(scooter_id, self.api.error)
+                    continue
+
+            # create log/payment and update customer's account
+            rental = self.engine.rent(scooter_id, user, data, scooter_rng(self.seed, scooter_id))
+
+            if rental is None:
+                print("\n\033[1;31m*\033[1;0m Scooter {} is not available.\n".format(scooter_id))
+            elif rental != -1:
+                self.engine.start(rental)
+                user += 1
+
+        self.move()
+        self.return_scooters()
+
+        return self.stats
+
+
+
+def run_shard(scooter_ids: list, user: int, transport: dict, settings: dict) -> dict:
+    """
+    Runs one shard of a sharded simulation in a worker process. transport is
+    Transport.config() of the coordinator, settings are the Simulation's
+    batch_size, virtual (clock), duration, tick and seed.
+    """
+    shard = Simulation(
+        Transport(**transport),
+        batch_size = settings["batch_size"],
+        local_state = True,
+        clock = VirtualClock() if settings["virtual"] else None,
+        seed = settings["seed"]
+    )
+    shard.duration = settings["duration"]
+    shard.tick = settings["tick"]
+
+    start = time.time()
+    stats = shard.simulate(scooter_ids, user)
+    stats["seconds"] = time.time() - start
+
+    return stats
+
+
+def run_sharded(total: int, workers: int, transport: Transport = None, **settings) -> dict:
+    """
+    Splits scooters 1 - total into one id range per worker and simulates every
+    range in its own process. All shards use the same transport configuration.
+    Every scooter has its own random stream, so a seed gives the same moves
+    with any number of workers.
+    Returns the stats of all shards merged, ticks and seconds of the slowest shard.
+    """
+    transport = ApiData.transport if transport is None else transport
+    settings = dict({
+        "batch_size": 100,
+        "virtual": False,
+        "duration": Simulation.duration,
+        "tick": Simulation.tick,
+        "seed": None
+    }, **settings)
+
+    scooter_ids = list(range(1, total + 1))
+    size = max(1, math.ceil(total / workers))
+
+    with ProcessPoolExecutor(max_workers = workers) as executor:
+        # user id 6 means customer id 1, every shard starts at its first scooter's user
+        futures = [
+            executor.submit(
+                run_shard,
+                scooter_ids[start:start + size],
+                6 + start,
+                transport.config(),
+                settings
             )
-            print("Scooter {} will be returned.".format(scooter_id))
+            for start in range(0, total, size)
+        ]
 
-            self.delete_and_remove()
-            count -= 1
-        else:
-            self.scooter.change_location()
-            self.scooter.move_scooter()
-            self.api.update_rented_scooter()
+        results = [future.result() for future in futures]
+
+    stats = {
+        "rented": 0, "moves": 0, "returned": 0, "ticks": 0, "errors": 0, "seconds": 0, "shards": 0
+    }
+
+    for result in results:
+        for key in ("rented", "moves", "returned", "errors"):
+            stats[key] += result[key]
+
+        stats["ticks"] = max(stats["ticks"], result["ticks"])
+        stats["seconds"] = max(stats["seconds"], result["seconds"])
+        stats["shards"] += 1
+
+    return stats
 
-        return count
 
 
-    def end(self, count):
+
+class AsyncSimulation():
+    """
+    AsyncSimulation class, every scooter is moved by its own coroutine so
+    requests for many scooters are in flight at the same time.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        transport: Transport = None,
+        concurrency: int = 200,
+        duration: float = 120,
+        step: float = 1,
+        seed: int = None,
+        clock = None
+    ):
         """
-        Scooter will be checked if it's outside the city/has low battery level or need
-        meantience. The scooter will be returned and the log/payment/account will be uppdated.
+        Initialize class, concurrency is the max number of requests in flight.
+        The simulation runs for duration seconds and moves a scooter every step seconds.
+        With a seed every scooter draws from its own seeded stream, see scooter_rng.
+        Time is read from clock (default SystemClock), a VirtualClock is moved
+        forward instead of waiting between steps.
         """
-        self.api.station = self._station[count]
-        self.handler.api = ApiData(self._user_id[count])
+        self.seed = seed
+        self.clock = SystemClock() if clock is None else clock
+        self.api = AsyncApiData(transport, concurrency)
+        self.duration = duration
+        self.step = step
 
-        self.handler.end_rental()
+        # number of rented, moved and returned scooters and failed reads
+        self.stats = {"rented": 0, "moves": 0, "returned": 0, "errors": 0}
 
 
-    def return_scooters(self):
-        """ All scooters will be returned when simulation time ends. """
-        count = 0
+    def failed(self, scooter_id: int, reason: str) -> None:
+        """ Counts a failed read, reason tells what could not be read. """
+        self.stats["errors"] += 1
+        print("Scooter {0} skipped: {1}".format(scooter_id, reason))
 
-        print("\nStep 3 - Returning scooters . . . . . . . .")
-        print("\nThe simulation has finished, the scooters will be returned.\n")
 
-        while count < len(self._scooter_id):
-            data = self.api.get_scooter_data(self._scooter_id[count])
+    async def sleep(self, until: float) -> None:
+        """ Waits until time until, a VirtualClock is moved forward to it without waiting. """
+        if isinstance(self.clock, VirtualClock):
+            self.clock.sleep(until - self.clock.now())
+            await asyncio.sleep(0)
+        else:
+            await asyncio.sleep(max(until - self.clock.now(), 0))
 
-            self.scooter.add_scooter_to_dict(data)
-            self.scooter.add_city_to_dict(self._city_data[count])
-            self.end(count)
 
-            count += 1
-            time.sleep(0.001)
+    async def rent(self, scooter_id: int, user_id: int):
+        """ Rent a scooter if it is available, returns (scooter, station) or None. """
+        data = await self.api.get_scooter_data(scooter_id)
 
+        if data == -1:
+            self.failed(scooter_id, "scooter could not be read")
+            return None
 
-    def main(self, total:int):
-        """ Start simulation program. """
-        print("\n************ Welcome to Scooter simulation program **************\n")
-        print("\nThe simulation takes around 3 minutes, do not try to break/stop the program.\n")
-        print("\nStep 1 - Renting scooters . . . . . . . .")
+        # every coroutine has its own scooter and city data, moved step seconds per step
+        scooter = Scooter(scooter_rng(self.seed, scooter_id))
+        scooter.step = self.step
 
-        current = datetime.now().time().strftime("%H:%M:%S")
-        self.handler.start_time = [int(current[:2]), int(current[3:5]), int(current[6:8])]
-        count = 1
+        try:
+            if not scooter.check_scooter_status(data):
+                print("\n\033[1;31m*\033[1;0m Scooter {} is not available.\n".format(scooter_id))
+                return None
+        except TypeError:
+            print("\nScooter {} does not exist.\n".format(scooter_id))
+            return None
 
-        # user id 6 means customer id 1, start counting from 6
-        user = 6
+        city = await self.api.get_city_data(scooter.data.id)
 
-        while count <= total:
-            data = self.api.get_scooter_data(scooter_id = count)
+        if city == -1:
+            self.failed(scooter_id, "city could not be read")
+            return None
 
-            if self.scooter.check_scooter_status(data):
-                # get city
-                city = self.api.get_city_data()
-                self._city_data.append(city)
-                self._scooter_id.append(count)
+        scooter.add_city_to_dict(city)
 
-                # create log/payment and update customer's account
-                self._user_id.append(user)
-                self.api.user_id = str(user)
+        station = await self.api.rent_scooter(scooter.data, user_id)
+        self.stats["rented"] += 1
+        return scooter, station
 
-                self.api.rent_scooter()
-                self._station.append(self.api.station)
 
-                user += 1
-            else:
-                print("\n\033[1;31m*\033[1;0m Scooter {} is not available.\n".format(count))
+    async def ride(self, scooter_id: int, user_id: int, start_time: float, end_time: float) -> None:
+        """
+        Rent the scooter, move it until end time, low battery or outside city and return it.
+        Steps are at start time + n * step, so every run makes the same steps on a VirtualClock.
+        """
+        rental = await self.rent(scooter_id, user_id)
+
+        if rental is None:
+            return
+
+        scooter, station = rental
+        next_time = start_time
+
+        while next_time <= end_time:
+            if scooter.check_scooter_in_city() is False:
+                print("\nScooter {} is outside of the city\n".format(scooter_id))
+                break
+            if scooter.check_battery():
+                print(
+                    "\n\033[1;31m*\033[1;0m Low battery!! the scooter {} needs to be charged."
+                    .format(scooter_id)
+                )
+                break
+
+            scooter.change_location()
+            scooter.move_scooter()
+            self.stats["moves"] += 1
+            await self.api.update_rented_scooter(scooter.data)
+
+            next_time += self.step
+            await self.sleep(next_time)
+
+        minutes = math.ceil((next_time - start_time) / 60)
+        await self.end(scooter, user_id, station, minutes)
+
+
+    async def end(self, scooter: Scooter, user_id: int, station: str, minutes: int) -> None:
+        """ Checks scooter's battery/maintenance/zone and returns it, see return_status. """
+        self.stats["returned"] += 1
+        status, zone = return_status(scooter)
+        scooter.stop_scooter(status = status)
+
+        if zone is None:
+            await self.api.return_scooter(scooter.data, user_id, minutes, station)
+            await self.api.update_rented_scooter(scooter.data)
+            return
+
+        new_station = await self.api.get_station(
+            scooter.city.id,
+            zone,
+            scooter.data.lat,
+            scooter.data.lon
+        )
+
+        # without a station the scooter stays where it is
+        if new_station == -1:
+            self.failed(scooter.data.id, "station in zone {0} could not be read".format(zone))
+        else:
+            scooter.move_to_station(new_station)
 
-            count += 1
+        await self.api.return_scooter(scooter.data, user_id, minutes, station)
+        await self.api.update_scooter(scooter.data)
 
-        self.move()
-        self.return_scooters()
+
+    async def run(self, total: int) -> dict:
+        """ Rent, move and return scooters 1 - total concurrently. Returns the stats. """
+        start_time = self.clock.now()
+
+        # user id 6 means customer id 1
+        await asyncio.gather(*(
+            self.ride(scooter_id, scooter_id + 5, start_time, start_time + self.duration)
+            for scooter_id in range(1, total + 1)
+        ))
+
+        return self.stats
+
+
+    def main(self, total: int, profile: str = None, output: str = None) -> dict:
+        """ Start simulation program, profiled like Simulation.main. Returns the stats. """
+        print("\n************ Welcome to Scooter simulation program (async) **************\n")
+
+        try:
+            with profiled(profile, output):
+                return asyncio.run(self.run(total))
+        finally:
+            self.api.close()
 
 
 
 if __name__ == "__main__":
-    Simulation().main(1000)
+    parser = argparse.ArgumentParser(description = "Scooter simulation")
+    parser.add_argument("--scooters", type = int, default = 1000, help = "number of scooters")
+    parser.add_argument(
+        "--async", dest = "use_async", action = "store_true",
+        help = "move all scooters concurrently"
+    )
+    parser.add_argument(
+        "--concurrency", type = int, default = 200,
+        help = "max requests in flight with --async"
+    )
+    parser.add_argument(
+        "--virtual", action = "store_true",
+        help = "use a virtual clock, the simulation runs faster than real time"
+    )
+    parser.add_argument(
+        "--duration", type = float, default = Simulation.duration,
+        help = "simulation time in seconds"
+    )
+    parser.add_argument(
+        "--tick", type = float, default = Simulation.tick,
+        help = "seconds between two moves of all scooters"
+    )
+    parser.add_argument(
+        "--workers", type = int, default = 1,
+        help = "split the scooters into shards simulated by this many processes"
+    )
+    parser.add_argument(
+        "--fake", action = "store_true",
+        help = "run against a fake backend on a free localhost port"
+    )
+    parser.add_argument(
+        "--seed", type = int,
+        help = "seed the scooters' random numbers, runs with the same seed move the same way"
+    )
+    parser.add_argument("--metrics-file", help = "write metrics to this file, Prometheus format")
+    parser.add_argument(
+        "--metrics-port", type = int,
+        help = "serve metrics at http://127.0.0.1:PORT/metrics"
+    )
+    parser.add_argument(
+        "--metrics-interval", type = float, default = 10,
+        help = "seconds between two writes of the metrics file"
+    )
+    parser.add_argument(
+        "--profile", choices = PROFILERS,
+        help = "profile the run (not with --workers), stats are written on exit"
+    )
+    parser.add_argument(
+        "--profile-output",
+        help = "profile files are written to PROFILE_OUTPUT.txt/.collapsed, "
+        "default SCOOTER_PROFILE_OUTPUT or 'profile'"
+    )
+    parser.add_argument(
+        "--persisted-queries", action = "store_true",
+        help = "send queries as persisted-query hashes, the text only if the server asks for it"
+    )
+    parser.add_argument("--record", help = "append every API request and response to this file")
+    parser.add_argument("--replay", help = "answer API requests from a file written by --record")
+    parser.add_argument(
+        "--replay-latency", action = "store_true",
+        help = "replayed responses wait the recorded seconds, default at once"
+    )
+    args = parser.parse_args()
+
+    if args.workers > 1 and (args.record or args.replay):
+        parser.error("--record and --replay can not be used with --workers")
+
+    # with --workers the metrics only cover the coordinator, not the shard processes
+    exporter = Exporter(
+        path = args.metrics_file,
+        port = args.metrics_port,
+        interval = args.metrics_interval
+    ).start()
+
+    config = ApiData.transport.config()
+    config.update(pool_size = args.concurrency, persisted_queries = args.persisted_queries)
+
+    if args.fake:
+        fake = serve(FakeBackend(scooters = args.scooters, seed = args.seed), port = 0)
+        threading.Thread(target = fake.serve_forever, daemon = True).start()
+        config["url"] = url(fake)
+
+    # one transport for every mode, --async included, so all requests use its settings
+    api_transport = Transport(**config)
+
+    if args.replay:
+        api_transport = ReplayTransport(
+            args.replay,
+            args.replay_latency,
+            headers = ApiData.transport.headers,
+            pool_size = args.concurrency
+        )
+    elif args.record:
+        api_transport = RecordingTransport(args.record, **api_transport.config())
+
+    try:
+        if args.workers > 1:
+            print(run_sharded(
+                args.scooters,
+                args.workers,
+                transport = api_transport,
+                virtual = args.virtual,
+                duration = args.duration,
+                tick = args.tick,
+                seed = args.seed
+            ))
+        elif args.use_async:
+            AsyncSimulation(
+                api_transport,
+                concurrency = args.concurrency,
+                duration = args.duration,
+                step = args.tick,
+                seed = args.seed,
+                clock = VirtualClock() if args.virtual else None
+            ).main(args.scooters, args.profile, args.profile_output)
+        else:
+            simulation = Simulation(
+                api_transport,
+                local_state = True,
+                clock = VirtualClock() if args.virtual else None,
+                seed = args.seed
+            )
+            simulation.duration = args.duration
+            simulation.tick = args.tick
+            simulation.main(args.scooters, args.profile, args.profile_output)
+    finally:
+        exporter.stop()
+
+        if args.replay:
+            print("Replayed requests: {0}".format(api_transport.stats))
+        api_transport.close()
@@ -3,15 +3,198 @@
 
 """ Get and update from the API """
 
+import functools
 import os
-import requests
 
+from src.batch import UpdateBatch
+from src.cache import TTLCache
+from src.documents import Document
 from src.scooter import Scooter
+from src.state import ScooterState
+from src.stations import StationIndex
+from src.transport import Transport
 
 
 url = os.environ.get("API_URL")
 
 
+# GraphQL documents, sent as text or as persisted-query hash
+SCOOTER_QUERY = Document(''' query getScooterById($id: String!) {
+    getScooterById(id: $id) {
+        id
+        latitude
+        longitude
+        speed
+        battery
+        status {
+            id
+            status
+        }
+        station {
+            id
+            station_name
+        }
+    }
+} ''')
+
+UPDATE_SCOOTER_MUTATION = Document(''' mutation updateScooterById(
+    $id: String!,
+    $battery: String!,
+    $status_id: String!,
+    $longitude: String!,
+    $latitude: String!,
+    $price_id: String!,
+    $speed: String!,
+    $station_id: String!) {
+        updateScooterById(
+            id: $id,
+            battery: $battery,
+            status_id: $status_id,
+            longitude: $longitude,
+            latitude: $latitude,
+            price_id: $price_id,
+            speed: $speed,
+            station_id: $station_id) { id }
+} ''')
+
+UPDATE_RENTED_SCOOTER_MUTATION = Document(''' mutation updateRentedScooterById(
+    $id: String!,
+    $battery: String!,
+    $status_id: String!,
+    $longitude: String!,
+    $latitude: String!,
+    $speed: String!) {
+        updateRentedScooterById(
+            id: $id,
+            battery: $battery,
+            status_id: $status_id,
+            longitude: $longitude,
+            latitude: $latitude,
+            speed: $speed)
+            {
+                id
+            }
+} ''')
+
+RENT_SCOOTER_MUTATION = Document(''' mutation rentScooter(
+    $id: String!,
+    $user_id: String!,
+    $longitude: String!,
+    $latitude: String!) {
+        rentScooter(
+            id: $id,
+            user_id: $user_id,
+            longitude: $longitude,
+            latitude: $latitude)
+            {
+                id
+                success
+            }
+} ''')
+
+RETURN_SCOOTER_MUTATION = Document(''' mutation returnScooter(
+    $id: String!,
+    $user_id: String!,
+    $longitude: String!,
+    $latitude: String!,
+    $time: String!,
+    $station: String!) {
+        returnScooter(
+            id: $id,
+            user_id: $user_id,
+            longitude: $longitude,
+            latitude: $latitude,
+            time: $time,
+            station: $station)
+            {
+                success
+            }
+} ''')
+
+CITY_QUERY = Document(''' query getCityByScooterId($id: String!) {
+    getCityByScooterId(id: $id) {
+        id
+        latitude
+        longitude
+        area
+    }
+} ''')
+
+STATION_QUERY = Document(''' query getStationByCityIdAndZoneId($cityId: String!, $zoneId: String!) {
+    getStationByCityIdAndZoneId(cityId: $cityId, zoneId: $zoneId) {
+        id
+        latitude
+        longitude
+    }
+} ''')
+
+
+@functools.lru_cache(maxsize = 128)
+def scooters_query(size: int) -> Document:
+    """ Returns the query of size aliased getScooterById fields, s0: getScooterById(id: $id0). """
+    # selection set of every aliased getScooterById field
+    fields = (
+        " { id latitude longitude speed battery"
+        " status { id status } station { id station_name } }"
+    )
+
+    return Document("query getScootersById({0}) {{{1}\n}}".format(
+        ", ".join("$id{0}: String!".format(index) for index in range(size)),
+        "".join(
+            "\n    s{0}: getScooterById(id: $id{0}){1}".format(index, fields)
+            for index in range(size)
+        )
+    ))
+
+
+def scooter_variables(data: ScooterState) -> dict:
+    """ Returns the variables of updateScooterById for a scooter's data. """
+    return {
+        'id': data.id,
+        'status_id': str(data.status),
+        'latitude': str(data.lat),
+        'longitude': str(data.lon),
+        'speed': str(data.speed),
+        'battery': str(data.battery),
+        'station_id': str(data.station),
+        'price_id': "1"
+    }
+
+
+def rented_variables(data: ScooterState) -> dict:
+    """ Returns the variables of updateRentedScooterById for a scooter's data. """
+    return {
+        'id': data.id,
+        'status_id': str(data.status),
+        'latitude': str(data.lat),
+        'longitude': str(data.lon),
+        'speed': str(data.speed),
+        'battery': str(data.battery),
+    }
+
+
+def rent_variables(data: ScooterState, user_id) -> dict:
+    """ Returns the variables of rentScooter for a scooter's data and user id. """
+    return {
+        'id': data.id,
+        'user_id': str(user_id),
+        'longitude': str(data.lon),
+        'latitude': str(data.lat),
+    }
+
+
+def return_variables(data: ScooterState, user_id, time: int, station: str) -> dict:
+    """ Returns the variables of returnScooter for a scooter's data, user id and rent time. """
+    return {
+        'id': data.id,
+        'user_id': str(user_id),
+        'longitude': str(data.lon),
+        'latitude': str(data.lat),
+        'time': str(time),
+        'station': station
+    }
+
+
 class ApiData(Scooter):
     """ Api class """
     # API endpoint URL
@@ -20,164 +203,121 @@ class ApiData(Scooter):
     # Set the headers
     _HEADERS = { "Content-Type": "application/json"}
 
+    # connection pool shared by all instances
+    transport = Transport(_URL, _HEADERS)
 
-    def __init__(self, user_id: int) -> None:
-        """ Initialize class """
+    # caches shared by all instances, cities by scooter id and station indexes by (city id, zone id)
+    city_cache = TTLCache()
+    station_cache = TTLCache()
+
+
+    def __init__(self, user_id: int, transport: Transport = None, clock = None) -> None:
+        """
+        Initialize class, an own transport can be injected to share another pool.
+        Queued updates are timed by clock (default SystemClock).
+        """
         super().__init__()
         self.user_id = user_id
         self.station = ""
 
+        # why the last read returned -1, a TransportError if the request failed
+        self.error = None
+
+        if transport is not None:
+            self.transport = transport
+
+        # queued updateRentedScooterById mutations, latest per scooter
+        self.batch = UpdateBatch(self.transport, clock = clock)
+
 
     def get_scooter_data(self, scooter_id: int) -> dict:
         """ Get scooter data from API. """
-        # Create the GraphQL query
-        query = ''' query getScooterById($id: String!) {
-            getScooterById(id: $id) {
-                id
-                latitude
-                longitude
-                speed
-                battery
-                status {
-                    id
-                    status
-                }
-                station {
-                    id
-                    station_name
-                }
-            }
-        } '''
-
-        payload = {
-            'query': query,
-            'variables': {
-                'id': str(scooter_id)
-            }
-        }
+        payload = SCOOTER_QUERY.payload({'id': str(scooter_id)})
 
         try:
-            # Send the POST request
-            response = requests.post(self._URL, json=payload, headers=self._HEADERS)
+            # Send the POST request, retried on timeouts and 5xx
+            response = self.transport.post(payload, idempotent = True)
 
             return response.json()["data"]["getScooterById"][0]
-        except (Exception, ConnectionError):
+        except (Exception, ConnectionError) as error:
+            self.error = error
             return -1
 
 
+    def get_scooters_data(self, scooter_ids: list, chunk_size: int = 100) -> dict:
+        """
+        Get many scooters from API, chunk_size scooters per request.
+        Returns a dictionary with scooter id (str) as key, unknown ids are left out.
+        """
+        scooter_ids = [str(scooter_id) for scooter_id in scooter_ids]
+        scooters = {}
+
+        for start in range(0, len(scooter_ids), chunk_size):
+            chunk = scooter_ids[start:start + chunk_size]
+
+            # one aliased field per scooter, the query is built once per chunk size
+            payload = scooters_query(len(chunk)).payload({
+                "id{0}".format(index): value for index, value in enumerate(chunk)
+            })
+
+            try:
+                response = self.transport.post(payload, idempotent = True).json()["data"]
+            except (Exception, ConnectionError) as error:
+                self.error = error
+                return -1
+
+            for index, scooter_id in enumerate(chunk):
+                if response.get("s{0}".format(index)):
+                    scooters[scooter_id] = response["s{0}".format(index)][0]
+
+        return scooters
+
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """ Removes all cached cities and stations. """
+        cls.city_cache.invalidate()
+        cls.station_cache.invalidate()
+
+
     def update_scooter(self) -> None:
         """ Update api with all scooters data. """
-        mutation = ''' mutation updateScooterById(
-            $id: String!,
-            $battery: String!,
-            $status_id: String!,
-            $longitude: String!,
-            $latitude: String!,
-            $price_id: String!,
-            $speed: String!,
-            $station_id: String!) {
-                updateScooterById(
-                    id: $id,
-                    battery: $battery,
-                    status_id: $status_id,
-                    longitude: $longitude,
-                    latitude: $latitude,
-                    price_id: $price_id,
-                    speed: $speed,
-                    station_id: $station_id) { id }
-        } '''
-
-        payload = {
-            'query': mutation,
-            'variables': {
-                'id': self.data["id"],
-                'status_id': str(self.data["status"]),
-                'latitude': str(self.data["lat"]),
-                'longitude': str(self.data["lon"]),
-                'speed': str(self.data["speed"]),
-                'battery': str(self.data["battery"]),
-                'station_id': str(self.data["station"]),
-                'price_id': "1"
-            }
-        }
+        payload = UPDATE_SCOOTER_MUTATION.payload(scooter_variables(self.data))
 
         try:
-            requests.post(self._URL, json=payload, headers=self._HEADERS)
+            self.transport.post(payload)
         except (Exception, ConnectionError) as error:
             print(error)
 
 
     def update_rented_scooter(self) -> None:
         """ Update api with scooter's new position, speed, status and battery level. """
-        mutation = ''' mutation updateRentedScooterById(
-            $id: String!,
-            $battery: String!,
-            $status_id: String!,
-            $longitude: String!,
-            $latitude: String!,
-            $speed: String!) {
-                updateRentedScooterById(
-                    id: $id,
-                    battery: $battery,
-                    status_id: $status_id,
-                    longitude: $longitude,
-                    latitude: $latitude,
-                    speed: $speed)
-                    {
-                        id
-                    }
-        } '''
-
-        payload = {
-            'query': mutation,
-            'variables': {
-                'id': self.data["id"],
-                'status_id': str(self.data["status"]),
-                'latitude': str(self.data["lat"]),
-                'longitude': str(self.data["lon"]),
-                'speed': str(self.data["speed"]),
-                'battery': str(self.data["battery"]),
-            }
-        }
+        payload = UPDATE_RENTED_SCOOTER_MUTATION.payload(rented_variables(self.data))
 
         try:
-            requests.post(self._URL, json=payload, headers=self._HEADERS)
+            self.transport.post(payload)
         except (Exception, ConnectionError) as error:
             print(error)
 
 
+    def queue_rented_update(self) -> None:
+        """ Queue scooter's new position, speed, status and battery level for a batched update. """
+        self.batch.add(rented_variables(self.data))
+
+
+    def flush_updates(self) -> None:
+        """ Send all queued scooter updates. """
+        self.batch.flush()
+
+
     def rent_scooter(self) -> None:
         """
         Create log. Data to be added is scooter's position, start date/time and scooter/user id.
         """
-        mutation = ''' mutation rentScooter(
-            $id: String!,
-            $user_id: String!,
-            $longitude: String!,
-            $latitude: String!) {
-                rentScooter(
-                    id: $id,
-                    user_id: $user_id,
-                    longitude: $longitude,
-                    latitude: $latitude)
-                    { 
-                        id 
-                        success
-                    }
-        } '''
-
-        payload = {
-            'query': mutation,
-            'variables': {
-                'id': self.data["id"],
-                'user_id': str(self.user_id),
-                'longitude': str(self.data["lon"]),
-                'latitude': str(self.data["lat"]),
-            }
-        }
+        payload = RENT_SCOOTER_MUTATION.payload(rent_variables(self.data, self.user_id))
 
         try:
-            response = requests.post(self._URL, json=payload, headers=self._HEADERS)
+            response = self.transport.post(payload)
 
             # save the station
             self.station = response.json()["data"]["rentScooter"]["success"]
@@ -188,40 +328,16 @@ class ApiData(Scooter):
     def return_scooter(self, time: int) -> None:
         """
         Create log. Data to be added is scooter's position, start date/time and scooter/user id.
+        Queued updates are sent first, so the log is based on the final position.
         """
-        mutation = ''' mutation returnScooter(
-            $id: String!,
-            $user_id: String!,
-            $longitude: String!,
-            $latitude: String!,
-            $time: String!,
-            $station: String!) {
-                returnScooter(
-                    id: $id,
-                    user_id: $user_id,
-                    longitude: $longitude,
-                    latitude: $latitude,
-                    time: $time,
-                    station: $station)
-                    { 
-                        success
-                    }
-        } '''
-
-        payload = {
-            'query': mutation,
-            'variables': {
-                'id': self.data["id"],
-                'user_id': str(self.user_id),
-                'longitude': str(self.data["lon"]),
-                'latitude': str(self.data["lat"]),
-                'time': str(time),
-                'station': self.station
-            }
-        }
+        self.flush_updates()
+
+        payload = RETURN_SCOOTER_MUTATION.payload(
+            return_variables(self.data, self.user_id, time, self.station)
+        )
 
         try:
-            requests.post(self._URL, json=payload, headers=self._HEADERS)
+            self.transport.post(payload)
         except (Exception, ConnectionError) as error:
             print(error)
 
@@ -229,56 +345,67 @@ class ApiData(Scooter):
     def get_city_data(self) -> dict:
         """
         Get city's center position, id and area where the scooter is located.
-        And adds it to city dictionary.
+        And adds it to city dictionary. Cities are cached by scooter id.
         """
-        query = ''' query getCityByScooterId($id: String!) {
-            getCityByScooterId(id: $id) {
-                id
-                latitude
-                longitude
-                area
-            }
-        } '''
+        city = self.city_cache.get(self.data.id)
 
-        payload = {
-            'query': query,
-            'variables': {
-                'id': self.data["id"]
-            }
-        }
+        if city is not None:
+            return city
+
+        payload = CITY_QUERY.payload({'id': self.data.id})
 
         try:
-            response = requests.post(self._URL, json=payload, headers=self._HEADERS)
+            response = self.transport.post(payload, idempotent = True)
 
-            return response.json()["data"]["getCityByScooterId"][0]
-        except (Exception, ConnectionError):
+            city = response.json()["data"]["getCityByScooterId"][0]
+        except (Exception, ConnectionError) as error:
+            self.error = error
             return -1
 
+        self.city_cache.set(self.data.id, city)
+        return city
 
-    def get_station(self, zone_id: str) -> dict:
+
+    def get_stations(self, zone_id: str) -> StationIndex:
         """
-        return random charging/maintenance station data in the city where the scooter is located.
+        Returns an index of all stations of a zone in the city where the scooter is located.
         Zone id: 1- Charging Station, 2- Parking Station, 3- Bike Statione, 4- Maintenance Station.
+        Indexes are cached by city and zone id.
         """
-        query = ''' query getStationByCityIdAndZoneId($cityId: String!, $zoneId: String!) {
-            getStationByCityIdAndZoneId(cityId: $cityId, zoneId: $zoneId) {
-                id
-                latitude
-                longitude
-            }
-        } '''
+        key = (self.city.id, zone_id)
+        stations = self.station_cache.get(key)
 
-        payload = {
-            'query': query,
-            'variables': {
-                'cityId': self.city["id"],
-                'zoneId': zone_id
-            }
-        }
+        if stations is not None:
+            return stations
+
+        payload = STATION_QUERY.payload({
+            'cityId': self.city.id,
+            'zoneId': zone_id
+        })
 
         try:
-            response = requests.post(self._URL, json=payload, headers=self._HEADERS)
+            response = self.transport.post(payload, idempotent = True)
 
-            return response.json()["data"]["getStationByCityIdAndZoneId"][0]
-        except (Exception, ConnectionError):
+            stations = StationIndex(response.json()["data"]["getStationByCityIdAndZoneId"])
+        except (Exception, ConnectionError) as error:
+            self.error = error
             return -1
+
+        self.station_cache.set(key, stations)
+        return stations
+
+
+    def get_station(self, zone_id: str) -> dict:
+        """
+        return the charging/maintenance station nearest to the scooter in the city where
+        the scooter is located, -1 if there is none (see error).
+        """
+        stations = self.get_stations(zone_id)
+
+        if stations == -1:
+            return -1
+        if len(stations) == 0:
+            self.error = LookupError("no station in zone {0}".format(zone_id))
+            return -1
+
+        return stations.nearest(self.data.lat, self.data.lon)
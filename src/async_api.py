@@ -0,0 +1,173 @@
+#!/usr/bin/python3
+# pylint: disable=broad-except
+
+"""
+Asyncio client for the API.
+
+AsyncApiData sends the same GraphQL operations as ApiData, but its methods are
+coroutines that take the scooter's data as argument, so many scooters can have
+requests in flight at the same time. At most 'concurrency' requests are sent at
+once, each on a worker thread posting through a pooled Transport.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from src.api import (
+    ApiData,
+    SCOOTER_QUERY,
+    UPDATE_SCOOTER_MUTATION,
+    UPDATE_RENTED_SCOOTER_MUTATION,
+    RENT_SCOOTER_MUTATION,
+    RETURN_SCOOTER_MUTATION,
+    CITY_QUERY,
+    STATION_QUERY,
+    scooter_variables,
+    rented_variables,
+    rent_variables,
+    return_variables
+)
+from src.documents import Document
+from src.state import ScooterState
+from src.stations import StationIndex
+from src.transport import Transport
+
+
+
+class AsyncApiData():
+    """ AsyncApiData class """
+
+    def __init__(self, transport: Transport = None, concurrency: int = 100) -> None:
+        """
+        Initialize class, concurrency is the max number of requests in flight.
+        Without a transport a new one is created with one pooled connection per request.
+        """
+        if transport is None:
+            transport = Transport(ApiData._URL, ApiData._HEADERS, pool_size = concurrency)
+
+        self.transport = transport
+        self.concurrency = concurrency
+
+        self._executor = ThreadPoolExecutor(
+            max_workers = concurrency,
+            thread_name_prefix = "api"
+        )
+
+        # created in the running event loop
+        self._semaphore = None
+
+
+    async def _post(self, document: Document, variables: dict, idempotent: bool = False) -> dict:
+        """ Send a GraphQL request and returns the json response, queries are idempotent. """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        payload = document.payload(variables)
+
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                self._executor,
+                functools.partial(self.transport.post, payload, idempotent = idempotent)
+            )
+
+        return response.json()
+
+
+    async def get_scooter_data(self, scooter_id: int) -> dict:
+        """ Get scooter data from API. """
+        try:
+            response = await self._post(SCOOTER_QUERY, { 'id': str(scooter_id) }, True)
+
+            return response["data"]["getScooterById"][0]
+        except (Exception, ConnectionError):
+            return -1
+
+
+    async def update_scooter(self, data: ScooterState) -> None:
+        """ Update api with all scooter's data. """
+        try:
+            await self._post(UPDATE_SCOOTER_MUTATION, scooter_variables(data))
+        except (Exception, ConnectionError) as error:
+            print(error)
+
+
+    async def update_rented_scooter(self, data: ScooterState) -> None:
+        """ Update api with scooter's new position, speed, status and battery level. """
+        try:
+            await self._post(UPDATE_RENTED_SCOOTER_MUTATION, rented_variables(data))
+        except (Exception, ConnectionError) as error:
+            print(error)
+
+
+    async def rent_scooter(self, data: ScooterState, user_id: int) -> str:
+        """ Create log for a user renting the scooter. Returns the station or "". """
+        try:
+            response = await self._post(RENT_SCOOTER_MUTATION, rent_variables(data, user_id))
+
+            return response["data"]["rentScooter"]["success"]
+        except (Exception, ConnectionError) as error:
+            print(error)
+            return ""
+
+
+    async def return_scooter(
+        self,
+        data: ScooterState,
+        user_id: int,
+        time: int,
+        station: str
+    ) -> None:
+        """ Update the log of a rental, time is the rent time in minutes. """
+        try:
+            await self._post(
+                RETURN_SCOOTER_MUTATION,
+                return_variables(data, user_id, time, station)
+            )
+        except (Exception, ConnectionError) as error:
+            print(error)
+
+
+    async def get_city_data(self, scooter_id: str) -> dict:
+        """ Get city's center position, id and area where the scooter is located. """
+        try:
+            response = await self._post(CITY_QUERY, { 'id': scooter_id }, True)
+
+            return response["data"]["getCityByScooterId"][0]
+        except (Exception, ConnectionError):
+            return -1
+
+
+    async def get_station(self, city_id: str, zone_id: str, lat: float, lon: float) -> dict:
+        """
+        Returns the charging/maintenance station in a city nearest to lat/lon, -1 if there is none.
+        Zone id: 1- Charging Station, 2- Parking Station, 3- Bike Statione, 4- Maintenance Station.
+        Station indexes are shared with ApiData's cache.
+        """
+        key = (city_id, zone_id)
+        stations = ApiData.station_cache.get(key)
+
+        if stations is None:
+            try:
+                response = await self._post(
+                    STATION_QUERY,
+                    { 'cityId': city_id, 'zoneId': zone_id },
+                    True
+                )
+
+                stations = StationIndex(response["data"]["getStationByCityIdAndZoneId"])
+            except (Exception, ConnectionError):
+                return -1
+
+            ApiData.station_cache.set(key, stations)
+
+        if len(stations) == 0:
+            return -1
+
+        return stations.nearest(lat, lon)
+
+
+    def close(self) -> None:
+        """ Stop the worker threads. """
+        self._executor.shutdown(wait = True)
@@ -0,0 +1,482 @@
+#!/usr/bin/python3
+# pylint: disable=too-many-instance-attributes,too-many-arguments
+
+"""
+Fake GraphQL backend for load testing the scooter program on one machine.
+
+FakeBackend keeps scooters, cities, stations and rental logs in memory and
+answers the GraphQL documents sent by ApiData, AsyncApiData and UpdateBatch
+(also aliased batch documents). It is seeded from data in the format of
+tests/dummy.json, a list of API responses:
+
+[{
+    "getScooterById": [scooter, ...],
+    "getCityByScooterId": [city],                 # the city of these scooters
+    "getStationByCityIdAndZoneId": [station, ...] # stations in the city
+}]
+
+With scooters=n the first scooter is copied to ids 1 - n, spread over the
+first city. Every request waits latency seconds and fails with status 503
+with probability error_rate.
+
+Documents are parsed once and cached. Persisted queries (APQ) are supported:
+a payload with only a hash gets PersistedQueryNotFound until the document has
+been sent once with its text, or PersistedQueryNotSupported with
+persisted_queries=False.
+
+The backend is used in-process through FakeTransport, or over HTTP:
+
+python3 -m src.backend --port 1337 --scooters 1000 --latency 0.005 --error-rate 0.01
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from src.transport import Transport
+
+
+# API endpoint path, see ApiData._URL
+PATH = "/api/v1/graphql"
+
+# default data, tests/dummy.json of the repository, found from any working directory
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests", "dummy.json")
+
+# status id: status name
+STATUSES = {
+    "1": "Available",
+    "2": "Unavailable",
+    "3": "Maintenance",
+    "4": "Charging",
+    "7": "Running"
+}
+
+# one field of a document, with optional alias: s0: getScooterById(id: $id0)
+FIELD = re.compile(r"(?:(\w+)\s*:\s*)?(\w+)\s*\(([^)]*)\)")
+
+# one argument of a field: id: $id0
+ARGUMENT = re.compile(r"(\w+)\s*:\s*\$(\w+)")
+
+
+
+@functools.lru_cache(maxsize = 256)
+def parse(query: str) -> tuple:
+    """ Returns (alias, field name, ((argument, variable), ...)) of every field of a document. """
+    # variable definitions come before the first selection set
+    body = query[query.find("{") + 1:]
+
+    return tuple(
+        (alias, name, tuple(ARGUMENT.findall(arguments)))
+        for alias, name, arguments in FIELD.findall(body)
+    )
+
+
+def _error(message: str, code: str = None) -> dict:
+    """ Returns a GraphQL response with one error. """
+    error = {"message": message}
+
+    if code is not None:
+        error["extensions"] = {"code": code}
+
+    return {"errors": [error]}
+
+
+
+class FakeBackend():
+    """ FakeBackend class """
+
+    def __init__(
+        self,
+        data: list = None,
+        scooters: int = None,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = None,
+        persisted_queries: bool = True
+    ) -> None:
+        """
+        Initialize class, data is a list of API responses (see module docstring),
+        default tests/dummy.json. latency is in seconds, error_rate between 0 and 1.
+        """
+        if data is None:
+            with open(DATA, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+
+        self.latency = latency
+        self.error_rate = error_rate
+        self.persisted_queries = persisted_queries
+        self.rng = random.Random(seed)
+
+        self.scooters = {}
+        self.cities = {}
+        self.stations = []
+        self.logs = []
+
+        # persisted documents by hash
+        self.documents = {}
+
+        # number of requests and injected errors
+        self.requests = 0
+        self.errors = 0
+
+        self._lock = threading.Lock()
+
+        # resolvers by field name
+        self._resolvers = {
+            "getScooterById": self._get_scooter,
+            "getCityByScooterId": self._get_city,
+            "getStationByCityIdAndZoneId": self._get_stations,
+            "rentScooter": self._rent_scooter,
+            "returnScooter": self._return_scooter,
+            "updateScooterById": self._update_scooter,
+            "updateRentedScooterById": self._update_rented_scooter,
+        }
+
+        for response in data:
+            self.add(response)
+
+        if scooters is not None:
+            self.generate(scooters)
+
+
+    def add(self, response: dict) -> None:
+        """ Adds the scooters, city and stations of one dummy.json entry. """
+        city = dict(response["getCityByScooterId"][0])
+        self.cities[city["id"]] = city
+
+        for scooter in response.get("getScooterById", []):
+            self.scooters[scooter["id"]] = dict(scooter, city_id = city["id"])
+
+        for station in response.get("getStationByCityIdAndZoneId", []):
+            self.stations.append(dict(station, city_id = city["id"]))
+
+
+    def generate(self, total: int) -> None:
+        """ Replaces the scooters with ids 1 - total, copies of the first scooter in its city. """
+        template = next(iter(self.scooters.values()))
+        city = self.cities[template["city_id"]]
+
+        # inside 90% of the city's radius, in degrees
+        radius = math.sqrt(float(city["area"]) / math.pi) * 0.9 / 111.2
+        lat, lon = float(city["latitude"]), float(city["longitude"])
+
+        self.scooters = {}
+
+        for scooter_id in range(1, total + 1):
+            distance = radius * math.sqrt(self.rng.random())
+            angle = self.rng.uniform(0, 2 * math.pi)
+
+            self.scooters[str(scooter_id)] = dict(
+                template,
+                id = str(scooter_id),
+                latitude = str(lat + distance * math.sin(angle)),
+                longitude = str(lon + distance * math.cos(angle) / math.cos(math.radians(lat))),
+                battery = str(self.rng.randint(50, 100)),
+                status = {"id": "1", "status": STATUSES["1"]}
+            )
+
+
+    def handle(self, payload: dict) -> tuple:
+        """ Returns (HTTP status, response body) for a GraphQL payload, after latency. """
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            self.requests += 1
+
+            if self.error_rate and self.rng.random() < self.error_rate:
+                self.errors += 1
+                return 503, {"errors": [{"message": "injected error"}]}
+
+            return 200, self.execute(payload)
+
+
+    def document(self, payload: dict) -> tuple:
+        """ Returns (document text, None) of a payload, or (None, error response). """
+        query = payload.get("query")
+        persisted = (payload.get("extensions") or {}).get("persistedQuery")
+
+        if not persisted:
+            return query or "", None
+
+        if not self.persisted_queries:
+            return None, _error("PersistedQueryNotSupported", "PERSISTED_QUERY_NOT_SUPPORTED")
+
+        digest = persisted.get("sha256Hash")
+
+        if query is None:
+            query = self.documents.get(digest)
+
+            if query is None:
+                return None, _error("PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND")
+        elif hashlib.sha256(query.encode("utf-8")).hexdigest() != digest:
+            return None, _error("provided sha does not match query")
+        else:
+            self.documents[digest] = query
+
+        return query, None
+
+
+    def execute(self, payload: dict) -> dict:
+        """ Returns the GraphQL response for a payload, every field is resolved in order. """
+        query, error = self.document(payload)
+
+        if error is not None:
+            return error
+
+        variables = payload.get("variables") or {}
+        data = {}
+        errors = []
+
+        for alias, name, arguments in parse(query):
+            resolver = self._resolvers.get(name)
+
+            if resolver is None:
+                errors.append({"message": "Cannot query field '{0}'".format(name)})
+                continue
+
+            try:
+                data[alias or name] = resolver({
+                    argument: variables.get(variable)
+                    for argument, variable in arguments
+                })
+            except (KeyError, TypeError) as error:
+                data[alias or name] = None
+                errors.append({"message": "{0}: {1!r}".format(name, error)})
+
+        if errors:
+            return {"data": data or None, "errors": errors}
+        return {"data": data}
+
+
+    def _get_scooter(self, arguments: dict) -> list:
+        """ Resolves getScooterById. """
+        scooter = self.scooters.get(arguments["id"])
+        return [self._public(scooter)] if scooter else []
+
+
+    def _get_city(self, arguments: dict) -> list:
+        """ Resolves getCityByScooterId. """
+        scooter = self.scooters.get(arguments["id"])
+        return [dict(self.cities[scooter["city_id"]])] if scooter else []
+
+
+    def _get_stations(self, arguments: dict) -> list:
+        """ Resolves getStationByCityIdAndZoneId, stations without zone_id are in every zone. """
+        return [
+            {key: station[key] for key in ("id", "latitude", "longitude")}
+            for station in self.stations
+            if station["city_id"] == arguments["cityId"]
+            and station.get("zone_id", arguments["zoneId"]) == arguments["zoneId"]
+        ]
+
+
+    def _rent_scooter(self, arguments: dict) -> dict:
+        """ Resolves rentScooter, returns the log id and the scooter's station. """
+        scooter = self.scooters[arguments["id"]]
+        scooter["status"] = {"id": "7", "status": STATUSES["7"]}
+        self._move(scooter, arguments)
+
+        self.logs.append(dict(arguments, start_station = scooter["station"]["id"]))
+
+        return {"id": str(len(self.logs)), "success": scooter["station"]["id"]}
+
+
+    def _return_scooter(self, arguments: dict) -> dict:
+        """ Resolves returnScooter, closes the user's open log of the scooter. """
+        self._move(self.scooters[arguments["id"]], arguments)
+
+        for log in reversed(self.logs):
+            if log["id"] == arguments["id"] and log["user_id"] == arguments["user_id"]:
+                log.setdefault("time", arguments["time"])
+                break
+
+        return {"success": True}
+
+
+    def _update_scooter(self, arguments: dict) -> dict:
+        """ Resolves updateScooterById. """
+        scooter = self._update_rented_scooter(arguments)
+        self.scooters[arguments["id"]]["station"] = {
+            "id": arguments["station_id"],
+            "station_name": ""
+        }
+
+        return scooter
+
+
+    def _update_rented_scooter(self, arguments: dict) -> dict:
+        """ Resolves updateRentedScooterById. """
+        scooter = self.scooters[arguments["id"]]
+        scooter["speed"] = arguments["speed"]
+        scooter["battery"] = arguments["battery"]
+        scooter["status"] = {
+            "id": arguments["status_id"],
+            "status": STATUSES.get(arguments["status_id"], "")
+        }
+        self._move(scooter, arguments)
+
+        return {"id": scooter["id"]}
+
+
+    @staticmethod
+    def _move(scooter: dict, arguments: dict) -> None:
+        """ Sets the scooter's position from the latitude/longitude arguments. """
+        scooter["latitude"] = arguments["latitude"]
+        scooter["longitude"] = arguments["longitude"]
+
+
+    @staticmethod
+    def _public(scooter: dict) -> dict:
+        """ Returns the scooter as the API does, without the city id. """
+        public = dict(scooter)
+        del public["city_id"]
+        return public
+
+
+
+class FakeResponse():  # pylint: disable=too-few-public-methods
+    """ FakeResponse class, the part of requests.Response the client reads. """
+
+    def __init__(self, status_code: int, body: dict) -> None:
+        """ Initialize class """
+        self.status_code = status_code
+        self._body = body
+
+
+    def json(self) -> dict:
+        """ Returns the response body. """
+        return self._body
+
+
+
+class FakeSession():
+    """ FakeSession class, posts to a FakeBackend instead of the network. """
+
+    def __init__(self, backend: FakeBackend) -> None:
+        """ Initialize class """
+        self.backend = backend
+
+
+    def post(self, _url: str, json: dict = None, headers: dict = None, timeout = None):
+        """ Returns the backend's response, raises requests.Timeout if latency > timeout. """
+        # pylint: disable=redefined-outer-name,unused-argument
+        if timeout is not None and self.backend.latency > timeout:
+            time.sleep(timeout)
+            raise requests.Timeout("fake backend latency {0}s".format(self.backend.latency))
+
+        return FakeResponse(*self.backend.handle(json))
+
+
+    def close(self) -> None:
+        """ Nothing to close. """
+
+
+
+class FakeTransport(Transport):
+    """
+    FakeTransport class, a Transport whose requests are answered by a FakeBackend
+    in the same process. Retries and the circuit breaker work as for HTTP.
+    """
+
+    def __init__(self, backend: FakeBackend, **settings) -> None:
+        """ Initialize class, settings are Transport's arguments except url. """
+        super().__init__("fake://backend", **settings)
+        self.backend = backend
+        self._session = FakeSession(backend)
+
+
+    @property
+    def session(self) -> FakeSession:
+        """ Returns the fake session. """
+        return self._session
+
+
+    def close(self) -> None:
+        """ Nothing to close. """
+
+
+
+def serve(backend: FakeBackend, host: str = "127.0.0.1", port: int = 1337) -> ThreadingHTTPServer:
+    """
+    Returns an HTTP server answering GraphQL requests at PATH with backend,
+    port 0 picks a free port. Call serve_forever() on it, e.g. in a thread.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        """ Handler class """
+
+        protocol_version = "HTTP/1.1"
+
+        # headers and body are written separately, do not wait for delayed ACKs
+        disable_nagle_algorithm = True
+
+        def do_POST(self):  # pylint: disable=invalid-name
+            """ Answer a GraphQL request. """
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+            if self.path == PATH:
+                status, body = backend.handle(payload)
+            else:
+                status, body = 404, {"errors": [{"message": "Not found"}]}
+
+            content = json.dumps(body).encode("utf-8")
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *_args):  # pylint: disable=arguments-differ
+            """ No log line per request. """
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+
+    return server
+
+
+def url(server: ThreadingHTTPServer) -> str:
+    """ Returns the GraphQL URL of a server from serve(). """
+    host, port = server.server_address[:2]
+    return "http://{0}:{1}{2}".format(host, port, PATH)
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Fake scooter GraphQL backend")
+    parser.add_argument("--host", default = "127.0.0.1", help = "address to listen on")
+    parser.add_argument("--port", type = int, default = 1337, help = "port to listen on")
+    parser.add_argument("--scooters", type = int, default = None, help = "number of scooters")
+    parser.add_argument("--latency", type = float, default = 0.0, help = "seconds per request")
+    parser.add_argument(
+        "--error-rate", type = float, default = 0.0,
+        help = "share of requests failing with status 503"
+    )
+    parser.add_argument("--seed", type = int, default = None, help = "seed for scooters and errors")
+    args = parser.parse_args()
+
+    fake = serve(
+        FakeBackend(
+            scooters = args.scooters,
+            latency = args.latency,
+            error_rate = args.error_rate,
+            seed = args.seed
+        ),
+        args.host,
+        args.port
+    )
+
+    print("Fake backend at {0}".format(url(fake)))
+    fake.serve_forever()
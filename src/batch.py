@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+# pylint: disable=broad-except,too-many-instance-attributes
+
+"""
+Write-behind batching of updateRentedScooterById mutations.
+
+Updates are collected and sent as one aliased GraphQL document, e.g.
+
+mutation updateRentedScooters($id0: String!, ..., $id1: String!, ...) {
+    u0: updateRentedScooterById(id: $id0, ...) { id }
+    u1: updateRentedScooterById(id: $id1, ...) { id }
+}
+
+Updates are keyed by scooter id, a newer update of a queued scooter replaces
+the old one, so only the latest state of every scooter is sent. A batch is sent
+when it reaches max_size scooters, when the oldest queued update is older than
+max_delay seconds or when flush() is called. With background=True a worker
+thread sends the batch after max_delay seconds even if nothing more is added,
+the thread ends when the queue is empty. Time is read from clock (default
+SystemClock), the clock of the simulation; background needs a SystemClock.
+
+The document only depends on the number of updates and is built once per size.
+"""
+
+import functools
+import threading
+
+from src.clock import SystemClock
+from src.documents import Document
+from src.transport import Transport
+
+
+# variables of updateRentedScooterById, all of type String!
+FIELDS = ("id", "battery", "status_id", "longitude", "latitude", "speed")
+
+
+
+class UpdateBatch():
+    """ UpdateBatch class """
+
+    def __init__(
+        self,
+        transport: Transport,
+        max_size: int = 100,
+        max_delay: float = 1.0,
+        background: bool = False,
+        clock = None
+    ) -> None:
+        """ Initialize class, max_delay is in seconds read from clock (default SystemClock). """
+        self.transport = transport
+        self.clock = SystemClock() if clock is None else clock
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.background = background
+
+        # scooter id: latest update variables
+        self._pending = {}
+        self._oldest = None
+        self._worker = None
+
+        # _lock guards the queue, _send_lock keeps flushes in order
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+
+
+    def __len__(self) -> int:
+        """ Returns number of queued scooters. """
+        return len(self._pending)
+
+
+    def add(self, variables: dict) -> None:
+        """ Queue one update, the batch is sent if it is full or too old. """
+        with self._lock:
+            if self._oldest is None:
+                self._oldest = self.clock.now()
+
+            self._pending[variables["id"]] = variables
+
+            if self.background and self._worker is None:
+                self._worker = threading.Thread(target = self._run, name = "update-batch")
+                self._worker.daemon = True
+                self._worker.start()
+
+            send = (
+                len(self._pending) >= self.max_size
+                or self.clock.now() - self._oldest >= self.max_delay
+            )
+
+        if send:
+            self.flush()
+
+
+    def flush(self) -> None:
+        """ Send all queued updates, max_size updates per request. """
+        with self._send_lock:
+            with self._lock:
+                pending = list(self._pending.values())
+                self._pending = {}
+                self._oldest = None
+
+            for start in range(0, len(pending), self.max_size):
+                try:
+                    self.transport.post(self.build(pending[start:start + self.max_size]))
+                except (Exception, ConnectionError) as error:
+                    print(error)
+
+
+    def _run(self) -> None:
+        """ Worker thread, sends the batch when it is max_delay seconds old. """
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._worker = None
+                    return
+
+                wait = self._oldest + self.max_delay - self.clock.now()
+
+            if wait > 0:
+                self.clock.sleep(wait)
+            else:
+                self.flush()
+
+
+    @staticmethod
+    @functools.lru_cache(maxsize = 128)
+    def document(size: int) -> Document:
+        """ Returns the aliased mutation of size updates. """
+        definitions = []
+        selections = []
+
+        for index in range(size):
+            arguments = []
+
+            for field in FIELDS:
+                name = "{0}{1}".format(field, index)
+                definitions.append("${0}: String!".format(name))
+                arguments.append("{0}: ${1}".format(field, name))
+
+            selections.append("u{0}: updateRentedScooterById({1}) {{ id }}".format(
+                index,
+                ", ".join(arguments)
+            ))
+
+        return Document("mutation updateRentedScooters({0}) {{\n    {1}\n}}".format(
+            ", ".join(definitions),
+            "\n    ".join(selections)
+        ))
+
+
+    @staticmethod
+    def build(updates: list) -> dict:
+        """ Returns one aliased mutation payload for a list of update variables. """
+        variables = {}
+
+        for index, update in enumerate(updates):
+            for field in FIELDS:
+                variables["{0}{1}".format(field, index)] = update[field]
+
+        return UpdateBatch.document(len(updates)).payload(variables)
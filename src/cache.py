@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+
+"""
+Cache for API data that seldom changes, e.g. cities and stations.
+
+TTLCache keeps at most max_size values, the least recently used value is
+evicted first, and a value expires ttl seconds after it was added. Hits and
+misses are counted.
+"""
+
+import threading
+from collections import OrderedDict
+
+from src.clock import SystemClock
+
+
+
+class TTLCache():
+    """ TTLCache class """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600, clock = None) -> None:
+        """ Initialize class, ttl is in seconds read from clock (default SystemClock). """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = SystemClock() if clock is None else clock
+
+        self.hits = 0
+        self.misses = 0
+
+        # key: (expire time, value), least recently used first
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def __len__(self) -> int:
+        """ Returns number of cached values, expired values included. """
+        return len(self._items)
+
+
+    def __contains__(self, key) -> bool:
+        """ Returns True if key has a value that hasn't expired. Not counted as hit/miss. """
+        with self._lock:
+            item = self._items.get(key)
+            return item is not None and item[0] > self.clock.now()
+
+
+    def get(self, key, default = None):
+        """ Returns the value of key, or default if it is missing or expired. """
+        with self._lock:
+            item = self._items.get(key)
+
+            if item is None or item[0] <= self.clock.now():
+                if item is not None:
+                    del self._items[key]
+
+                self.misses += 1
+                return default
+
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+
+    def set(self, key, value) -> None:
+        """ Adds or replaces the value of key, evicts the least recently used value if full. """
+        with self._lock:
+            self._items[key] = (self.clock.now() + self.ttl, value)
+            self._items.move_to_end(key)
+
+            while len(self._items) > self.max_size:
+                self._items.popitem(last = False)
+
+
+    def warm(self, items: dict) -> None:
+        """ Adds many values at once, e.g. before a simulation starts. """
+        for key, value in items.items():
+            self.set(key, value)
+
+
+    def invalidate(self, key = None) -> None:
+        """ Removes the value of key, or all values if key is None. """
+        with self._lock:
+            if key is None:
+                self._items.clear()
+            else:
+                self._items.pop(key, None)
+
+
+    def stats(self) -> dict:
+        """ Returns hits, misses and size. """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._items)}
@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+
+"""
+Clocks and discrete-event scheduler for the scooter program.
+
+Components read time from a clock instead of the system clock:
+
+SystemClock     wall-clock time, sleep() really sleeps.
+VirtualClock    simulated time, sleep() only moves the clock forward, so a
+                simulated day runs as fast as the code allows.
+
+Scheduler runs callbacks in time order from a priority queue and waits on its
+clock between events. With a VirtualClock the same events give the same result
+on every run.
+"""
+
+import heapq
+import itertools
+import time
+
+
+
+class SystemClock():
+    """ SystemClock class """
+
+    @staticmethod
+    def now() -> float:
+        """ Returns current time in seconds. """
+        return time.time()
+
+
+    @staticmethod
+    def sleep(seconds: float) -> None:
+        """ Sleep for seconds. """
+        time.sleep(max(seconds, 0))
+
+
+
+class VirtualClock():
+    """ VirtualClock class """
+
+    def __init__(self, start: float = 0.0) -> None:
+        """ Initialize class, start is the time in seconds when the clock starts. """
+        self._now = start
+
+
+    def now(self) -> float:
+        """ Returns current virtual time in seconds. """
+        return self._now
+
+
+    def sleep(self, seconds: float) -> None:
+        """ Move the clock forward seconds without waiting. """
+        self._now += max(seconds, 0)
+
+
+
+class Scheduler():
+    """ Scheduler class """
+
+    def __init__(self, clock = None) -> None:
+        """ Initialize class, events are timed by clock (default SystemClock). """
+        self.clock = SystemClock() if clock is None else clock
+
+        # (time, sequence, callback, args), sequence keeps events at the same time in order
+        self._queue = []
+        self._sequence = itertools.count()
+
+
+    def __len__(self) -> int:
+        """ Returns number of scheduled events. """
+        return len(self._queue)
+
+
+    def next_time(self) -> float:
+        """ Returns the time of the next event, None if the queue is empty. """
+        return self._queue[0][0] if self._queue else None
+
+
+    def schedule(self, delay: float, callback, *args) -> None:
+        """ Run callback(*args) delay seconds from now. """
+        self.schedule_at(self.clock.now() + delay, callback, *args)
+
+
+    def schedule_at(self, when: float, callback, *args) -> None:
+        """ Run callback(*args) at time when. """
+        heapq.heappush(self._queue, (when, next(self._sequence), callback, args))
+
+
+    def run(self, until: float = None) -> int:
+        """
+        Run events in time order until the queue is empty or the next event is after until.
+        Returns number of events run.
+        """
+        count = 0
+
+        while self._queue:
+            when, _, callback, args = self._queue[0]
+
+            if until is not None and when > until:
+                break
+
+            heapq.heappop(self._queue)
+            self.clock.sleep(when - self.clock.now())
+
+            callback(*args)
+            count += 1
+
+        return count
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+
+"""
+GraphQL documents.
+
+Documents are created once, when the module that sends them is loaded:
+
+    SCOOTER_QUERY = Document(''' query getScooterById($id: String!) { ... } ''')
+
+A Document is the document's text with its whitespace collapsed, so it is
+used like a string in payloads, plus its operation name and the SHA-256 hash
+that identifies it as a persisted query (automatic persisted queries, APQ):
+a Transport with persisted_queries=True sends only the hash and sends the text
+as well only if the server does not know the hash yet.
+
+Documents that are built at run time, e.g. aliased batches, get their hash
+from query_hash(), which caches the hashes of the last texts.
+"""
+
+import functools
+import hashlib
+import re
+
+
+# operation name of a GraphQL document, query getScooterById(...) -> getScooterById
+OPERATION = re.compile(r"\b(?:query|mutation)\s+(\w+)")
+
+
+
+def operation(payload: dict) -> str:
+    """ Returns the operation name of a GraphQL payload, 'anonymous' if it has none. """
+    match = OPERATION.search(payload.get("query") or "")
+    return match.group(1) if match else "anonymous"
+
+
+@functools.lru_cache(maxsize = 256)
+def _sha256(text: str) -> str:
+    """ Returns the hex SHA-256 hash of a text. """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def query_hash(query: str) -> str:
+    """ Returns the persisted-query hash of a document's text. """
+    return getattr(query, "sha256", None) or _sha256(query)
+
+
+
+class Document(str):
+    """ Document class, a GraphQL document's text with its name and hash. """
+
+    def __new__(cls, text: str) -> "Document":
+        """ Returns the document of text, whitespace collapsed to single spaces. """
+        document = super().__new__(cls, " ".join(text.split()))
+        document.name = operation({"query": document})
+        document.sha256 = _sha256(str(document))
+        return document
+
+
+    def payload(self, variables: dict) -> dict:
+        """ Returns the payload of a request of this document with variables. """
+        return {
+            'query': self,
+            'variables': variables
+        }
@@ -0,0 +1,413 @@
+#!/usr/bin/python3
+# pylint: disable=too-many-instance-attributes
+
+"""
+Headless rental engine, the rental lifecycle without a user interface.
+
+RentalEngine rents, starts, moves, stops and returns any number of scooters.
+All rentals are moved by passes on one Scheduler, every tick seconds a pass
+moves every running scooter one step and sends the pass' position updates in
+batches. There is no thread per rental: one Scooter and one ApiData are pointed
+at a rental's state (select) while it is handled, a rental is a Rental record.
+
+engine = RentalEngine(transport, clock = VirtualClock())
+rental = engine.rent(scooter_id, user_id, engine.api.get_scooter_data(scooter_id))
+engine.start(rental)
+engine.run(until = engine.clock.now() + 3600)
+engine.end_rental(rental)
+
+run() runs the passes in the calling thread, serve() (or run_in_thread())
+waits for them on a condition, so a user interface (main.py) can start and
+stop scooters from another thread, serve() needs a SystemClock. A scooter that
+leaves the city or has low battery is stopped, or returned with auto_return,
+and on_stop(rental, reason) is called with reason 'outside' or 'battery'.
+"""
+
+import math
+import threading
+import time
+from datetime import timedelta
+
+from src.api import ApiData
+from src.clock import Scheduler
+from src.metrics import REGISTRY
+from src.rentals import Rental, RentalRegistry
+from src.scooter import Scooter
+from src.state import CityState, ScooterState
+from src.transport import Transport
+
+
+# metrics of the passes over all rented scooters
+TICK_SECONDS = REGISTRY.histogram("simulation_tick_seconds", "Seconds per pass over all scooters")
+TICKS_PER_SECOND = REGISTRY.gauge("simulation_ticks_per_second", "Passes per second, last pass")
+ACTIVE_RENTALS = REGISTRY.gauge("simulation_active_rentals", "Rented scooters")
+STEPS = REGISTRY.counter("simulation_steps_total", "Scooter steps")
+
+
+def return_status(scooter: Scooter) -> tuple:
+    """
+    Returns (status, zone) of a scooter that is returned: its new status id and the
+    zone of the station it is moved to, None if it stays where it is. A scooter moved
+    to a station is sent with update_scooter, otherwise with update_rented_scooter.
+    """
+    if scooter.check_scooter_in_city() is False:
+        return "2", None                                        ## Unavailable status
+    if scooter.check_battery():
+        return "4", "1"                                         ## Charging status/station
+    if scooter.check_maintenance():
+        return "3", "4"                                         ## Maintenance status/station
+    return "1", None                                            ## Available status
+
+
+
+class RentalEngine():
+    """ RentalEngine class """
+
+    # seconds between two passes over all running scooters
+    tick = 5
+
+
+    def __init__(
+        self,
+        transport: Transport = None,
+        clock = None,
+        local_state: bool = True,
+        auto_return: bool = False
+    ) -> None:
+        """
+        Initialize class, all rentals share one transport (connection pool) and
+        are timed by clock (default SystemClock). If local_state is False the
+        scooters are read from the API before every step instead of kept locally.
+        With auto_return a stopped scooter is returned at once.
+        """
+        self.local_state = local_state
+        self.auto_return = auto_return
+        self.scheduler = Scheduler(clock)
+        self.clock = self.scheduler.clock
+        self.scooter = Scooter()
+        self.api = ApiData(1, transport = transport, clock = self.clock)
+
+        # rentals by scooter id, cities by city id
+        self.rentals = RentalRegistry()
+        self.cities = {}
+
+        # on_stop(rental, reason) after a scooter is stopped/returned, on_error(scooter_id, error)
+        self.on_stop = None
+        self.on_error = None
+
+        # number of rented, moved and returned scooters, passes over them and failed reads
+        self.stats = {"rented": 0, "moves": 0, "returned": 0, "ticks": 0, "errors": 0}
+
+        # guards all rentals, wakes serve() when a scooter is started or the engine closed
+        self._changed = threading.Condition(threading.RLock())
+        self._scheduled = False
+        self._closed = False
+        self._thread = None
+
+
+    def select(self, rental: Rental) -> None:
+        """
+        Points the scooter and the API at one rental's state, city, user and station,
+        the scooter moves tick seconds per step.
+        """
+        scooter, api = self.scooter, self.api
+
+        scooter.data = api.data = rental.state
+        scooter.city = api.city = rental.city
+        scooter.rng = rental.rng
+        scooter.step = self.tick
+        api.user_id = rental.user_id
+        api.station = rental.station
+
+
+    def load(self, rental: Rental) -> bool:
+        """
+        Selects the rental, its state is kept locally or read from the API.
+        Returns False if the scooter could not be read, it is skipped until the next pass.
+        """
+        self.select(rental)
+
+        if not self.local_state:
+            data = self.api.get_scooter_data(rental.scooter_id)
+
+            if data == -1:
+                self.failed(rental.scooter_id, self.api.error)
+                return False
+
+            self.scooter.add_scooter_to_dict(data)
+
+        return True
+
+
+    def city(self, city: dict) -> CityState:
+        """ Returns the state of a city from API data, one state per city. """
+        state = self.cities.get(city["id"])
+
+        if state is None:
+            state = self.cities[city["id"]] = CityState.from_api(city)
+
+        return state
+
+
+    def failed(self, scooter_id, error) -> None:
+        """ Counts a failed read, error tells why (timeout, circuit open, ...). """
+        self.stats["errors"] += 1
+
+        if self.on_error is not None:
+            self.on_error(scooter_id, error)
+
+
+    def rent(self, scooter_id, user_id, data: dict, rng = None) -> Rental:
+        """
+        Rents the scooter of API data to a user, rng is the scooter's random stream.
+        Returns the rental, None if the scooter is not available or -1 if its city
+        could not be read. Raises TypeError if data is not a scooter.
+        """
+        with self._changed:
+            state = ScooterState()
+            self.scooter.data = self.api.data = state
+
+            if not self.scooter.check_scooter_status(data):
+                return None
+
+            city = self.api.get_city_data()
+
+            if city == -1:
+                self.failed(scooter_id, self.api.error)
+                return -1
+
+            rental = Rental(scooter_id, user_id, "", self.city(city), state, rng)
+            self.select(rental)
+
+            # create log/payment and update customer's account
+            self.api.rent_scooter()
+
+            rental.station = self.api.station
+            rental.start_time = self.clock.now()
+            self.rentals.add(rental)
+            self.stats["rented"] += 1
+
+            return rental
+
+
+    def start(self, rental: Rental) -> bool:
+        """ Starts the scooter, it moves from the next pass. False if the battery is low. """
+        with self._changed:
+            self.select(rental)
+
+            if self.scooter.check_battery():
+                return False
+
+            rental.running = True
+
+            if not self._scheduled:
+                self._scheduled = True
+                self.scheduler.schedule(0, self.move_all)
+                self._changed.notify_all()
+
+            return True
+
+
+    def stop_running(self, rental: Rental) -> None:
+        """ Stops the scooter, it stays rented. """
+        with self._changed:
+            if rental.running:
+                rental.running = False
+                self.select(rental)
+                self.scooter.stop_scooter()
+
+                # update API
+                self.api.queue_rented_update()
+
+
+    def battery_check(self, rental: Rental) -> bool:
+        """
+        Returns True if the battery level < 20%, otherwise the scooter moves one
+        step and its update is queued.
+        """
+        with self._changed:
+            self.select(rental)
+
+            if self.scooter.check_battery():
+                return True
+
+            self.scooter.change_location()
+            self.scooter.move_scooter()
+            self.stats["moves"] += 1
+
+            # update API
+            self.api.queue_rented_update()
+            return False
+
+
+    def move(self, rental: Rental) -> None:
+        """
+        Moves the scooter one step if it is inside the city and its battery is not
+        low, otherwise it is stopped (returned with auto_return) and on_stop is called.
+        """
+        with self._changed:
+            self.select(rental)
+
+            if self.scooter.check_scooter_in_city() is False:
+                reason = "outside"
+            elif self.battery_check(rental):
+                reason = "battery"
+            else:
+                return
+
+            if self.auto_return:
+                self.end_rental(rental)
+            else:
+                self.stop_running(rental)
+
+            if self.on_stop is not None:
+                self.on_stop(rental, reason)
+
+
+    def move_all(self) -> None:
+        """
+        Moves every running scooter one step, the next pass is scheduled tick seconds
+        later while scooters are running.
+        """
+        with self._changed:
+            start = time.perf_counter()
+            moves = self.stats["moves"]
+
+            for rental in self.rentals:
+                if rental.running and self.load(rental):
+                    self.move(rental)
+
+            # send this pass' position updates, a background batch sends them itself
+            if not self.api.batch.background:
+                self.api.flush_updates()
+
+            seconds = time.perf_counter() - start
+            TICK_SECONDS.observe(seconds)
+            TICKS_PER_SECOND.set(1 / seconds if seconds else 0.0)
+            ACTIVE_RENTALS.set(len(self.rentals))
+            STEPS.inc(self.stats["moves"] - moves)
+
+            self.stats["ticks"] += 1
+            self._scheduled = any(rental.running for rental in self.rentals)
+
+            if self._scheduled:
+                self.scheduler.schedule(self.tick, self.move_all)
+
+
+    def rental_time(self, rental: Rental) -> timedelta:
+        """ Returns the time the scooter has been rented by a user. """
+        return timedelta(seconds = int(self.clock.now() - rental.start_time))
+
+
+    def _return(self, rental: Rental) -> None:
+        """ Creates the rental's return log and removes the rental. """
+        self.api.return_scooter(math.ceil(self.rental_time(rental).total_seconds() / 60))
+        self.rentals.remove(rental.scooter_id)
+        self.stats["returned"] += 1
+
+
+    def move_to_station(self, rental: Rental, zone_id: str) -> bool:
+        """
+        Moves the selected scooter to the nearest station of a zone. Returns False if
+        the stations could not be read or there is none, the scooter stays where it is.
+        """
+        station = self.api.get_station(zone_id)
+
+        if station == -1:
+            self.failed(rental.scooter_id, self.api.error)
+            return False
+
+        self.scooter.move_to_station(station)
+        return True
+
+
+    def end_rental(self, rental: Rental) -> None:
+        """ Checks scooter's battery/maintenance/zone, stops the scooter and returns it. """
+        with self._changed:
+            rental.running = False
+            self.select(rental)
+
+            # queued updates must reach the API before the scooter is returned
+            self.api.flush_updates()
+
+            status, zone = return_status(self.scooter)
+            self.scooter.stop_scooter(status = status)
+
+            if zone is not None:
+                self.move_to_station(rental, zone)
+
+            # update API
+            self._return(rental)
+
+            if zone is None:
+                self.api.update_rented_scooter()
+            else:
+                self.api.update_scooter()
+
+
+    def charge_scooter(self, rental: Rental) -> None:
+        """ Fully charges the scooter, leaves it at a charging station and returns it. """
+        with self._changed:
+            rental.running = False
+            self.select(rental)
+            self.api.flush_updates()
+
+            self.scooter.data.battery = 100
+            self.scooter.stop_scooter(status = "1")          # Available status
+            self.move_to_station(rental, "1")                # Charging Station
+
+            # update API
+            self._return(rental)
+            self.api.update_scooter()
+
+
+    def return_all(self) -> None:
+        """ Returns every rented scooter, a scooter that can not be read stays rented. """
+        with self._changed:
+            for rental in self.rentals:
+                if self.load(rental):
+                    self.end_rental(rental)
+
+
+    def run(self, until: float = None) -> int:
+        """ Runs the passes until time until, see Scheduler.run. Returns number of passes run. """
+        with self._changed:
+            return self.scheduler.run(until)
+
+
+    def serve(self) -> None:
+        """
+        Runs the passes on time until close() is called. Waits on a condition instead
+        of the clock, a started scooter or close() wakes it at once.
+        """
+        with self._changed:
+            while not self._closed:
+                when = self.scheduler.next_time()
+
+                if when is None:
+                    self._changed.wait()
+                elif when > self.clock.now():
+                    self._changed.wait(when - self.clock.now())
+                else:
+                    self.scheduler.run(until = self.clock.now())
+
+
+    def run_in_thread(self) -> threading.Thread:
+        """ Runs serve() in one daemon thread for all rentals, returns the thread. """
+        with self._changed:
+            if self._thread is None:
+                self._thread = threading.Thread(target = self.serve, name = "rental-engine")
+                self._thread.daemon = True
+                self._thread.start()
+
+            return self._thread
+
+
+    def close(self) -> None:
+        """ Stops serve() and waits for its thread. """
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
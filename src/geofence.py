@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+# pylint: disable=too-many-instance-attributes
+
+"""
+City zones for inside-city checks.
+
+A CityGeofence is built once from the API's city data (id, latitude, longitude,
+area) and answers contains() without any trigonometry: the zone is a circle
+with the city's area, projected to metres on a plane tangent to the WGS-84
+ellipsoid at the city center. At the edge of a 25 km² city the projection
+differs from the geodesic distance by less than half a metre.
+
+contains() takes floats, contains_many() takes numpy arrays. Other zone shapes
+(e.g. polygons) only have to implement the same two methods and be returned by
+from_data, callers do not change.
+"""
+
+import math
+import numpy as np
+
+
+# WGS-84 semi-major axis in metres and first eccentricity squared
+WGS84_A = 6378137.0
+WGS84_E2 = 6.69437999014e-3
+
+
+
+class CityGeofence():
+    """ CityGeofence class, a circular city zone. """
+
+    def __init__(self, city_id: str, lat: float, lon: float, area: float) -> None:
+        """ Initialize class, lat/lon is the city center in degrees and area in km². """
+        self.city_id = city_id
+        self.lat = float(lat)
+        self.lon = float(lon)
+
+        # Circle Area = pi * r^2 => r^2 = A/pi
+        self.radius = math.sqrt(float(area) / math.pi) * 1000
+        self._radius2 = self.radius ** 2
+
+        # metres per degree latitude/longitude at the center (meridian/prime vertical radius)
+        sin2 = math.sin(math.radians(self.lat)) ** 2
+        self._m_per_lat = math.radians(WGS84_A * (1 - WGS84_E2) / (1 - WGS84_E2 * sin2) ** 1.5)
+        self._m_per_lon = math.radians(
+            WGS84_A / math.sqrt(1 - WGS84_E2 * sin2) * math.cos(math.radians(self.lat))
+        )
+
+        # bounding box in degrees, points outside are rejected without any math
+        self.bounds = (
+            self.lat - self.radius / self._m_per_lat,
+            self.lat + self.radius / self._m_per_lat,
+            self.lon - self.radius / self._m_per_lon,
+            self.lon + self.radius / self._m_per_lon
+        )
+
+
+    @classmethod
+    def from_data(cls, city: dict) -> "CityGeofence":
+        """ Returns the zone of a city from API data, see Api.get_city_data. """
+        return cls(city["id"], city["latitude"], city["longitude"], city["area"])
+
+
+    def project(self, lat, lon) -> tuple:
+        """ Returns lat/lon (floats or arrays) as x/y in metres from the city center. """
+        return (lon - self.lon) * self._m_per_lon, (lat - self.lat) * self._m_per_lat
+
+
+    def contains(self, lat: float, lon: float) -> bool:
+        """ Returns True if lat/lon is inside the city zone. """
+        min_lat, max_lat, min_lon, max_lon = self.bounds
+
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return False
+
+        x, y = self.project(lat, lon)
+        return x * x + y * y <= self._radius2
+
+
+    def contains_many(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """ Returns True for every point inside the city zone. """
+        x, y = self.project(np.asarray(lats), np.asarray(lons))
+        return x * x + y * y <= self._radius2
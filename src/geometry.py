@@ -0,0 +1,161 @@
+#!/usr/bin/python3
+
+"""
+Distance and destination math for scooters.
+
+Two geometries with the same methods are available:
+
+geodesic    exact distances on the WGS-84 ellipsoid (geopy, Karney's solver).
+spherical   haversine distance and great-circle destination on a sphere with
+            the mean earth radius. Compared to geodesic the distance error is
+            below 0.5% (below 15 m for a 3 km city radius) and a destination
+            20 km/h * 15 seconds away is off by less than 0.5 m.
+
+distance/destination take floats, distances/destinations take numpy arrays.
+Latitude/longitude and bearing are in degrees (North: 0, East: 90), distances in km.
+Run 'python3 -m benchmarks.geometry' to compare the cost per call.
+"""
+
+import math
+import os
+import numpy as np
+from geopy.distance import geodesic, distance as geopy_distance
+
+
+# mean earth radius in km, same as geopy
+EARTH_RADIUS = 6371.0088
+
+
+
+class GeodesicGeometry():
+    """ GeodesicGeometry class, exact but slow. """
+
+    name = "geodesic"
+
+
+    @staticmethod
+    def distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+        """ Returns distance in km between two points. """
+        return geodesic((lat1, lon1), (lat2, lon2)).km
+
+
+    @staticmethod
+    def destination(lat: float, lon: float, distance_km: float, bearing: float) -> tuple:
+        """ Returns (lat, lon) reached after distance_km in direction bearing. """
+        point = geopy_distance(kilometers = distance_km).destination((lat, lon), bearing = bearing)
+        return point.latitude, point.longitude
+
+
+    def distances(self, lat1, lon1, lat2, lon2) -> np.ndarray:
+        """ Returns distances in km between arrays of points, one geopy call per point. """
+        lat1, lon1, lat2, lon2 = np.broadcast_arrays(lat1, lon1, lat2, lon2)
+
+        return np.array([
+            self.distance(*point) for point in zip(lat1.flat, lon1.flat, lat2.flat, lon2.flat)
+        ]).reshape(lat1.shape)
+
+
+    def destinations(self, lat, lon, distance_km, bearing) -> tuple:
+        """ Returns arrays (lat, lon) reached after distance_km in direction bearing. """
+        lat, lon, distance_km, bearing = np.broadcast_arrays(lat, lon, distance_km, bearing)
+
+        points = np.array([
+            self.destination(*point)
+            for point in zip(lat.flat, lon.flat, distance_km.flat, bearing.flat)
+        ]).reshape(lat.shape + (2,))
+
+        return points[..., 0], points[..., 1]
+
+
+
+class SphericalGeometry():
+    """ SphericalGeometry class, closed-form formulas on a sphere. """
+
+    name = "spherical"
+
+
+    @staticmethod
+    def distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+        """ Returns haversine distance in km between two points. """
+        lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+
+        half = (
+            math.sin((lat2 - lat1) / 2) ** 2
+            + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        )
+
+        return 2 * EARTH_RADIUS * math.asin(math.sqrt(half))
+
+
+    @staticmethod
+    def destination(lat: float, lon: float, distance_km: float, bearing: float) -> tuple:
+        """ Returns (lat, lon) reached after distance_km in direction bearing. """
+        lat1 = math.radians(lat)
+        bearing = math.radians(bearing)
+        angle = distance_km / EARTH_RADIUS
+
+        lat2 = math.asin(
+            math.sin(lat1) * math.cos(angle) + math.cos(lat1) * math.sin(angle) * math.cos(bearing)
+        )
+        lon2 = math.radians(lon) + math.atan2(
+            math.sin(bearing) * math.sin(angle) * math.cos(lat1),
+            math.cos(angle) - math.sin(lat1) * math.sin(lat2)
+        )
+
+        return math.degrees(lat2), math.degrees(lon2)
+
+
+    @staticmethod
+    def distances(lat1, lon1, lat2, lon2) -> np.ndarray:
+        """ Returns haversine distances in km between arrays of points. """
+        lat1, lon1 = np.radians(lat1), np.radians(lon1)
+        lat2, lon2 = np.radians(lat2), np.radians(lon2)
+
+        half = (
+            np.sin((lat2 - lat1) / 2) ** 2
+            + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        )
+
+        return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(half))
+
+
+    @staticmethod
+    def destinations(lat, lon, distance_km, bearing) -> tuple:
+        """ Returns arrays (lat, lon) reached after distance_km in direction bearing. """
+        lat1 = np.radians(lat)
+        bearing = np.radians(bearing)
+        angle = np.asarray(distance_km) / EARTH_RADIUS
+
+        lat2 = np.arcsin(
+            np.sin(lat1) * np.cos(angle) + np.cos(lat1) * np.sin(angle) * np.cos(bearing)
+        )
+        lon2 = np.radians(lon) + np.arctan2(
+            np.sin(bearing) * np.sin(angle) * np.cos(lat1),
+            np.cos(angle) - np.sin(lat1) * np.sin(lat2)
+        )
+
+        return np.degrees(lat2), np.degrees(lon2)
+
+
+
+GEOMETRIES = {
+    GeodesicGeometry.name: GeodesicGeometry,
+    SphericalGeometry.name: SphericalGeometry,
+}
+
+
+def get_geometry(name: str = None):
+    """
+    Returns a geometry by name, 'geodesic' or 'spherical'.
+    Without a name the environment variable SCOOTER_GEOMETRY is used, default 'geodesic'.
+    """
+    if name is None:
+        name = os.environ.get("SCOOTER_GEOMETRY", GeodesicGeometry.name)
+
+    try:
+        return GEOMETRIES[name]()
+    except KeyError as error:
+        raise ValueError("Unknown geometry '{}', use one of {}".format(
+            name,
+            ", ".join(GEOMETRIES)
+        )) from error
@@ -0,0 +1,376 @@
+#!/usr/bin/python3
+
+"""
+Counters, gauges and latency histograms for the scooter program.
+
+Metrics are created once from the module level REGISTRY and kept by the code
+that updates them, so the hot path is one lock and an addition, or a bisect
+for histograms (well below 1 us):
+
+    REQUESTS = REGISTRY.counter("api_requests_total", "Requests", operation = "x")
+    REQUESTS.inc()
+
+Histograms have fixed buckets from 1 us to about 2 minutes, every bucket is
+sqrt(2) times wider than the one before, and estimate percentiles from them
+(within the bucket width).
+
+timed() decorates a function to observe its seconds. Timing costs about
+0.7 us per call, so for calls of a few microseconds only one in every calls
+is timed. With the environment variable SCOOTER_METRICS=0 timed() leaves
+functions as they are.
+
+Registry.text() returns all metrics in the Prometheus text format, Exporter
+writes it to a file every interval seconds and/or serves it at
+http://host:port/metrics.
+"""
+
+import bisect
+import functools
+import itertools
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# upper bounds of the histogram buckets in seconds
+BUCKETS = tuple(1e-6 * math.sqrt(2) ** index for index in range(54))
+
+# percentiles exported for every histogram
+PERCENTILES = (0.5, 0.95, 0.99)
+
+# timed() only times functions if metrics are enabled
+ENABLED = os.environ.get("SCOOTER_METRICS", "1") != "0"
+
+
+
+class Counter():
+    """ Counter class, a value that only goes up. """
+
+    kind = "counter"
+
+    def __init__(self) -> None:
+        """ Initialize class """
+        self.value = 0
+        self._lock = threading.Lock()
+
+
+    def inc(self, amount: float = 1) -> None:
+        """ Add amount to the counter. """
+        with self._lock:
+            self.value += amount
+
+
+    def samples(self) -> list:
+        """ Returns (suffix, extra labels, value) of the counter. """
+        return [("", (), self.value)]
+
+
+
+class Gauge():
+    """ Gauge class, a value that goes up and down. """
+
+    kind = "gauge"
+
+    def __init__(self) -> None:
+        """ Initialize class """
+        self.value = 0
+
+
+    def set(self, value: float) -> None:
+        """ Set the gauge. """
+        self.value = value
+
+
+    def samples(self) -> list:
+        """ Returns (suffix, extra labels, value) of the gauge. """
+        return [("", (), self.value)]
+
+
+
+class Histogram():
+    """ Histogram class, counts observations in BUCKETS. """
+
+    kind = "histogram"
+
+    def __init__(self) -> None:
+        """ Initialize class, the last bucket counts values above BUCKETS[-1]. """
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+
+    def observe(self, value: float) -> None:
+        """ Count one value, e.g. seconds of a call. """
+        index = bisect.bisect_left(BUCKETS, value)
+
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+
+    def percentile(self, fraction: float) -> float:
+        """ Returns the estimated value below which fraction (0 - 1) of the values are. """
+        if self.count == 0:
+            return 0.0
+
+        rank = fraction * self.count
+        seen = 0
+
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKETS[index - 1] if index > 0 else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else lower
+
+                # linear inside the bucket
+                return lower + (upper - lower) * (rank - seen) / count
+
+            seen += count
+
+        return BUCKETS[-1]
+
+
+    def samples(self) -> list:
+        """ Returns (suffix, extra labels, value) of buckets, sum and count. """
+        samples = []
+        cumulative = 0
+
+        for bound, count in zip(BUCKETS, self.counts):
+            cumulative += count
+            samples.append(("_bucket", (("le", "{0:.6g}".format(bound)),), cumulative))
+
+        samples.append(("_bucket", (("le", "+Inf"),), self.count))
+        samples.append(("_sum", (), self.sum))
+        samples.append(("_count", (), self.count))
+
+        return samples
+
+
+
+class Registry():
+    """ Registry class, all metrics by name and labels. """
+
+    def __init__(self) -> None:
+        """ Initialize class """
+        # name: (kind, help, {labels: metric})
+        self._families = {}
+        self._lock = threading.Lock()
+
+
+    def _get(self, cls, name: str, help_text: str, labels: dict):
+        """ Returns the metric with name and labels, it is created on first use. """
+        key = tuple(sorted(labels.items()))
+
+        with self._lock:
+            family = self._families.setdefault(name, (cls.kind, help_text, {}))
+
+            if family[0] != cls.kind:
+                raise ValueError("Metric {0} is a {1}".format(name, family[0]))
+
+            metric = family[2].get(key)
+
+            if metric is None:
+                metric = family[2][key] = cls()
+
+            return metric
+
+
+    def counter(self, name: str, help_text: str = "", **labels) -> Counter:
+        """ Returns the counter with name and labels. """
+        return self._get(Counter, name, help_text, labels)
+
+
+    def gauge(self, name: str, help_text: str = "", **labels) -> Gauge:
+        """ Returns the gauge with name and labels. """
+        return self._get(Gauge, name, help_text, labels)
+
+
+    def histogram(self, name: str, help_text: str = "", **labels) -> Histogram:
+        """ Returns the histogram with name and labels. """
+        return self._get(Histogram, name, help_text, labels)
+
+
+    def text(self) -> str:
+        """
+        Returns all metrics in the Prometheus text format. Percentiles of a
+        histogram are exported as gauge <name>_percentile{quantile="0.5"}.
+        """
+        lines = []
+
+        with self._lock:
+            families = sorted(
+                (name, kind, help_text, dict(metrics))
+                for name, (kind, help_text, metrics) in self._families.items()
+            )
+
+        for name, kind, help_text, metrics in families:
+            lines.append("# HELP {0} {1}".format(name, help_text))
+            lines.append("# TYPE {0} {1}".format(name, kind))
+
+            for labels, metric in sorted(metrics.items()):
+                for suffix, extra, value in metric.samples():
+                    lines.append("{0}{1}{2} {3}".format(
+                        name,
+                        suffix,
+                        _labels(labels + extra),
+                        _value(value)
+                    ))
+
+            if kind == "histogram":
+                lines.append("# HELP {0}_percentile {1}, percentiles".format(name, help_text))
+                lines.append("# TYPE {0}_percentile gauge".format(name))
+
+                for labels, metric in sorted(metrics.items()):
+                    for fraction in PERCENTILES:
+                        lines.append("{0}_percentile{1} {2}".format(
+                            name,
+                            _labels(labels + (("quantile", str(fraction)),)),
+                            _value(metric.percentile(fraction))
+                        ))
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: tuple) -> str:
+    """ Returns labels as {key="value",...}, "" without labels. """
+    if not labels:
+        return ""
+    return "{" + ",".join('{0}="{1}"'.format(key, value) for key, value in labels) + "}"
+
+
+def _value(value: float) -> str:
+    """ Returns a sample value as Prometheus text. """
+    return "{0:.9g}".format(value) if isinstance(value, float) else str(value)
+
+
+
+# metrics of the scooter program
+REGISTRY = Registry()
+
+
+def timed(histogram: Histogram, every: int = 1):
+    """ Returns a decorator observing the seconds of one in every calls of a function. """
+    def decorator(function):
+        if not ENABLED:
+            return function
+
+        calls = itertools.count()
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if every > 1 and next(calls) % every:
+                return function(*args, **kwargs)
+
+            start = time.perf_counter()
+
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+
+        return wrapper
+    return decorator
+
+
+
+class Exporter():
+    """ Exporter class, exports a registry to a file and/or an HTTP endpoint. """
+
+    def __init__(
+        self,
+        registry: Registry = REGISTRY,
+        path: str = None,
+        port: int = None,
+        interval: float = 10.0,
+        host: str = "127.0.0.1"
+    ) -> None:
+        """
+        Initialize class, the registry is written to path every interval seconds
+        and served at http://host:port/metrics (port 0 picks a free port).
+        """
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.server = None
+
+        self._stop = threading.Event()
+        self._threads = []
+
+        if port is not None:
+            self.server = ThreadingHTTPServer((host, port), self._handler())
+            self.server.daemon_threads = True
+
+
+    def _handler(self):
+        """ Returns the request handler class serving the registry. """
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            """ Handler class """
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                """ Answer /metrics. """
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+
+                content = registry.text().encode("utf-8")
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *_args):  # pylint: disable=arguments-differ
+                """ No log line per request. """
+
+        return Handler
+
+
+    def write(self) -> None:
+        """ Write the registry to the file. """
+        if self.path is None:
+            return
+
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write(self.registry.text())
+
+
+    def _run(self) -> None:
+        """ Thread writing the file every interval seconds until stop. """
+        while not self._stop.wait(self.interval):
+            self.write()
+
+
+    def start(self) -> "Exporter":
+        """ Start exporting in daemon threads, returns self. """
+        if self.path is not None:
+            self._threads.append(threading.Thread(target = self._run, name = "metrics-file"))
+        if self.server is not None:
+            self._threads.append(
+                threading.Thread(target = self.server.serve_forever, name = "metrics-http")
+            )
+
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+        return self
+
+
+    def stop(self) -> None:
+        """ Stop exporting, the file is written one last time. """
+        self._stop.set()
+
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+        for thread in self._threads:
+            thread.join()
+
+        self.write()
@@ -0,0 +1,206 @@
+#!/usr/bin/python3
+
+"""
+Opt-in profiling of the scooter program.
+
+Handler.main and Simulation.main run inside profiled(), which does nothing
+unless a profiler is chosen with the environment variable SCOOTER_PROFILE
+(or simulation.py --profile):
+
+cprofile    deterministic, every call of the main thread is counted (cProfile).
+sample      every interval seconds the stacks of all threads are recorded,
+            low overhead and also covers the scooter's moving thread.
+
+On exit, also on sys.exit(), the profile is written to files starting with
+SCOOTER_PROFILE_OUTPUT (default 'profile'):
+
+profile.txt         per-function stats, sorted by cumulative time/samples.
+profile.collapsed   collapsed stacks ('a;b;c count') for flamegraph.pl or
+                    speedscope. cProfile has no full stacks, its file has one
+                    'caller;function microseconds' line per call edge.
+profile.pstats      cProfile only, for pstats/snakeviz.
+"""
+
+import collections
+import contextlib
+import cProfile
+import os
+import pstats
+import sys
+import threading
+
+
+# profilers by SCOOTER_PROFILE value
+PROFILERS = ("cprofile", "sample")
+
+
+
+def _label(filename: str, line: int, name: str) -> str:
+    """ Returns the name of a function in stats and stacks. """
+    return "{0} ({1}:{2})".format(name, os.path.basename(filename), line)
+
+
+
+class CProfiler():
+    """ CProfiler class, cProfile with the same methods as SamplingProfiler. """
+
+    def __init__(self) -> None:
+        """ Initialize class """
+        self.profile = cProfile.Profile()
+
+
+    def start(self) -> None:
+        """ Start profiling the calling thread. """
+        self.profile.enable()
+
+
+    def stop(self) -> None:
+        """ Stop profiling. """
+        self.profile.disable()
+
+
+    def dump(self, output: str) -> None:
+        """ Write output.pstats, output.txt and output.collapsed. """
+        self.profile.dump_stats(output + ".pstats")
+
+        with open(output + ".txt", 'w', encoding='utf-8') as file:
+            pstats.Stats(self.profile, stream = file).sort_stats("cumulative").print_stats()
+
+        stats = pstats.Stats(self.profile).stats
+
+        with open(output + ".collapsed", 'w', encoding='utf-8') as file:
+            for function, (_, _, own_time, _, callers) in stats.items():
+                # functions entered before start() have no caller
+                if not callers and int(own_time * 1e6):
+                    file.write("{0} {1}\n".format(_label(*function), int(own_time * 1e6)))
+
+                for caller, (_, _, own_time, _) in callers.items():
+                    microseconds = int(own_time * 1e6)
+
+                    if microseconds:
+                        file.write("{0};{1} {2}\n".format(
+                            _label(*caller),
+                            _label(*function),
+                            microseconds
+                        ))
+
+
+
+class SamplingProfiler():
+    """ SamplingProfiler class """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        """ Initialize class, interval is seconds between two samples. """
+        self.interval = interval
+
+        # collapsed stack: number of samples
+        self.stacks = collections.Counter()
+
+        self._stop = threading.Event()
+        self._thread = None
+
+
+    def start(self) -> None:
+        """ Start sampling all threads in a daemon thread. """
+        self._stop.clear()
+        self._thread = threading.Thread(target = self._run, name = "profiler")
+        self._thread.daemon = True
+        self._thread.start()
+
+
+    def stop(self) -> None:
+        """ Stop sampling. """
+        self._stop.set()
+        self._thread.join()
+
+
+    def _run(self) -> None:
+        """ Record the stack of every thread but this one, every interval seconds. """
+        own = threading.get_ident()
+
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+            # pylint: disable=protected-access
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+
+                stack = []
+
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(_label(code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+
+                stack.append(names.get(ident, "thread"))
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+    def functions(self) -> list:
+        """ Returns (total samples, own samples, function) sorted by total samples. """
+        total = collections.Counter()
+        own = collections.Counter()
+
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            own[frames[-1] if frames else stack] += count
+
+            # a recursive function is counted once per stack
+            for frame in set(frames):
+                total[frame] += count
+
+        return sorted(
+            ((total[function], own[function], function) for function in total),
+            reverse = True
+        )
+
+
+    def dump(self, output: str) -> None:
+        """ Write output.txt and output.collapsed. """
+        samples = sum(self.stacks.values()) or 1
+
+        with open(output + ".txt", 'w', encoding='utf-8') as file:
+            file.write("{0} samples, {1}s interval\n\n".format(samples, self.interval))
+            file.write("{0:>8} {1:>8} {2:>8}  {3}\n".format("total", "own", "total%", "function"))
+
+            for total, own, function in self.functions():
+                file.write("{0:>8} {1:>8} {2:>7.1f}%  {3}\n".format(
+                    total, own, total / samples * 100, function
+                ))
+
+        with open(output + ".collapsed", 'w', encoding='utf-8') as file:
+            for stack, count in sorted(self.stacks.items()):
+                file.write("{0} {1}\n".format(stack, count))
+
+
+
+@contextlib.contextmanager
+def profiled(mode: str = None, output: str = None, interval: float = 0.005):
+    """
+    Profiles the code in the with block with mode 'cprofile' or 'sample' and
+    writes the files to output.*, default from SCOOTER_PROFILE/SCOOTER_PROFILE_OUTPUT.
+    Yields the profiler, None if profiling is off.
+    """
+    mode = os.environ.get("SCOOTER_PROFILE") if mode is None else mode
+
+    if not mode:
+        yield None
+        return
+
+    if mode not in PROFILERS:
+        raise ValueError(
+            "Unknown profiler '{0}', use one of {1}".format(mode, ", ".join(PROFILERS))
+        )
+
+    output = output or os.environ.get("SCOOTER_PROFILE_OUTPUT", "profile")
+    profiler = CProfiler() if mode == "cprofile" else SamplingProfiler(interval)
+
+    profiler.start()
+
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        profiler.dump(output)
+        print("\nProfile written to {0}.txt and {0}.collapsed".format(output))
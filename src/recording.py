@@ -0,0 +1,388 @@
+#!/usr/bin/python3
+
+"""
+Record and replay of API traffic.
+
+RecordingTransport posts like Transport and appends every request to a file,
+one compact JSON line per request (JSON Lines):
+
+{"t": 0.0123, "s": 0.0041, "d": 0, "p": {"variables": ...}, "c": 200, "r": {response body}}
+
+t is the seconds since recording started, s the seconds the request took, d
+the id of the GraphQL document, p the rest of the payload and c/r the
+response's status and body. A request that raised has "e" ('timeout' or
+'connection') and "m" (message) instead of c/r. A persisted query sent as hash
+only has "h" (the document id) instead of "d". Documents are identified by
+their SHA-256 hash and written in a line {"d": 0, "query": "..."} before their
+first request, or {"d": 0, "h": "<hash>"} if only the hash was sent, followed
+by the text once it is sent. Every recording starts with a header line
+{"format": "scooter-traffic", "version": 2, "url": ..., "persisted_queries": ...},
+a file can hold several recordings.
+
+ReplayTransport answers the requests from such a file without a backend. A
+request gets the next unused response recorded for the same payload, else the
+next one of the same GraphQL operation (e.g. the rent minutes differ), else the
+last response of the operation again. Unknown operations get a GraphQL error.
+Responses are returned at once, or after the recorded seconds with latency=True.
+Retries and the circuit breaker work as for HTTP, recorded errors are raised again.
+Persisted queries are sent as in the recording, so the same requests are matched.
+
+python3 simulation.py --fake --virtual --seed 1 --record session.jsonl
+python3 simulation.py --virtual --seed 1 --replay session.jsonl
+"""
+
+import collections
+import json
+import threading
+import time
+
+import requests
+
+from src.backend import FakeResponse
+from src.documents import query_hash
+from src.transport import Transport, operation
+
+
+# first line of a recording
+FORMAT = "scooter-traffic"
+VERSION = 2
+
+
+
+def _key(payload: dict) -> str:
+    """ Returns a payload as text, equal payloads have equal keys. """
+    return json.dumps(payload, sort_keys = True, separators = (",", ":"))
+
+
+def _sha256(payload: dict) -> str:
+    """ Returns the persisted-query hash of a payload, None if it has neither hash nor text. """
+    persisted = (payload.get("extensions") or {}).get("persistedQuery") or {}
+
+    if persisted.get("sha256Hash"):
+        return persisted["sha256Hash"]
+    if payload.get("query") is not None:
+        return query_hash(payload["query"])
+    return None
+
+
+def read(path: str) -> list:
+    """
+    Returns the recorded requests of a file, their payload is in "q" and the
+    name of their operation in "o", also of persisted queries sent as hash only.
+    Header and document lines are skipped.
+    """
+    entries = []
+    documents = {}
+
+    # (entry, documents of its recording, document id, the text was sent)
+    references = []
+
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            if not line.strip():
+                continue
+
+            entry = json.loads(line)
+
+            if "format" in entry:
+                # document ids start again in every recording
+                documents = {}
+            elif "p" not in entry:
+                if "query" in entry:
+                    documents[entry["d"]] = entry["query"]
+                else:
+                    documents.setdefault(entry["d"], None)
+            else:
+                entry["q"] = entry.pop("p")
+                sent = "h" not in entry
+                document = entry.pop("d", None) if sent else entry.pop("h")
+
+                references.append((entry, documents, document, sent))
+                entries.append(entry)
+
+    # the text of a document sent as hash only can be written after the request
+    for entry, recording, document, sent in references:
+        query = recording.get(document) if document is not None else None
+
+        if sent and query is not None:
+            entry["q"]["query"] = query
+
+        entry["o"] = operation({"query": query})
+
+    return entries
+
+
+
+class RecordingSession():
+    """ RecordingSession class, a session that writes every request to a file. """
+
+    def __init__(self, session, file) -> None:
+        """ Initialize class, requests are sent with session and written to file. """
+        self.session = session
+        self.file = file
+        self.start = time.perf_counter()
+
+        # document hash: id, ids of the documents whose text is written
+        self._documents = {}
+        self._texts = set()
+        self._lock = threading.Lock()
+
+
+    def post(self, url: str, json: dict = None, headers: dict = None, timeout = None):
+        """ Returns the session's response, the request is recorded also if it raises. """
+        # pylint: disable=redefined-outer-name
+        start = time.perf_counter()
+        entry = {"t": round(start - self.start, 6), "q": json}
+
+        try:
+            response = self.session.post(url, json = json, headers = headers, timeout = timeout)
+        except (requests.RequestException, OSError) as error:
+            entry["e"] = "timeout" if isinstance(error, requests.Timeout) else "connection"
+            entry["m"] = str(error)
+            raise
+        else:
+            entry["c"] = response.status_code
+
+            try:
+                entry["r"] = response.json()
+            except ValueError:
+                entry["r"] = None
+
+            return response
+        finally:
+            entry["s"] = round(time.perf_counter() - start, 6)
+            self.write(entry)
+
+
+    def write(self, entry: dict) -> None:
+        """ Append one line to the file, the payload's document is written on first use. """
+        payload = entry.pop("q", None)
+
+        with self._lock:
+            if payload is not None:
+                query = payload.get("query")
+                document = self._document(_sha256(payload), query)
+
+                # a persisted query sent as hash only
+                entry["d" if query is not None or document is None else "h"] = document
+                entry["p"] = {key: value for key, value in payload.items() if key != "query"}
+
+            self._line(entry)
+
+
+    def _document(self, sha256: str, query: str) -> int:
+        """
+        Returns the id of the document with hash sha256, None without hash. Its line
+        is written on first use and again when its text is sent the first time.
+        """
+        if sha256 is None:
+            return None
+
+        document = self._documents.get(sha256)
+
+        if document is None:
+            document = self._documents[sha256] = len(self._documents)
+
+            if query is None:
+                self._line({"d": document, "h": sha256})
+
+        if query is not None and document not in self._texts:
+            self._texts.add(document)
+            self._line({"d": document, "query": query})
+
+        return document
+
+
+    def _line(self, entry: dict) -> None:
+        """ Append entry as one JSON line. """
+        self.file.write(json.dumps(entry, separators = (",", ":")) + "\n")
+
+
+    def close(self) -> None:
+        """ Close the session. """
+        self.session.close()
+
+
+
+class RecordingTransport(Transport):
+    """ RecordingTransport class, a Transport whose requests are appended to a file. """
+
+    def __init__(self, path: str, url: str, **settings) -> None:
+        """ Initialize class, settings are Transport's arguments. """
+        super().__init__(url, **settings)
+        self.path = path
+        self._file = None
+        self._recording = None
+
+
+    @property
+    def session(self) -> RecordingSession:
+        """ Returns the recording session, the file is opened on first use. """
+        if self._recording is None:
+            session = super().session
+
+            with self._lock:
+                if self._recording is None:
+                    # line buffered, every request is on disk when the next one starts
+                    # pylint: disable=consider-using-with
+                    self._file = open(self.path, 'a', encoding='utf-8', buffering = 1)
+                    self._recording = RecordingSession(session, self._file)
+                    self._recording.write({
+                        "format": FORMAT,
+                        "version": VERSION,
+                        "url": self.url,
+                        "persisted_queries": self.persisted_queries
+                    })
+
+        return self._recording
+
+
+    def close(self) -> None:
+        """ Close all pooled connections and the file. """
+        super().close()
+
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._recording = None
+
+
+
+class ReplaySession():  # pylint: disable=too-many-instance-attributes
+    """ ReplaySession class, answers requests from recorded entries. """
+
+    def __init__(self, entries: list, latency: bool = False, clock = None) -> None:
+        """ Initialize class, with latency responses wait the recorded seconds on clock. """
+        self.latency = latency
+        self.clock = clock
+
+        # unused entries by payload and by operation, last entry by operation
+        self._by_payload = collections.defaultdict(collections.deque)
+        self._by_operation = collections.defaultdict(collections.deque)
+        self._last = {}
+
+        # operation by document hash, for persisted queries sent as hash only
+        self._operations = {}
+
+        for entry in entries:
+            name = entry.get("o") or operation(entry["q"])
+            entry["used"] = False
+            self._by_payload[_key(entry["q"])].append(entry)
+            self._by_operation[name].append(entry)
+            self._last[name] = entry
+
+            if name != "anonymous":
+                self._operations[_sha256(entry["q"])] = name
+
+        # answered requests by how they were matched
+        self.stats = {"payload": 0, "operation": 0, "repeated": 0, "missing": 0}
+        self._lock = threading.Lock()
+
+
+    @staticmethod
+    def _next(entries: collections.deque) -> dict:
+        """ Returns the first unused entry of entries and marks it used, None if all are used. """
+        while entries:
+            entry = entries.popleft()
+
+            if not entry["used"]:
+                entry["used"] = True
+                return entry
+
+        return None
+
+
+    def operation(self, payload: dict) -> str:
+        """ Returns the operation name of a payload, also of a hash-only persisted query. """
+        if payload.get("query") is None:
+            return self._operations.get(_sha256(payload), "anonymous")
+        return operation(payload)
+
+
+    def find(self, payload: dict) -> dict:
+        """ Returns the recorded entry answering payload, None if its operation is unknown. """
+        name = self.operation(payload)
+
+        with self._lock:
+            entry = self._next(self._by_payload.get(_key(payload), ()))
+
+            if entry is not None:
+                self.stats["payload"] += 1
+                return entry
+
+            entry = self._next(self._by_operation.get(name, ()))
+
+            if entry is not None:
+                self.stats["operation"] += 1
+                return entry
+
+            entry = self._last.get(name)
+            self.stats["repeated" if entry is not None else "missing"] += 1
+            return entry
+
+
+    def post(self, _url: str, json: dict = None, headers: dict = None, timeout = None):
+        """ Returns the recorded response, raises the recorded error. """
+        # pylint: disable=redefined-outer-name,unused-argument
+        entry = self.find(json)
+
+        if entry is None:
+            return FakeResponse(200, {"errors": [{
+                "message": "Operation {0} is not in the recording".format(self.operation(json))
+            }]})
+
+        if self.latency:
+            self.clock.sleep(entry["s"])
+
+        if entry.get("e") == "timeout":
+            raise requests.Timeout(entry["m"])
+        if "e" in entry:
+            raise requests.ConnectionError(entry["m"])
+
+        return FakeResponse(entry["c"], entry["r"])
+
+
+    def close(self) -> None:
+        """ Nothing to close. """
+
+
+
+class ReplayTransport(Transport):
+    """
+    ReplayTransport class, a Transport whose requests are answered from a
+    recording instead of the network.
+    """
+
+    def __init__(self, path: str, latency: bool = False, **settings) -> None:
+        """
+        Initialize class, settings are Transport's arguments except url, which is
+        read from the recording, as persisted_queries by default. With latency
+        responses wait the recorded seconds.
+        """
+        with open(path, 'r', encoding='utf-8') as file:
+            header = json.loads(file.readline())
+
+        if header.get("format") != FORMAT:
+            raise ValueError("{0} is not a recording of API traffic".format(path))
+
+        settings.setdefault("persisted_queries", header.get("persisted_queries", False))
+        super().__init__(header["url"], **settings)
+        self.path = path
+        self._session = ReplaySession(read(path), latency, self.clock)
+
+
+    @property
+    def session(self) -> ReplaySession:
+        """ Returns the replay session. """
+        return self._session
+
+
+    @property
+    def stats(self) -> dict:
+        """ Returns the number of answered requests by how they were matched. """
+        return self._session.stats
+
+
+    def close(self) -> None:
+        """ Nothing to close. """
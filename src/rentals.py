@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+
+"""
+Bookkeeping of active rentals, see src/engine.py.
+
+RentalRegistry keeps one Rental per rented scooter keyed by scooter id, so a
+rental is added and removed in O(1). Iterating the registry goes over a
+snapshot, rentals can end (be removed) while a tick is iterating.
+"""
+
+import random
+
+
+
+class Rental():  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """ Rental class, one rented scooter. """
+
+    __slots__ = (
+        "scooter_id", "user_id", "station", "city", "state", "rng", "start_time", "running"
+    )
+
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        scooter_id,
+        user_id,
+        station: str,
+        city,
+        state = None,
+        rng = None
+    ) -> None:
+        """
+        Initialize class. station is the station the scooter was rented from,
+        city the city's CityState, state the scooter's ScooterState and rng the
+        scooter's random stream (default random module). start_time is set when
+        the scooter is rented, running while it is started.
+        """
+        self.scooter_id = scooter_id
+        self.user_id = user_id
+        self.station = station
+        self.city = city
+        self.state = state
+        self.rng = random if rng is None else rng
+        self.start_time = None
+        self.running = False
+
+
+    def __repr__(self) -> str:
+        """ Returns scooter and user id of the rental """
+        return "Rental(scooter_id={0!r}, user_id={1!r})".format(self.scooter_id, self.user_id)
+
+
+
+class RentalRegistry():
+    """ RentalRegistry class """
+
+    def __init__(self) -> None:
+        """ Initialize class """
+        self._rentals = {}
+
+
+    def __len__(self) -> int:
+        """ Returns number of active rentals. """
+        return len(self._rentals)
+
+
+    def __contains__(self, scooter_id) -> bool:
+        """ Returns True if the scooter is rented. """
+        return scooter_id in self._rentals
+
+
+    def __iter__(self):
+        """ Returns iterator over a snapshot of the active rentals, in order of rental. """
+        return iter(list(self._rentals.values()))
+
+
+    def add(self, rental: Rental) -> None:
+        """ Adds a rental, replacing an older rental of the same scooter. """
+        self._rentals[rental.scooter_id] = rental
+
+
+    def get(self, scooter_id) -> Rental:
+        """ Returns the rental of a scooter or None. """
+        return self._rentals.get(scooter_id)
+
+
+    def remove(self, scooter_id) -> Rental:
+        """ Removes and returns the rental of a scooter, None if it is not rented. """
+        return self._rentals.pop(scooter_id, None)
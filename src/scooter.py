@@ -10,58 +10,113 @@ Scooter's status id:
 4- Charging
 7- Running
 
-scooter's data
-data = {
-    "id": "1",              # scooter id (str)
-    "lat": 59.174586,       # coordinates (float)
-    "lon": 17.602334,       # coordinates   (float)
-    "speed": 0,             # km/h  (int)
-    "battery": 0,           # % (int)
-    "status": "7"           # status id (str)
-    "station": "1"          # station id (str)
-}
-
-city's data
-city = {
-    "id": "2",          # citys id (str)
-    "area": 25.84,      # km²   (float)
-    "lat": 59.19554,    # coordinates (float)
-    "lon": 17.62525     # coordinates (float)
-}
+scooter's data, a ScooterState (src/state.py)
+data = ScooterState(
+    id = "1",               # scooter id (str)
+    lat = 59.174586,        # coordinates (float)
+    lon = 17.602334,        # coordinates   (float)
+    speed = 0,              # km/h  (int)
+    battery = 0,            # % (int)
+    status = "7",           # status id (str)
+    station = "1"           # station id (str)
+)
+
+city's data, a CityState
+city = CityState(
+    id = "2",           # citys id (str)
+    area = 25.84,       # km²   (float)
+    lat = 59.19554,     # coordinates (float)
+    lon = 17.62525      # coordinates (float)
+)
+
+Every Scooter has its own data and city, objects that work on the same
+scooter (e.g. a Scooter and an ApiData) are given the same states.
+
+Fleet keeps the same data for many scooters in numpy arrays, one element per
+scooter, and updates all scooters with one call.
+
+Random numbers (speed, bearing, maintenance) come from the scooter's rng, the
+random module unless a seeded stream is given. scooter_rng(seed, scooter_id)
+returns one stream per scooter, so a seed gives the same trajectories whatever
+order, process or coroutine the scooters are moved in. Fleet draws all
+scooters' numbers at once from a seeded numpy Generator.
 """
 
-import math
 import random
-import re
-from geopy.distance import geodesic, distance
+from collections.abc import MutableMapping
+import numpy as np
+
+from src.geofence import CityGeofence
+from src.geometry import get_geometry, SphericalGeometry
+from src.metrics import REGISTRY, timed
+from src.state import CityState, ScooterState
+
+
+# seconds of the geometry calls, Scooter's are sampled since they take a few microseconds
+SAMPLE = 16
+
+
+def _seconds(call: str):
+    """ Returns the histogram of a Scooter/Fleet call. """
+    return REGISTRY.histogram(
+        "scooter_call_seconds",
+        "Seconds per geometry call, Scooter calls sampled 1 in {0}".format(SAMPLE),
+        call = call
+    )
+
+
+
+def scooter_rng(seed: int, scooter_id):
+    """ Returns the random stream of a scooter for seed, the random module if seed is None. """
+    if seed is None:
+        return random
+    return random.Random("{0}:{1}".format(seed, scooter_id))
 
 
 
 class Scooter():
     """ Scooter class """
 
-    # scooter's data
-    data = {}
+    # scooter's new coordinates (lat, lon), set by change_location
+    new_location = None
+
+    # seconds the scooter runs between two moves, set to the driver's tick/step
+    step = 15
+
+    # distance/destination math, geodesic (exact) or spherical (fast)
+    geometry = get_geometry()
+
+    # random numbers, the random module or a random.Random from scooter_rng
+    rng = random
+
 
-    # city's data
-    city = {}
+    def __init__(self, rng = None) -> None:
+        """ Initialize class, rng is the scooter's random stream (default random module). """
+        self.data = ScooterState()
+        self.city = CityState()
 
-    # scooter's new coordinates
-    location = ""
+        if rng is not None:
+            self.rng = rng
 
 
-    def __init__(self) -> None:
-        """ Initialize class """
+    @property
+    def location(self) -> str:
+        """ Returns the new coordinates as text, only used for debugging. """
+        if self.new_location is None:
+            return ""
+        return "Point({0}, {1}, 0.0)".format(*self.new_location)
 
 
     def __str__(self) -> str:
         """ Returns scooters data """
+        data = self.data
+
         return "Scooter id: {0}\nLocation: {1}, {2}\nSpeed: {3}km/h\nBattery: {4}%".format(
-            self.data["id"],
-            self.data["lat"],
-            self.data["lon"],
-            self.data["speed"],
-            self.data["battery"],
+            data.id,
+            data.lat,
+            data.lon,
+            data.speed,
+            data.battery,
         )
 
 
@@ -77,21 +132,13 @@ class Scooter():
 
 
     def add_scooter_to_dict(self, scooter: dict) -> None:
-        """ Adds scooter's data to the dictionary. Status id 7 means 'Running'. """
-        self.data["id"] = scooter["id"]
-        self.data["lat"] = float(scooter['latitude'])
-        self.data["lon"] = float(scooter['longitude'])
-        self.data["speed"] = int(scooter['speed'])
-        self.data["battery"] = int(scooter['battery'])
-        self.data["status"] =  "7"
+        """ Parses scooter's API data into the scooter's state. Status id 7 means 'Running'. """
+        self.data.parse(scooter).status = "7"
 
 
     def add_city_to_dict(self, city: dict):
-        """ Adds scooter's data to the dictionary. Status id 7 means 'Running'. """
-        self.city["id"] = city["id"]
-        self.city["lat"] = float(city['latitude'])
-        self.city["lon"] = float(city['longitude'])
-        self.city["area"] = float(city['area'])
+        """ Parses city's API data into the scooter's city state. """
+        self.city.parse(city)
 
 
     def move_scooter(self) -> None:
@@ -99,79 +146,320 @@ class Scooter():
         Move the scooter from one position to another and reduce battery level.
         Max scooter speed is 20km/h.
         """
-        # get random speed
-        speed = random.randrange(1, 21)
-        points = re.split("Point|, ", self.location)
+        data = self.data
 
-        self.data["lat"] = float(points[1][1:])
-        self.data["lon"] = float(points[2])
-        self.data["speed"] = speed
-        self.data["battery"] -= 1
+        # get random speed
+        data.speed = self.rng.randrange(1, 21)
+        data.lat, data.lon = self.new_location
+        data.battery -= 1
 
 
+    @timed(_seconds("change_location"), SAMPLE)
     def change_location(self) -> None:
         """
         Get random location inside the city zone.
         Speed = distance ÷ time => distance = speed * time
         Bearing in degrees: North: 0, East: 90, South: 180, West: 270.
         """
-        # 5 seconds is sleep time, scooter moves every 5 seconds
-        # but for better simulation I increase it to 15 seconds
-        distance_km = self.data["speed"] * (15 / 3600)
+        # the scooter moves step seconds between two calls
+        data = self.data
+        distance_km = data.speed * (self.step / 3600)
 
         # get random position
-        bearing = random.randint(0, 3)
+        bearing = self.rng.randint(0, 3)
         degrees = [0, 90, 180, 270]
 
-        new_location = repr(distance(kilometers = distance_km).destination(
-            (self.data["lat"], self.data["lon"]),
-            bearing = degrees[bearing])
+        self.new_location = self.geometry.destination(
+            data.lat,
+            data.lon,
+            distance_km,
+            degrees[bearing]
         )
 
-        self.location = new_location
-
 
     def stop_scooter(self, status = "7") -> None:
         """ Stop the scooter from running. Change status and speed. """
-        self.data["status"] = status
-        self.data["speed"] = 0
+        self.data.status = status
+        self.data.speed = 0
 
 
     def check_battery(self) -> bool:
         """ Returns True if the battery level < 20%. """
-        return self.data["battery"] < 20
+        return self.data.battery < 20
 
 
     def move_to_station(self, station: dict) -> None:
         """ Move the scooter to charging/maintenance station. """
-        self.data["lat"] = float(station["latitude"])
-        self.data["lon"] = float(station["longitude"])
-        self.data["station"] = station["id"]
+        self.data.lat = float(station["latitude"])
+        self.data.lon = float(station["longitude"])
+        self.data.station = station["id"]
 
 
-    @staticmethod
-    def check_maintenance() -> bool:
+    def check_maintenance(self) -> bool:
         """
         Returns true if the random number is 1 otherwise False, since scooters are not
         real, the maintenance check will be randomly.
         The probability that the scooter receives maintenance is 10%.
         """
-        probability = random.randint(1, 10)
+        probability = self.rng.randint(1, 10)
         return probability == 1
 
 
+    @timed(_seconds("check_scooter_in_city"), SAMPLE)
     def check_scooter_in_city(self) -> bool:
         """
         Check if scooter is inside the city zone. If the distance between
         two points 'city center and scooter' <= circle radius return True.
         """
-        # Circle Area = pi * r^2 => r^2 = A/pi
-        radius = math.sqrt((self.city["area"] / math.pi))
-        scooter = (self.data["lat"], self.data["lon"])
-        city = (self.city["lat"], self.city["lon"])
+        return self.city.geofence.contains(self.data.lat, self.data.lon)
 
-        calculate = geodesic(scooter, city).km
 
-        if calculate <= radius:
-            return True
-        return False
+
+class _FleetRow(MutableMapping):
+    """
+    Dictionary view over one scooter (row) of a Fleet, the keys are also
+    attributes like the fields of ScooterState/CityState.
+    """
+
+    # the state whose parse reads the row's API data
+    _state = ScooterState
+
+
+    def __init__(self, fleet, index: int, fields: dict) -> None:
+        """ Initialize class, fields maps a key to (array name, get type, set type). """
+        object.__setattr__(self, "_fleet", fleet)
+        object.__setattr__(self, "_index", index)
+        object.__setattr__(self, "_fields", fields)
+
+
+    def __getattr__(self, key: str):
+        """ Returns the value of a key. """
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key) from None
+
+
+    def __setattr__(self, key: str, value) -> None:
+        """ Sets the value of a key. """
+        self[key] = value
+
+
+    def __getitem__(self, key):
+        """ Returns the value of a key. """
+        name, get_type, _ = self._fields[key]
+        return get_type(getattr(self._fleet, name)[self._index])
+
+
+    def __setitem__(self, key, value) -> None:
+        """ Sets the value of a key. """
+        name, _, set_type = self._fields[key]
+        getattr(self._fleet, name)[self._index] = set_type(value)
+
+
+    def __delitem__(self, key) -> None:
+        """ Keys can't be removed from a row. """
+        raise TypeError("Fleet rows have fixed keys")
+
+
+    def __iter__(self):
+        """ Returns iterator over the keys. """
+        return iter(self._fields)
+
+
+    def __len__(self) -> int:
+        """ Returns number of keys. """
+        return len(self._fields)
+
+
+    def parse(self, data: dict) -> "_FleetRow":
+        """ Sets the row's fields from API data like ScooterState/CityState.parse, returns self. """
+        self.update(self._state.from_api(data))
+        return self
+
+
+
+class _CityRow(_FleetRow):
+    """ Dictionary view over the city of one scooter of a Fleet. """
+
+    _state = CityState
+
+    @property
+    def geofence(self) -> CityGeofence:
+        """ Returns the zone of the scooter's city. """
+        return self._fleet.geofence(self._fleet.city_id[self._index])
+
+
+class Fleet():  # pylint: disable=too-many-instance-attributes
+    """
+    Fleet class, scooter's and city's data of N scooters in arrays.
+    Ids, status and station are stored as numbers.
+    """
+
+    # data keys and their (array, get type, set type)
+    _DATA_FIELDS = {
+        "id": ("id", lambda value: str(int(value)), int),
+        "lat": ("lat", float, float),
+        "lon": ("lon", float, float),
+        "speed": ("speed", int, int),
+        "battery": ("battery", int, int),
+        "status": ("status", lambda value: str(int(value)), int),
+        "station": ("station", lambda value: str(int(value)), int),
+    }
+
+    # city keys and their (array, get type, set type)
+    _CITY_FIELDS = {
+        "id": ("city_id", lambda value: str(int(value)), int),
+        "lat": ("city_lat", float, float),
+        "lon": ("city_lon", float, float),
+        "area": ("city_area", float, float),
+    }
+
+
+    def __init__(self, size: int, seed: int = None) -> None:
+        """ Initialize class with size scooters, random numbers are drawn with seed. """
+        self.id = np.zeros(size, dtype = np.int64)
+        self.lat = np.zeros(size)
+        self.lon = np.zeros(size)
+        self.speed = np.zeros(size, dtype = np.int64)
+        self.battery = np.zeros(size, dtype = np.int64)
+        self.status = np.full(size, 7, dtype = np.int64)
+        self.station = np.zeros(size, dtype = np.int64)
+
+        # city where each scooter is
+        self.city_id = np.zeros(size, dtype = np.int64)
+        self.city_lat = np.zeros(size)
+        self.city_lon = np.zeros(size)
+        self.city_area = np.zeros(size)
+
+        # scooters' new coordinates
+        self.new_lat = np.zeros(size)
+        self.new_lon = np.zeros(size)
+
+        self.rng = np.random.default_rng(seed)
+
+        # array math, spherical by default
+        self.geometry = SphericalGeometry()
+
+        # city id: CityGeofence
+        self.geofences = {}
+
+
+    def __len__(self) -> int:
+        """ Returns number of scooters. """
+        return len(self.id)
+
+
+    @classmethod
+    def from_data(cls, scooters: list, cities: list, seed: int = None) -> "Fleet":
+        """
+        Returns a Fleet from API data, scooters[i] is located in cities[i].
+        Status id 7 means 'Running'.
+        """
+        fleet = cls(len(scooters), seed)
+
+        for index, (scooter, city) in enumerate(zip(scooters, cities)):
+            fleet.id[index] = int(scooter["id"])
+            fleet.lat[index] = float(scooter["latitude"])
+            fleet.lon[index] = float(scooter["longitude"])
+            fleet.speed[index] = int(scooter["speed"])
+            fleet.battery[index] = int(scooter["battery"])
+
+            fleet.city_id[index] = int(city["id"])
+            fleet.city_lat[index] = float(city["latitude"])
+            fleet.city_lon[index] = float(city["longitude"])
+            fleet.city_area[index] = float(city["area"])
+
+            if fleet.city_id[index] not in fleet.geofences:
+                fleet.geofences[fleet.city_id[index]] = CityGeofence.from_data(city)
+
+        return fleet
+
+
+    def scooter(self, index: int) -> Scooter:
+        """ Returns a Scooter whose data and city are views over one row of the fleet. """
+        scooter = Scooter()
+        scooter.data = _FleetRow(self, index, self._DATA_FIELDS)
+        scooter.city = _CityRow(self, index, self._CITY_FIELDS)
+
+        return scooter
+
+
+    @timed(_seconds("fleet.change_location"))
+    def change_location(self, mask: np.ndarray = None) -> None:
+        """
+        Get random new location for the scooters (all or where mask is True),
+        like Scooter.change_location. The new coordinates are saved in new_lat/new_lon.
+        """
+        mask = self._mask(mask)
+
+        distance_km = self.speed[mask] * (Scooter.step / 3600)
+        bearing = self.rng.integers(0, 4, size = distance_km.size) * 90
+
+        self.new_lat[mask], self.new_lon[mask] = self.geometry.destinations(
+            self.lat[mask],
+            self.lon[mask],
+            distance_km,
+            bearing
+        )
+
+
+    def move_scooter(self, mask: np.ndarray = None) -> None:
+        """
+        Move the scooters (all or where mask is True) to their new coordinates,
+        give them a random speed and reduce battery level.
+        """
+        mask = self._mask(mask)
+
+        self.lat[mask] = self.new_lat[mask]
+        self.lon[mask] = self.new_lon[mask]
+        self.speed[mask] = self.rng.integers(1, 21, size = np.count_nonzero(mask))
+        self.battery[mask] -= 1
+
+
+    def stop_scooter(self, status: int = 7, mask: np.ndarray = None) -> None:
+        """ Stop the scooters (all or where mask is True). Change status and speed. """
+        mask = self._mask(mask)
+
+        self.status[mask] = int(status)
+        self.speed[mask] = 0
+
+
+    def check_battery(self) -> np.ndarray:
+        """ Returns True for every scooter with battery level < 20%. """
+        return self.battery < 20
+
+
+    @timed(_seconds("fleet.check_scooter_in_city"))
+    def check_scooter_in_city(self) -> np.ndarray:
+        """ Returns True for every scooter inside its city's zone, one contains_many per city. """
+        inside = np.zeros(len(self), dtype = bool)
+
+        for city_id in np.unique(self.city_id):
+            mask = self.city_id == city_id
+            inside[mask] = self.geofence(city_id).contains_many(self.lat[mask], self.lon[mask])
+
+        return inside
+
+
+    def geofence(self, city_id: int) -> CityGeofence:
+        """ Returns the zone of a city, built from the first scooter in the city on first use. """
+        geofence = self.geofences.get(city_id)
+
+        if geofence is None:
+            index = int(np.argmax(self.city_id == city_id))
+            geofence = self.geofences[city_id] = CityGeofence(
+                str(city_id),
+                self.city_lat[index],
+                self.city_lon[index],
+                self.city_area[index]
+            )
+
+        return geofence
+
+
+    def _mask(self, mask: np.ndarray) -> np.ndarray:
+        """ Returns mask, or a mask selecting all scooters. """
+        if mask is None:
+            return np.ones(len(self), dtype = bool)
+        return mask
@@ -0,0 +1,211 @@
+#!/usr/bin/python3
+
+"""
+Scooter's and city's data as compact records.
+
+ScooterState and CityState have one slot per field and no __dict__, a scooter
+takes less than half the memory of the dictionary it replaces (about 140 bytes
+with its floats), so 100k scooters can be kept in one process. Fields are
+parsed once from the API's data (parse/from_api) and then read as attributes,
+e.g. state.battery:
+
+scooter = ScooterState.from_api(api_scooter)
+scooter.lat, scooter.lon        # float
+scooter.speed, scooter.battery  # int
+scooter.id, scooter.status, scooter.station   # ids (str), as sent to the API
+
+Both are also read like the dictionaries they replace (state["lat"],
+dict(state), state == {...}); a field that has not been set (None) is missing.
+"""
+
+from src.geofence import CityGeofence
+
+
+
+class _Record():
+    """ _Record class, the mapping methods of ScooterState and CityState. """
+
+    __slots__ = ()
+
+    # the record's fields, in order
+    _FIELDS = ()
+
+
+    def __getitem__(self, key: str):
+        """ Returns the value of a field, KeyError if it is not set. """
+        value = getattr(self, key, None) if key in self._FIELDS else None
+
+        if value is None:
+            raise KeyError(key)
+        return value
+
+
+    def __setitem__(self, key: str, value) -> None:
+        """ Sets a field, KeyError if the record has no such field. """
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+
+    def __contains__(self, key: str) -> bool:
+        """ Returns True if the field is set. """
+        return key in self._FIELDS and getattr(self, key) is not None
+
+
+    def __iter__(self):
+        """ Returns iterator over the set fields. """
+        return iter(self.keys())
+
+
+    def __len__(self) -> int:
+        """ Returns number of set fields. """
+        return len(self.keys())
+
+
+    def __eq__(self, other) -> bool:
+        """ Returns True if other (a record or dictionary) has the same fields and values. """
+        try:
+            return dict(self.items()) == dict(other.items())
+        except AttributeError:
+            return NotImplemented
+
+
+    def __repr__(self) -> str:
+        """ Returns the set fields """
+        return "{0}({1})".format(
+            type(self).__name__,
+            ", ".join("{0}={1!r}".format(key, value) for key, value in self.items())
+        )
+
+
+    def keys(self) -> list:
+        """ Returns the set fields. """
+        return [key for key in self._FIELDS if getattr(self, key) is not None]
+
+
+    def items(self) -> list:
+        """ Returns (field, value) of the set fields. """
+        return [(key, getattr(self, key)) for key in self.keys()]
+
+
+    def get(self, key: str, default = None):
+        """ Returns the value of a field, default if it is not set. """
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+    def update(self, other) -> None:
+        """ Sets the fields of other, a record or dictionary. """
+        for key, value in other.items():
+            self[key] = value
+
+
+
+class ScooterState(_Record):
+    """ ScooterState class, one scooter's data. """
+
+    __slots__ = ("id", "lat", "lon", "speed", "battery", "status", "station")
+
+    _FIELDS = __slots__
+
+
+    def __init__(  # pylint: disable=too-many-arguments,redefined-builtin
+        self,
+        id: str = None,
+        lat: float = None,
+        lon: float = None,
+        speed: int = None,
+        battery: int = None,
+        status: str = None,
+        station: str = None
+    ) -> None:
+        """ Initialize class """
+        self.id = id
+        self.lat = lat
+        self.lon = lon
+        self.speed = speed
+        self.battery = battery
+        self.status = status
+        self.station = station
+
+
+    @classmethod
+    def from_api(cls, scooter: dict) -> "ScooterState":
+        """ Returns the state of a scooter from the API's data, see Api.get_scooter_data. """
+        return cls().parse(scooter)
+
+
+    def parse(self, scooter: dict) -> "ScooterState":
+        """ Sets id, position, speed and battery from the API's data, returns self. """
+        self.id = scooter["id"]
+        self.lat = float(scooter["latitude"])
+        self.lon = float(scooter["longitude"])
+        self.speed = int(scooter["speed"])
+        self.battery = int(scooter["battery"])
+        return self
+
+
+    def copy(self) -> "ScooterState":
+        """ Returns a copy of the state. """
+        return ScooterState(
+            self.id,
+            self.lat,
+            self.lon,
+            self.speed,
+            self.battery,
+            self.status,
+            self.station
+        )
+
+
+
+class CityState(_Record):
+    """ CityState class, a city's center, area and zone. """
+
+    __slots__ = ("id", "lat", "lon", "area", "_geofence")
+
+    _FIELDS = ("id", "lat", "lon", "area")
+
+
+    def __init__(  # pylint: disable=redefined-builtin
+        self,
+        id: str = None,
+        lat: float = None,
+        lon: float = None,
+        area: float = None
+    ) -> None:
+        """ Initialize class, lat/lon is the city center and area in km². """
+        self.id = id
+        self.lat = lat
+        self.lon = lon
+        self.area = area
+        self._geofence = None
+
+
+    @classmethod
+    def from_api(cls, city: dict) -> "CityState":
+        """ Returns the state of a city from the API's data, see Api.get_city_data. """
+        return cls().parse(city)
+
+
+    def parse(self, city: dict) -> "CityState":
+        """ Sets id, center and area from the API's data, returns self. """
+        self.id = city["id"]
+        self.lat = float(city["latitude"])
+        self.lon = float(city["longitude"])
+        self.area = float(city["area"])
+        self._geofence = None
+        return self
+
+
+    @property
+    def geofence(self) -> CityGeofence:
+        """ Returns the city's zone, built on first use and again if the city id changed. """
+        geofence = self._geofence
+
+        if geofence is None or geofence.city_id != self.id:
+            geofence = self._geofence = CityGeofence(self.id, self.lat, self.lon, self.area)
+
+        return geofence
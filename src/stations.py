@@ -0,0 +1,153 @@
+#!/usr/bin/python3
+# pylint: disable=too-many-instance-attributes,too-many-locals
+
+"""
+Spatial index of the stations in one city and zone.
+
+Stations are projected to km on a plane around the city (equirectangular,
+exact enough for a few km) and put in a grid of cell_km squares. nearest()
+searches the grid in rings around the query point, nearest_many() compares
+whole fleets with all stations at once using numpy.
+"""
+
+import math
+import numpy as np
+
+from src.geometry import EARTH_RADIUS
+
+
+# km per degree latitude
+KM_PER_DEGREE = EARTH_RADIUS * math.pi / 180
+
+
+
+class StationIndex():
+    """ StationIndex class """
+
+    def __init__(self, stations: list, cell_km: float = None) -> None:
+        """
+        Initialize class, stations is the API's list of stations (id, latitude, longitude).
+        Without cell_km the grid gets about as many cells as there are stations.
+        """
+        self.stations = list(stations)
+
+        lats = np.array([float(station["latitude"]) for station in self.stations])
+        lons = np.array([float(station["longitude"]) for station in self.stations])
+
+        # projection center
+        self._lat = float(lats.mean()) if self.stations else 0.0
+        self._lon = float(lons.mean()) if self.stations else 0.0
+        self._km_per_lon = KM_PER_DEGREE * math.cos(math.radians(self._lat))
+
+        self._x, self._y = self._project(lats, lons)
+
+        if cell_km is None and self.stations:
+            extent = max(np.ptp(self._x), np.ptp(self._y))
+            cell_km = max(extent / math.ceil(math.sqrt(len(self.stations))), 0.05)
+
+        self.cell_km = cell_km or 0.5
+
+        # (column, row): [(x, y, station index)], plain floats for fast scalar queries
+        self._cells = {}
+
+        for index, (x, y) in enumerate(zip(self._x.tolist(), self._y.tolist())):
+            self._cells.setdefault(self._cell(x, y), []).append((x, y, index))
+
+        # first/last column and row with stations
+        columns = [cell[0] for cell in self._cells] or [0]
+        rows = [cell[1] for cell in self._cells] or [0]
+        self._bounds = (min(columns), max(columns), min(rows), max(rows))
+
+
+    def __len__(self) -> int:
+        """ Returns number of stations. """
+        return len(self.stations)
+
+
+    def _project(self, lat, lon) -> tuple:
+        """ Returns lat/lon (floats or arrays) as x/y in km from the projection center. """
+        return (
+            (np.asarray(lon) - self._lon) * self._km_per_lon,
+            (np.asarray(lat) - self._lat) * KM_PER_DEGREE
+        )
+
+
+    def _cell(self, x: float, y: float) -> tuple:
+        """ Returns the grid cell of a point. """
+        return (math.floor(x / self.cell_km), math.floor(y / self.cell_km))
+
+
+    def nearest(self, lat: float, lon: float) -> dict:
+        """ Returns the station nearest to lat/lon, None if there are no stations. """
+        if not self.stations:
+            return None
+
+        x = (lon - self._lon) * self._km_per_lon
+        y = (lat - self._lat) * KM_PER_DEGREE
+        column, row = self._cell(x, y)
+
+        best, best_distance = None, math.inf
+
+        # outside the grid the first rings are empty, start at the first ring that can hit
+        min_column, max_column, min_row, max_row = self._bounds
+        first = max(0, min_column - column, column - max_column, min_row - row, row - max_row)
+        last = max(column - min_column, max_column - column, row - min_row, max_row - row)
+
+        for ring in range(first, last + 1):
+            for cell in self._ring(column, row, ring):
+                for station_x, station_y, index in self._cells.get(cell, ()):
+                    distance = math.hypot(station_x - x, station_y - y)
+
+                    if distance < best_distance:
+                        best, best_distance = index, distance
+
+            # every station in the next ring is at least ring * cell_km away
+            if best is not None and best_distance <= ring * self.cell_km:
+                break
+
+        return self.stations[best]
+
+
+    def _ring(self, column: int, row: int, ring: int):
+        """ Yields the cells inside the grid at distance ring (in cells) from column/row. """
+        min_column, max_column, min_row, max_row = self._bounds
+
+        if ring == 0:
+            yield (column, row)
+            return
+
+        # top and bottom row of the ring
+        columns = range(max(column - ring, min_column), min(column + ring, max_column) + 1)
+
+        for ring_row in (row - ring, row + ring):
+            if min_row <= ring_row <= max_row:
+                for ring_column in columns:
+                    yield (ring_column, ring_row)
+
+        # left and right column, without the corners
+        rows = range(max(row - ring + 1, min_row), min(row + ring - 1, max_row) + 1)
+
+        for ring_column in (column - ring, column + ring):
+            if min_column <= ring_column <= max_column:
+                for ring_row in rows:
+                    yield (ring_column, ring_row)
+
+
+    def nearest_many(self, lats, lons, chunk_size: int = 4096) -> np.ndarray:
+        """
+        Returns for every point the index in stations of the nearest station.
+        Used for whole fleets, e.g. when all scooters are returned.
+        """
+        x, y = self._project(lats, lons)
+        x, y = x.reshape(-1, 1), y.reshape(-1, 1)
+        nearest = np.empty(len(x), dtype = np.int64)
+
+        # chunk_size points * stations distances at a time
+        for start in range(0, len(x), chunk_size):
+            stop = start + chunk_size
+            nearest[start:stop] = np.hypot(
+                x[start:stop] - self._x,
+                y[start:stop] - self._y
+            ).argmin(axis = 1)
+
+        return nearest.reshape(np.shape(lats))
@@ -0,0 +1,355 @@
+#!/usr/bin/python3
+# pylint: disable=too-many-instance-attributes,too-many-arguments
+
+"""
+Shared HTTP transport for the GraphQL API.
+
+All ApiData instances post through one Transport, which keeps a pooled
+keep-alive requests.Session so that consecutive calls reuse TCP connections
+instead of opening a new one per request.
+
+Every request has a timeout. Idempotent requests (reads) that time out, cannot
+connect or get a 5xx response are retried up to retries times, waiting
+backoff * 2^attempt seconds (at most max_backoff) in between. Mutations are
+sent once. A CircuitBreaker counts failed requests; after failure_threshold
+failures in a row requests fail at once with CircuitOpenError for
+reset_timeout seconds, then one request is let through to test the backend.
+Failed requests raise TransportError, which tells what went wrong.
+
+With persisted_queries=True a query is sent as its SHA-256 hash only
+(automatic persisted queries, APQ). If the server answers PersistedQueryNotFound
+the request is sent again with the document's text, which registers the hash
+for all later requests. A server answering PersistedQueryNotSupported gets the
+text from then on.
+"""
+
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.clock import SystemClock
+from src.documents import operation, query_hash
+from src.metrics import REGISTRY
+
+
+# responses worth retrying for idempotent requests
+RETRY_STATUSES = frozenset((500, 502, 503, 504))
+
+# persisted-query errors by their error code
+PERSISTED_QUERY_ERRORS = {
+    "PERSISTED_QUERY_NOT_FOUND": "PersistedQueryNotFound",
+    "PERSISTED_QUERY_NOT_SUPPORTED": "PersistedQueryNotSupported",
+}
+
+
+def persisted_query_error(response) -> str:
+    """ Returns PersistedQueryNotFound/NotSupported if the response is one, otherwise None. """
+    text = getattr(response, "text", None)
+
+    # most responses are answered without parsing them
+    if isinstance(text, str) and "PersistedQuery" not in text and "PERSISTED_QUERY" not in text:
+        return None
+
+    try:
+        errors = response.json().get("errors") or ()
+
+        for error in errors:
+            code = (error.get("extensions") or {}).get("code")
+
+            if error.get("message") in PERSISTED_QUERY_ERRORS.values():
+                return error["message"]
+            if code in PERSISTED_QUERY_ERRORS:
+                return PERSISTED_QUERY_ERRORS[code]
+    except (ValueError, AttributeError, TypeError):
+        pass
+
+    return None
+
+
+
+class TransportError(Exception):
+    """
+    TransportError class, a request failed. kind is 'timeout', 'connection',
+    'http' or 'circuit_open', status is the HTTP status for 'http'.
+    """
+
+    def __init__(self, kind: str, message: str, status: int = None, attempts: int = 1) -> None:
+        """ Initialize class, attempts is the number of times the request was sent. """
+        super().__init__(message)
+        self.kind = kind
+        self.message = message
+        self.status = status
+        self.attempts = attempts
+
+
+    def __str__(self) -> str:
+        """ Returns kind, message and attempts. """
+        return "{0}: {1} ({2} attempts)".format(self.kind, self.message, self.attempts)
+
+
+
+class CircuitOpenError(TransportError):
+    """ CircuitOpenError class, the request was not sent since the backend is down. """
+
+    def __init__(self, retry_in: float) -> None:
+        """ Initialize class, retry_in is seconds until a request is let through again. """
+        super().__init__(
+            "circuit_open",
+            "backend unavailable, retry in {0:.1f}s".format(retry_in),
+            attempts = 0
+        )
+        self.retry_in = retry_in
+
+
+
+class CircuitBreaker():
+    """ CircuitBreaker class """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock = None):
+        """
+        Initialize class, the circuit opens after failure_threshold failures in a row
+        and stays open reset_timeout seconds. Time is read from clock (default SystemClock).
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = SystemClock() if clock is None else clock
+
+        self.failures = 0
+        self._opened = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+
+    @property
+    def state(self) -> str:
+        """ Returns 'closed', 'open' or 'half-open'. """
+        if self._opened is None:
+            return "closed"
+        if self.clock.now() - self._opened < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+
+    def before(self) -> None:
+        """ Raises CircuitOpenError if a request may not be sent now. """
+        with self._lock:
+            if self._opened is None:
+                return
+
+            retry_in = self._opened + self.reset_timeout - self.clock.now()
+
+            # half-open, one request at a time tests the backend
+            if retry_in <= 0 and not self._trial:
+                self._trial = True
+                return
+
+        raise CircuitOpenError(max(retry_in, 0))
+
+
+    def success(self) -> None:
+        """ Close the circuit after a successful request. """
+        with self._lock:
+            self.failures = 0
+            self._opened = None
+            self._trial = False
+
+
+    def failure(self) -> None:
+        """ Count a failed request, opens the circuit at failure_threshold or a failed trial. """
+        with self._lock:
+            self.failures += 1
+
+            if self._trial or self.failures >= self.failure_threshold:
+                self._opened = self.clock.now()
+                self._trial = False
+
+
+
+class Transport():
+    """ Transport class """
+
+    def __init__(
+        self,
+        url: str,
+        headers: dict = None,
+        pool_size: int = 10,
+        keep_alive: bool = True,
+        timeout: float = 10.0,
+        retries: int = 2,
+        backoff: float = 0.1,
+        max_backoff: float = 2.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock = None,
+        persisted_queries: bool = False
+    ) -> None:
+        """
+        Initialize class.
+        pool_size is the max number of connections kept open to the backend,
+        timeout is in seconds per attempt (None waits forever), retries is the
+        max number of retries of an idempotent request. Backoff sleeps and the
+        circuit breaker read time from clock (default SystemClock). With
+        persisted_queries queries are sent as hash, see the module docstring.
+        """
+        self.url = url
+        self.headers = dict(headers or {})
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.persisted_queries = persisted_queries
+        self.clock = SystemClock() if clock is None else clock
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, self.clock)
+
+        if not keep_alive:
+            self.headers["Connection"] = "close"
+
+        self._session = None
+        self._lock = threading.Lock()
+
+
+    def config(self) -> dict:
+        """ Returns the arguments to create a transport with the same settings. """
+        return {
+            "url": self.url,
+            "headers": self.headers,
+            "pool_size": self.pool_size,
+            "keep_alive": self.keep_alive,
+            "timeout": self.timeout,
+            "retries": self.retries,
+            "backoff": self.backoff,
+            "max_backoff": self.max_backoff,
+            "failure_threshold": self.breaker.failure_threshold,
+            "reset_timeout": self.breaker.reset_timeout,
+            "persisted_queries": self.persisted_queries
+        }
+
+
+    @property
+    def session(self) -> requests.Session:
+        """ Returns the pooled session, it is created on first use. """
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections = self.pool_size,
+                        pool_maxsize = self.pool_size
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+
+        return self._session
+
+
+    def post(
+        self,
+        payload: dict,
+        idempotent: bool = False,
+        timeout: float = None
+    ) -> requests.Response:
+        """
+        Send a GraphQL payload to the API endpoint. Idempotent payloads (queries)
+        are retried, timeout overrides the transport's timeout for this call.
+        Raises TransportError if the request failed. Seconds and result of
+        every call are counted per GraphQL operation.
+        """
+        name = operation(payload)
+        result = "ok"
+        start = time.perf_counter()
+
+        try:
+            if self.persisted_queries and payload.get("query"):
+                return self._send_persisted(payload, name, idempotent, timeout)
+            return self._send(payload, name, idempotent, timeout)
+        except Exception as error:
+            result = getattr(error, "kind", "error")
+            raise
+        finally:
+            REGISTRY.histogram(
+                "api_request_seconds",
+                "Seconds per API call, retries included",
+                operation = name
+            ).observe(time.perf_counter() - start)
+            REGISTRY.counter(
+                "api_requests_total",
+                "API calls by result, ok or the error kind",
+                operation = name,
+                result = result
+            ).inc()
+
+
+    def _send_persisted(self, payload: dict, name: str, idempotent: bool, timeout: float):
+        """ Send payload as persisted query, with the text only if the server asks for it. """
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": query_hash(payload["query"])}}
+        persisted = {key: value for key, value in payload.items() if key != "query"}
+        persisted["extensions"] = extensions
+
+        response = self._send(persisted, name, idempotent, timeout)
+        error = persisted_query_error(response)
+
+        if error is None:
+            return response
+
+        REGISTRY.counter(
+            "api_persisted_query_misses_total",
+            "Persisted queries sent again with their text",
+            operation = name
+        ).inc()
+
+        if error == "PersistedQueryNotSupported":
+            self.persisted_queries = False
+            return self._send(payload, name, idempotent, timeout)
+
+        return self._send(dict(payload, extensions = extensions), name, idempotent, timeout)
+
+
+    def _send(self, payload: dict, name: str, idempotent: bool, timeout: float):
+        """ Send payload, with retries if it is idempotent. """
+        attempts = self.retries + 1 if idempotent else 1
+
+        for attempt in range(attempts):
+            self.breaker.before()
+
+            try:
+                response = self.session.post(
+                    self.url,
+                    json = payload,
+                    headers = self.headers,
+                    timeout = self.timeout if timeout is None else timeout
+                )
+            except requests.Timeout as error:
+                failed = TransportError("timeout", str(error), attempts = attempt + 1)
+            except (requests.RequestException, OSError) as error:
+                failed = TransportError("connection", str(error), attempts = attempt + 1)
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self.breaker.success()
+                    return response
+
+                failed = TransportError(
+                    "http",
+                    "status {0}".format(response.status_code),
+                    status = response.status_code,
+                    attempts = attempt + 1
+                )
+
+            self.breaker.failure()
+
+            if attempt + 1 < attempts:
+                REGISTRY.counter("api_retries_total", "Retried API calls", operation = name).inc()
+                self.clock.sleep(min(self.backoff * 2 ** attempt, self.max_backoff))
+
+        raise failed
+
+
+    def close(self) -> None:
+        """ Close all pooled connections. """
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
@@ -9,6 +9,8 @@ from unittest.mock import patch
 import json
 
 from src.api import ApiData
+from src.state import ScooterState
+from src.transport import Transport
 
 
 # dummy data
@@ -21,25 +23,27 @@ class TestApi(unittest.TestCase):
 
     def setUp(self) -> None:
         """ Create object for all tests """
-        self.api = ApiData(user_id = 1)
+        # own transport, failed requests of one test must not open the circuit for the next
+        self.api = ApiData(user_id = 1, transport = Transport(ApiData._URL, backoff = 0))
+        ApiData.clear_cache()
 
         # Fake data
-        self.api.data = {
-            "id": "1",
-            "lat": 59.193475,
-            "lon":  17.640142,
-            "speed": 0,
-            "battery": 80.0,
-            "status": "1",
-            "station": "2"
-        }
+        self.api.data = ScooterState(
+            id = "1",
+            lat = 59.193475,
+            lon = 17.640142,
+            speed = 0,
+            battery = 80.0,
+            status = "1",
+            station = "2"
+        )
 
     def tearDown(self) -> None:
         """ Remove dependencies after test. """
         self.api = None
 
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_get_scooter_data_success(self, mock_post):
         """ Test to return scooters API data when request succeeds. """
         mock_post.return_value.json.return_value = {
@@ -54,7 +58,7 @@ class TestApi(unittest.TestCase):
         self.assertEqual(scooter_data, DATA[0]["getScooterById"][0])
 
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_get_scooter_data_error(self, mock_post):
         """ Test to return -1 when request fails."""
         mock_post.side_effect = Exception('Request failed')
@@ -63,7 +67,44 @@ class TestApi(unittest.TestCase):
         self.assertEqual(act, -1)
 
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
+    def test_get_scooters_data_success(self, mock_post):
+        """ Test to return many scooters from one aliased query. """
+        mock_post.return_value.json.return_value = {
+            'data': {
+                's0': DATA[0]["getScooterById"],
+                's1': []
+            }
+        }
+
+        scooters = self.api.get_scooters_data([1, 2])
+
+        mock_post.assert_called_once()
+        self.assertEqual(mock_post.call_args.kwargs["json"]["variables"], {"id0": "1", "id1": "2"})
+        self.assertEqual(scooters, {"1": DATA[0]["getScooterById"][0]})
+
+
+    @patch('requests.Session.post')
+    def test_get_scooters_data_chunks(self, mock_post):
+        """ Test to send one request per chunk of scooters. """
+        mock_post.return_value.json.return_value = { 'data': {} }
+
+        scooters = self.api.get_scooters_data(range(1, 6), chunk_size = 2)
+
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(scooters, {})
+
+
+    @patch('requests.Session.post')
+    def test_get_scooters_data_error(self, mock_post):
+        """ Test to return -1 when request fails."""
+        mock_post.side_effect = Exception('Request failed')
+        act = self.api.get_scooters_data([1, 2])
+
+        self.assertEqual(act, -1)
+
+
+    @patch('requests.Session.post')
     def test_update_scooter_success(self, mock_post):
         """ Test to return None and get nothing printed when request succeeds."""
         mock_post.return_value.json.return_value = {
@@ -81,7 +122,7 @@ class TestApi(unittest.TestCase):
         self.assertEqual(captured_output.getvalue(), '')
 
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_update_scooter_error(self, mock_post):
         """ Test to print error message when request fails. """
         mock_post.side_effect = Exception('Request failed update scooter')
@@ -95,7 +136,7 @@ class TestApi(unittest.TestCase):
         self.assertEqual(captured_output.getvalue(), 'Request failed update scooter\n')
 
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_update_rented_scooter_success(self, mock_post):
         """ Test to return None and get nothing printed when request succeeds."""
         mock_post.return_value.json.return_value = {
@@ -113,7 +154,7 @@ class TestApi(unittest.TestCase):
         self.assertEqual(captured_output.getvalue(), '')
 
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_update_rented_scooter_error(self, mock_post):
         """ Test to print error message when request fails. """
         mock_post.side_effect = Exception('Request failed update rented scooter')
@@ -127,7 +168,38 @@ class TestApi(unittest.TestCase):
         self.assertEqual(captured_output.getvalue(), 'Request failed update rented scooter\n')
 
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
+    def test_queue_rented_update(self, mock_post):
+        """ Test to send only the latest queued update of a scooter on flush. """
+        self.api.queue_rented_update()
+        self.api.data["lat"] = 59.2
+        self.api.queue_rented_update()
+
+        mock_post.assert_not_called()
+
+        self.api.flush_updates()
+
+        mock_post.assert_called_once()
+        variables = mock_post.call_args.kwargs["json"]["variables"]
+        self.assertEqual(variables["latitude0"], "59.2")
+        self.assertNotIn("latitude1", variables)
+
+
+    @patch('requests.Session.post')
+    def test_return_scooter_flushes_updates(self, mock_post):
+        """ Test to send queued updates before the scooter is returned. """
+        self.api.station = "Station"
+        self.api.queue_rented_update()
+
+        self.api.return_scooter(time = 3)
+
+        queries = [call.kwargs["json"]["query"] for call in mock_post.call_args_list]
+        self.assertEqual(len(queries), 2)
+        self.assertIn("updateRentedScooters", queries[0])
+        self.assertEqual(len(self.api.batch), 0)
+
+
+    @patch('requests.Session.post')
     def test_rent_scooter_success(self, mock_post):
         """ Test to return None and get log id updated when request succeeds."""
         self.api.user_id = "3"
@@ -143,7 +215,7 @@ class TestApi(unittest.TestCase):
         self.assertEqual(self.api.station, "Station")
 
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_rent_scooter_error(self, mock_post):
         """ Test to print error message when request fails. """
         self.api.user_id = "3"
@@ -160,7 +232,7 @@ class TestApi(unittest.TestCase):
 
 
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_return_scooter_success(self, mock_post):
         """ Test to return None and get nothing printed when request succeeds. """
         self.api.station = "Station"
@@ -179,7 +251,7 @@ class TestApi(unittest.TestCase):
         self.assertEqual(captured_output.getvalue(), '')
 
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_return_scooter_error(self, mock_post):
         """ Test to print error message when request fails. """
         self.api.station = "Station"
@@ -195,7 +267,7 @@ class TestApi(unittest.TestCase):
 
 
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_get_city_data_success(self, mock_post):
         """ Test to return citys API data when request succeeds. """
         mock_post.return_value.json.return_value = {
@@ -210,7 +282,24 @@ class TestApi(unittest.TestCase):
         self.assertEqual(city_data, DATA[0]["getCityByScooterId"][0])
 
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
+    def test_get_city_data_cached(self, mock_post):
+        """ Test to return the city from the cache on the second call. """
+        mock_post.return_value.json.return_value = {
+            'data': {
+                'getCityByScooterId': DATA[0]["getCityByScooterId"]
+            }
+        }
+
+        self.api.get_city_data()
+        city_data = self.api.get_city_data()
+
+        mock_post.assert_called_once()
+        self.assertEqual(city_data, DATA[0]["getCityByScooterId"][0])
+        self.assertEqual(ApiData.city_cache.hits, 1)
+
+
+    @patch('requests.Session.post')
     def test_get_city_data_error(self, mock_post):
         """ Test to print error message when request fails. """
         mock_post.side_effect = ConnectionError('Connection failed')
@@ -219,7 +308,7 @@ class TestApi(unittest.TestCase):
         self.assertEqual(act, -1)
 
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_get_station_success(self, mock_post):
         """ Test to return stations API data when request succeeds."""
         self.api.city["id"] = "1"
@@ -233,9 +322,10 @@ class TestApi(unittest.TestCase):
         station_data = self.api.get_station(zone_id = "2")
 
         self.assertEqual(station_data, DATA[0]["getStationByCityIdAndZoneId"][0])
+        self.assertIn(("1", "2"), ApiData.station_cache)
 
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_get_station_error(self, mock_post):
         """ Test to return -1 when request fails. """
         self.api.city["id"] = "1"
@@ -244,3 +334,29 @@ class TestApi(unittest.TestCase):
         act = self.api.get_station(zone_id = "2")
 
         self.assertEqual(act, -1)
+        self.assertNotIn(("1", "2"), ApiData.station_cache)
+
+
+    @patch('requests.Session.post')
+    def test_get_station_nearest(self, mock_post):
+        """ Test to return the nearest station and load the stations only once per zone. """
+        self.api.city["id"] = "1"
+
+        mock_post.return_value.json.return_value = {
+            'data': {
+                'getStationByCityIdAndZoneId': [
+                    { "id": "1", "latitude": "59.30", "longitude": "17.70" },
+                    { "id": "2", "latitude": "59.19", "longitude": "17.64" },
+                    { "id": "3", "latitude": "59.10", "longitude": "17.50" }
+                ]
+            }
+        }
+
+        first = self.api.get_station(zone_id = "1")
+
+        self.api.data["lat"], self.api.data["lon"] = 59.11, 17.51
+        second = self.api.get_station(zone_id = "1")
+
+        self.assertEqual(first["id"], "2")
+        self.assertEqual(second["id"], "3")
+        mock_post.assert_called_once()
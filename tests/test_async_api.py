@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+""" Test cases for AsyncApiData class. """
+
+
+import asyncio
+import sys
+import unittest
+from io import StringIO
+from unittest.mock import MagicMock
+import json
+
+from src.api import ApiData
+from src.async_api import AsyncApiData
+from src.state import ScooterState
+
+
+# dummy data
+with open('tests/dummy.json', 'r', encoding='utf-8') as file:
+    DATA = json.load(file)
+
+
+class TestAsyncApi(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.transport = MagicMock()
+        self.api = AsyncApiData(self.transport, concurrency = 4)
+        ApiData.clear_cache()
+
+        # Fake data
+        self.data = ScooterState(
+            id = "1",
+            lat = 59.193475,
+            lon = 17.640142,
+            speed = 0,
+            battery = 80,
+            status = "7",
+            station = "2"
+        )
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.api.close()
+        self.api = None
+
+
+    def test_get_scooter_data_success(self):
+        """ Test to return scooters API data when request succeeds. """
+        self.transport.post.return_value.json.return_value = {
+            'data': {
+                'getScooterById': DATA[0]["getScooterById"]
+            }
+        }
+
+        scooter_data = asyncio.run(self.api.get_scooter_data(1))
+
+        self.assertEqual(scooter_data, DATA[0]["getScooterById"][0])
+        self.assertEqual(self.transport.post.call_args[0][0]["variables"], {"id": "1"})
+
+
+    def test_get_scooter_data_error(self):
+        """ Test to return -1 when request fails."""
+        self.transport.post.side_effect = ConnectionError('Connection failed')
+
+        self.assertEqual(asyncio.run(self.api.get_scooter_data(1)), -1)
+
+
+    def test_update_rented_scooter(self):
+        """ Test to send the given scooter's data. """
+        asyncio.run(self.api.update_rented_scooter(self.data))
+
+        variables = self.transport.post.call_args[0][0]["variables"]
+        self.assertEqual(variables["latitude"], "59.193475")
+        self.assertEqual(variables["battery"], "80")
+
+
+    def test_rent_scooter_error(self):
+        """ Test to print error message and return no station when request fails. """
+        self.transport.post.side_effect = Exception('Request failed')
+
+        captured_output = StringIO()
+        sys.stdout = captured_output
+        station = asyncio.run(self.api.rent_scooter(self.data, 6))
+        sys.stdout = sys.__stdout__
+
+        self.assertEqual(station, "")
+        self.assertEqual(captured_output.getvalue(), 'Request failed\n')
+
+
+    def test_get_station_success(self):
+        """ Test to return stations API data for a city and zone. """
+        self.transport.post.return_value.json.return_value = {
+            'data': {
+                'getStationByCityIdAndZoneId': DATA[0]["getStationByCityIdAndZoneId"]
+            }
+        }
+
+        station = asyncio.run(self.api.get_station("2", "1", 59.19, 17.62))
+
+        self.assertEqual(station, DATA[0]["getStationByCityIdAndZoneId"][0])
+        self.assertEqual(
+            self.transport.post.call_args[0][0]["variables"],
+            {"cityId": "2", "zoneId": "1"}
+        )
+
+
+    def test_concurrency_limit(self):
+        """ Test that no more than concurrency requests are in flight. """
+        in_flight = []
+        peak = []
+
+        def post(_payload, idempotent = False):
+            in_flight.append(1)
+            peak.append(len(in_flight))
+            asyncio.run(asyncio.sleep(0.01))
+            in_flight.pop()
+            return MagicMock()
+
+        self.transport.post.side_effect = post
+
+        async def run():
+            await asyncio.gather(*(self.api.update_rented_scooter(self.data) for _ in range(20)))
+
+        asyncio.run(run())
+
+        self.assertEqual(self.transport.post.call_count, 20)
+        self.assertLessEqual(max(peak), 4)
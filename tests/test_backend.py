@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+""" Test cases for FakeBackend class. """
+
+
+import threading
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from simulation import Simulation
+from src.api import ApiData
+from src.backend import FakeBackend, FakeTransport, serve, url
+from src.batch import UpdateBatch
+from src.clock import VirtualClock
+from src.transport import Transport, TransportError
+
+
+class TestFakeBackend(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.backend = FakeBackend(scooters = 10, seed = 1)
+        self.api = ApiData(user_id = 6, transport = FakeTransport(self.backend))
+        ApiData.clear_cache()
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.api = None
+        self.backend = None
+
+
+    def test_generate(self):
+        """ Test to seed available scooters inside the dummy city. """
+        # Arrange
+        self.api.add_scooter_to_dict(self.api.get_scooter_data(7))
+
+        # Act
+        self.api.add_city_to_dict(self.api.get_city_data())
+
+        # Assert
+        self.assertEqual(len(self.backend.scooters), 10)
+        self.assertEqual(self.api.city["id"], "23")
+        self.assertTrue(self.api.check_scooter_in_city())
+
+
+    def test_get_scooters_data(self):
+        """ Test to answer an aliased query for many scooters, unknown ids are left out. """
+        # Act
+        scooters = self.api.get_scooters_data([1, 2, 99])
+
+        # Assert
+        self.assertEqual(sorted(scooters), ["1", "2"])
+        self.assertEqual(scooters["2"]["status"]["status"], "Available")
+
+
+    def test_rent_update_return(self):
+        """ Test a rental: rent, batched position update and return. """
+        # Arrange
+        self.api.check_scooter_status(self.api.get_scooter_data(3))
+
+        # Act
+        self.api.rent_scooter()
+        self.api.data["lat"] = 59.2
+        self.api.queue_rented_update()
+        self.api.return_scooter(time = 4)
+
+        # Assert
+        scooter = self.backend.scooters["3"]
+        self.assertEqual(self.api.station, "1")
+        self.assertEqual(scooter["latitude"], "59.2")
+        self.assertEqual(scooter["status"]["status"], "Running")
+        self.assertEqual(self.backend.logs[-1]["time"], "4")
+
+
+    def test_batch_document(self):
+        """ Test to resolve every aliased field of an UpdateBatch document. """
+        # Arrange
+        updates = [
+            {"id": str(scooter_id), "battery": "10", "status_id": "1",
+             "longitude": "17.6", "latitude": "59.1", "speed": "0"}
+            for scooter_id in (1, 2)
+        ]
+
+        # Act
+        response = self.backend.execute(UpdateBatch.build(updates))
+
+        # Assert
+        self.assertEqual(response, {"data": {"u0": {"id": "1"}, "u1": {"id": "2"}}})
+        self.assertEqual(self.backend.scooters["2"]["battery"], "10")
+
+
+    def test_unknown_field(self):
+        """ Test to return a GraphQL error for fields the backend does not implement. """
+        # Act
+        response = self.backend.execute({"query": "query { getUsers(id: $id) { id } }"})
+
+        # Assert
+        self.assertIsNone(response["data"])
+        self.assertEqual(len(response["errors"]), 1)
+
+
+    def test_error_rate(self):
+        """ Test that injected errors are 503 responses the transport retries and reports. """
+        # Arrange
+        self.backend.error_rate = 1
+        transport = FakeTransport(self.backend, retries = 1, clock = VirtualClock())
+
+        # Act
+        with self.assertRaises(TransportError) as context:
+            transport.post({"query": "query { getScooterById(id: $id) { id } }"}, idempotent = True)
+
+        # Assert
+        self.assertEqual(context.exception.status, 503)
+        self.assertEqual(self.backend.errors, 2)
+
+
+    def test_latency_timeout(self):
+        """ Test to time out when the latency is longer than the transport's timeout. """
+        # Arrange
+        self.backend.latency = 1
+        transport = FakeTransport(self.backend, timeout = 0.01, retries = 0)
+
+        # Act
+        with self.assertRaises(TransportError) as context:
+            transport.post({"query": "query { getScooterById(id: $id) { id } }"})
+
+        # Assert
+        self.assertEqual(context.exception.kind, "timeout")
+
+
+    def test_http_server(self):
+        """ Test to answer requests over HTTP on a free localhost port. """
+        # Arrange
+        server = serve(self.backend, port = 0)
+        threading.Thread(target = server.serve_forever, daemon = True).start()
+        api = ApiData(user_id = 6, transport = Transport(url(server)))
+
+        # Act
+        data = api.get_scooter_data(5)
+
+        # Assert
+        server.shutdown()
+        server.server_close()
+        api.transport.close()
+        self.assertEqual(data["id"], "5")
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_simulation(self, _mock_stdout):
+        """ Test to run the simulation against the fake backend, reading scooters every pass. """
+        # Arrange
+        simulation = Simulation(FakeTransport(self.backend), clock = VirtualClock())
+        simulation.duration = 30
+        simulation.tick = 15
+
+        # Act
+        stats = simulation.simulate(range(1, 11))
+
+        # Assert
+        self.assertEqual(stats["rented"], 10)
+        self.assertEqual(stats["returned"], 10)
+        self.assertEqual(stats["errors"], 0)
+        self.assertEqual(len(self.backend.logs), 10)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+""" Test cases for UpdateBatch class. """
+
+
+import sys
+import time
+import unittest
+from io import StringIO
+from unittest.mock import MagicMock
+
+from src.batch import UpdateBatch
+from src.clock import VirtualClock
+
+
+def update(scooter_id: str) -> dict:
+    """ Returns updateRentedScooterById variables for a scooter. """
+    return {
+        'id': scooter_id,
+        'status_id': "7",
+        'latitude': "59.1",
+        'longitude': "17.6",
+        'speed': "10",
+        'battery': "80",
+    }
+
+
+class TestUpdateBatch(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.transport = MagicMock()
+        self.batch = UpdateBatch(self.transport, max_size = 3, max_delay = 60)
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.batch = None
+
+
+    def test_build(self):
+        """ Test to build one aliased mutation for several updates. """
+        # Act
+        payload = UpdateBatch.build([update("1"), update("2")])
+
+        # Assert
+        self.assertIn("u0: updateRentedScooterById(id: $id0,", payload["query"])
+        self.assertIn("u1: updateRentedScooterById(id: $id1,", payload["query"])
+        self.assertIn("$battery1: String!", payload["query"])
+        self.assertEqual(payload["variables"]["id0"], "1")
+        self.assertEqual(payload["variables"]["id1"], "2")
+        self.assertEqual(len(payload["variables"]), 12)
+
+
+    def test_add_waits_until_full(self):
+        """ Test that nothing is sent until the batch is full. """
+        # Act
+        self.batch.add(update("1"))
+        self.batch.add(update("2"))
+
+        # Assert
+        self.transport.post.assert_not_called()
+        self.assertEqual(len(self.batch), 2)
+
+
+    def test_add_sends_full_batch(self):
+        """ Test to send one request when max size is reached. """
+        # Act
+        for scooter_id in ("1", "2", "3"):
+            self.batch.add(update(scooter_id))
+
+        # Assert
+        self.transport.post.assert_called_once()
+        self.assertEqual(len(self.batch), 0)
+
+
+    def test_add_sends_old_batch(self):
+        """ Test to send the batch when the oldest update is older than max delay. """
+        # Arrange
+        self.batch.max_delay = 0
+
+        # Act
+        self.batch.add(update("1"))
+
+        # Assert
+        self.transport.post.assert_called_once()
+
+
+    def test_max_delay_on_clock(self):
+        """ Test that the age of the batch is read from its clock, not the wall clock. """
+        # Arrange
+        clock = VirtualClock()
+        self.batch = UpdateBatch(self.transport, max_size = 10, max_delay = 60, clock = clock)
+        self.batch.add(update("1"))
+        clock.sleep(59)
+
+        # Act, Assert
+        self.batch.add(update("2"))
+        self.transport.post.assert_not_called()
+
+        clock.sleep(1)
+        self.batch.add(update("3"))
+        self.transport.post.assert_called_once()
+
+
+    def test_flush_splits_batches(self):
+        """ Test to send max size updates per request. """
+        # Arrange
+        self.batch.max_size = 100
+        for scooter_id in range(5):
+            self.batch.add(update(str(scooter_id)))
+        self.batch.max_size = 2
+
+        # Act
+        self.batch.flush()
+
+        # Assert
+        self.assertEqual(self.transport.post.call_count, 3)
+
+
+    def test_flush_error(self):
+        """ Test to print error message when request fails. """
+        # Arrange
+        self.transport.post.side_effect = Exception('Request failed batch')
+        self.batch.max_size = 100
+        self.batch.add(update("1"))
+
+        captured_output = StringIO()
+        sys.stdout = captured_output
+
+        # Act
+        self.batch.flush()
+        sys.stdout = sys.__stdout__
+
+        # Assert
+        self.assertEqual(captured_output.getvalue(), 'Request failed batch\n')
+        self.assertEqual(len(self.batch), 0)
+
+
+    def test_add_keeps_latest_update(self):
+        """ Test to replace a queued update of the same scooter. """
+        # Arrange
+        newer = dict(update("1"), latitude = "59.2")
+
+        # Act
+        self.batch.add(update("1"))
+        self.batch.add(update("2"))
+        self.batch.add(newer)
+        self.batch.flush()
+
+        # Assert
+        self.transport.post.assert_called_once()
+        variables = self.transport.post.call_args[0][0]["variables"]
+        self.assertEqual(variables["id0"], "1")
+        self.assertEqual(variables["latitude0"], "59.2")
+        self.assertEqual(variables["id1"], "2")
+        self.assertNotIn("id2", variables)
+
+
+    def test_background_flush(self):
+        """ Test that the worker thread sends the batch after max delay and then ends. """
+        # Arrange
+        self.batch = UpdateBatch(self.transport, max_size = 3, max_delay = 0.05, background = True)
+
+        # Act
+        self.batch.add(update("1"))
+        self.transport.post.assert_not_called()
+        time.sleep(0.3)
+
+        # Assert
+        self.transport.post.assert_called_once()
+        self.assertEqual(len(self.batch), 0)
+        self.assertIsNone(self.batch._worker)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+""" Test cases for TTLCache class. """
+
+
+import unittest
+
+from src.cache import TTLCache
+from src.clock import VirtualClock
+
+
+class TestTTLCache(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.clock = VirtualClock()
+        self.cache = TTLCache(max_size = 2, ttl = 60, clock = self.clock)
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.cache = None
+
+
+    def test_get_hit_and_miss(self):
+        """ Test to count hits and misses. """
+        # Arrange
+        self.cache.set("1", {"id": "2"})
+
+        # Act
+        hit = self.cache.get("1")
+        miss = self.cache.get("3", -1)
+
+        # Assert
+        self.assertEqual(hit, {"id": "2"})
+        self.assertEqual(miss, -1)
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 1, "size": 1})
+
+
+    def test_ttl(self):
+        """ Test that a value expires ttl seconds after it was added. """
+        # Arrange
+        self.cache.set("1", "city")
+
+        # Act
+        self.clock.sleep(59)
+        before = self.cache.get("1")
+        self.clock.sleep(1)
+        after = self.cache.get("1")
+
+        # Assert
+        self.assertEqual(before, "city")
+        self.assertIsNone(after)
+        self.assertEqual(len(self.cache), 0)
+
+
+    def test_lru_eviction(self):
+        """ Test to evict the least recently used value when the cache is full. """
+        # Arrange
+        self.cache.set("1", "a")
+        self.cache.set("2", "b")
+        self.cache.get("1")
+
+        # Act
+        self.cache.set("3", "c")
+
+        # Assert
+        self.assertIn("1", self.cache)
+        self.assertNotIn("2", self.cache)
+        self.assertIn("3", self.cache)
+
+
+    def test_warm_and_invalidate(self):
+        """ Test to add many values and remove one or all of them. """
+        # Act
+        self.cache.warm({("2", "1"): "charging", ("2", "4"): "maintenance"})
+        self.cache.invalidate(("2", "1"))
+
+        # Assert
+        self.assertNotIn(("2", "1"), self.cache)
+        self.assertIn(("2", "4"), self.cache)
+
+        # Act
+        self.cache.invalidate()
+
+        # Assert
+        self.assertEqual(len(self.cache), 0)
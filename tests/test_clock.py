@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+""" Test cases for clocks and Scheduler class. """
+
+
+import unittest
+
+from src.clock import Scheduler, VirtualClock
+
+
+class TestScheduler(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.clock = VirtualClock(start = 100)
+        self.scheduler = Scheduler(self.clock)
+        self.events = []
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.scheduler = None
+
+
+    def record(self, name: str) -> None:
+        """ Saves event name and the time it ran. """
+        self.events.append((name, self.clock.now()))
+
+
+    def test_virtual_clock_sleep(self):
+        """ Test that sleep moves the virtual clock forward, never backwards. """
+        # Act
+        self.clock.sleep(15)
+        self.clock.sleep(-5)
+
+        # Assert
+        self.assertEqual(self.clock.now(), 115)
+
+
+    def test_run_in_time_order(self):
+        """ Test to run events in time order, events at the same time in scheduled order. """
+        # Arrange
+        self.scheduler.schedule(30, self.record, "c")
+        self.scheduler.schedule(10, self.record, "a")
+        self.scheduler.schedule(10, self.record, "b")
+
+        # Act
+        count = self.scheduler.run()
+
+        # Assert
+        self.assertEqual(count, 3)
+        self.assertEqual(self.events, [("a", 110), ("b", 110), ("c", 130)])
+
+
+    def test_run_until(self):
+        """ Test to stop before events later than until and keep them queued. """
+        # Arrange
+        def repeat():
+            self.record("tick")
+            self.scheduler.schedule(15, repeat)
+
+        self.scheduler.schedule(0, repeat)
+
+        # Act, a simulated day
+        count = self.scheduler.run(until = 100 + 24 * 3600)
+
+        # Assert
+        self.assertEqual(count, 24 * 3600 // 15 + 1)
+        self.assertEqual(self.events[-1], ("tick", 100 + 24 * 3600))
+        self.assertEqual(len(self.scheduler), 1)
+        self.assertEqual(self.scheduler.next_time(), 100 + 24 * 3600 + 15)
+
+
+    def test_next_time_empty(self):
+        """ Test that an empty queue has no next event. """
+        # Assert
+        self.assertIsNone(self.scheduler.next_time())
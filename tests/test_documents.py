@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+""" Test cases for Document class and persisted queries. """
+
+
+import hashlib
+import json
+import unittest
+
+from src.api import ApiData, SCOOTER_QUERY, scooters_query
+from src.backend import FakeBackend, FakeTransport
+from src.batch import UpdateBatch
+from src.documents import Document, query_hash
+
+
+class TestDocuments(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.backend = FakeBackend(scooters = 10, seed = 1)
+        self.payloads = []
+
+        handle = self.backend.handle
+
+        def record(payload: dict) -> tuple:
+            self.payloads.append(payload)
+            return handle(payload)
+
+        self.backend.handle = record
+        self.api = ApiData(
+            user_id = 6,
+            transport = FakeTransport(self.backend, persisted_queries = True)
+        )
+        ApiData.clear_cache()
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.api = None
+        self.backend = None
+        self.payloads = None
+
+
+    def test_document(self):
+        """ Test to collapse whitespace and know the operation name and hash. """
+        # Act
+        document = Document(""" query getCityByScooterId($id: String!) {
+            getCityByScooterId(id: $id) { id }
+        } """)
+
+        # Assert
+        self.assertEqual(
+            document,
+            "query getCityByScooterId($id: String!) { getCityByScooterId(id: $id) { id } }"
+        )
+        self.assertEqual(document.name, "getCityByScooterId")
+        self.assertEqual(document.sha256, hashlib.sha256(document.encode()).hexdigest())
+        self.assertEqual(query_hash(str(document)), document.sha256)
+        self.assertEqual(json.loads(json.dumps(document.payload({"id": "1"})))["query"], document)
+
+
+    def test_built_once(self):
+        """ Test that aliased documents are built once per size. """
+        # Assert
+        self.assertIs(scooters_query(3), scooters_query(3))
+        self.assertIs(UpdateBatch.document(2), UpdateBatch.document(2))
+        self.assertEqual(scooters_query(2).name, "getScootersById")
+
+
+    def test_persisted_query(self):
+        """ Test to send the text once, when the backend does not know the hash. """
+        # Act
+        first = self.api.get_scooter_data(1)
+        second = self.api.get_scooter_data(2)
+
+        # Assert
+        self.assertEqual((first["id"], second["id"]), ("1", "2"))
+        self.assertEqual(["query" in payload for payload in self.payloads], [False, True, False])
+        self.assertEqual(
+            self.payloads[2]["extensions"]["persistedQuery"]["sha256Hash"],
+            SCOOTER_QUERY.sha256
+        )
+        self.assertEqual(self.backend.documents, {SCOOTER_QUERY.sha256: SCOOTER_QUERY})
+
+
+    def test_persisted_query_batch(self):
+        """ Test to send a batch of updates as persisted query. """
+        # Arrange
+        update = {"id": "1", "battery": "50", "status_id": "7", "longitude": "1.0",
+                  "latitude": "2.0", "speed": "5"}
+        self.api.batch.add(update)
+        self.api.batch.flush()
+        self.api.batch.add(dict(update, battery = "49"))
+
+        # Act
+        self.api.batch.flush()
+
+        # Assert
+        self.assertNotIn("query", self.payloads[-1])
+        self.assertEqual(self.backend.scooters["1"]["battery"], "49")
+
+
+    def test_persisted_queries_not_supported(self):
+        """ Test to send the text from then on, if the backend has no persisted queries. """
+        # Arrange
+        self.backend.persisted_queries = False
+
+        # Act
+        self.api.get_scooter_data(1)
+        self.api.get_scooter_data(2)
+
+        # Assert
+        self.assertEqual(["query" in payload for payload in self.payloads], [False, True, True])
+        self.assertFalse(self.api.transport.persisted_queries)
+
+
+    def test_hash_mismatch(self):
+        """ Test to answer an error if the hash is not the text's hash. """
+        # Act
+        response = self.backend.execute({
+            "query": SCOOTER_QUERY,
+            "variables": {"id": "1"},
+            "extensions": {"persistedQuery": {"version": 1, "sha256Hash": "0" * 64}}
+        })
+
+        # Assert
+        self.assertNotIn("data", response)
+        self.assertEqual(self.backend.documents, {})
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+""" Test cases for RentalEngine class. """
+
+
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from src.api import ApiData
+from src.backend import FakeBackend, FakeTransport
+from src.clock import VirtualClock
+from src.engine import RentalEngine, return_status
+
+
+class TestRentalEngine(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        ApiData.clear_cache()
+        self.backend = FakeBackend(scooters = 2000, seed = 1)
+        self.engine = RentalEngine(FakeTransport(self.backend), VirtualClock())
+        self.engine.tick = 15
+        self.stops = []
+        self.engine.on_stop = lambda rental, reason: self.stops.append((rental.scooter_id, reason))
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.engine.close()
+        self.engine = None
+        self.backend = None
+
+
+    def rent(self, scooter_ids) -> list:
+        """ Returns the rentals of the available scooters, user id = scooter id + 5. """
+        scooters = self.engine.api.get_scooters_data(scooter_ids)
+
+        rentals = [
+            self.engine.rent(scooter_id, scooter_id + 5, scooters[str(scooter_id)])
+            for scooter_id in scooter_ids
+        ]
+
+        return [rental for rental in rentals if rental is not None]
+
+
+    def test_many_rentals_one_thread(self):
+        """ Test to move thousands of rentals by passes in the calling thread. """
+        # Arrange
+        rentals = self.rent(range(1, 2001))
+        threads = threading.active_count()
+
+        for rental in rentals:
+            self.engine.start(rental)
+
+        # Act
+        passes = self.engine.run(until = 60)
+
+        # Assert, passes at 0, 15, 30, 45 and 60 seconds
+        self.assertEqual(passes, 5)
+        self.assertGreater(len(rentals), 1000)
+        self.assertEqual(self.engine.stats["moves"] + len(self.stops), 5 * len(rentals))
+        self.assertEqual(threading.active_count(), threads)
+
+
+    def test_no_passes_without_running_scooters(self):
+        """ Test that a stopped scooter is not moved and passes end when none is running. """
+        # Arrange
+        rental = self.rent([1])[0]
+        self.engine.start(rental)
+        self.engine.run(until = 15)
+
+        # Act
+        self.engine.stop_running(rental)
+        self.engine.run(until = 60)
+
+        # Assert
+        self.assertEqual(self.engine.stats["moves"], 2)
+        self.assertEqual(self.engine.stats["ticks"], 3)
+        self.assertEqual(len(self.engine.scheduler), 0)
+        self.assertEqual(rental.state.speed, 0)
+
+
+    def test_step_is_tick(self):
+        """ Test that a scooter moves speed * tick per pass. """
+        # Arrange
+        rental = self.rent([1])[0]
+        self.engine.tick = 60
+        rental.state.speed = 10
+        lat, lon = rental.state.lat, rental.state.lon
+
+        # Act
+        self.engine.battery_check(rental)
+
+        # Assert, 10km/h for 60 seconds
+        moved = self.engine.scooter.geometry.distance(lat, lon, rental.state.lat, rental.state.lon)
+        self.assertEqual(self.engine.scooter.step, 60)
+        self.assertAlmostEqual(moved, 10 * 60 / 3600, places = 6)
+
+
+    def test_battery_check(self):
+        """ Test that a scooter with low battery is not started or moved. """
+        # Arrange
+        rental = self.rent([1])[0]
+        rental.state.battery = 19
+
+        # Act, Assert
+        self.assertFalse(self.engine.start(rental))
+        self.assertTrue(self.engine.battery_check(rental))
+
+        rental.state.battery = 20
+        self.assertFalse(self.engine.battery_check(rental))
+        self.assertEqual(rental.state.battery, 19)
+
+
+    def test_outside_city(self):
+        """ Test to stop a scooter outside the city, with auto_return it is also returned. """
+        # Arrange
+        first, second = self.rent([1, 2])
+        first.state.lat += 1
+        second.state.lat += 1
+
+        for rental in (first, second):
+            self.engine.start(rental)
+
+        # Act
+        self.engine.move(first)
+        self.engine.auto_return = True
+        self.engine.move(second)
+
+        # Assert
+        self.assertEqual(self.stops, [(1, "outside"), (2, "outside")])
+        self.assertFalse(first.running)
+        self.assertIn(1, self.engine.rentals)
+        self.assertNotIn(2, self.engine.rentals)
+        self.assertEqual(self.backend.scooters["2"]["status"]["id"], "2")
+
+
+    def test_end_rental(self):
+        """ Test to return the scooter with the user, station and time of its rental. """
+        # Arrange
+        rental = self.rent([1])[0]
+        self.engine.clock.sleep(86400 + 150)
+
+        # Act
+        self.engine.end_rental(rental)
+
+        # Assert, a day and 2.5 minutes are billed as 1443 minutes
+        self.assertEqual(int(self.backend.logs[0]["time"]), 1443)
+        self.assertEqual(self.engine.stats["returned"], 1)
+        self.assertEqual(len(self.engine.rentals), 0)
+        self.assertNotEqual(self.backend.scooters["1"]["status"]["id"], "7")
+
+
+    def test_return_status(self):
+        """ Test the status and station zone of a returned scooter, shared with AsyncSimulation. """
+        # Arrange
+        rental = self.rent([1])[0]
+        self.engine.select(rental)
+        scooter = self.engine.scooter
+        scooter.rng = Mock(randint = Mock(return_value = 1))
+        results = []
+
+        # Act
+        results.append(return_status(scooter))
+        rental.state.battery = 10
+        results.append(return_status(scooter))
+        rental.state.lat += 1
+        results.append(return_status(scooter))
+        scooter.rng.randint.return_value = 2
+        rental.state.lat -= 1
+        rental.state.battery = 100
+        results.append(return_status(scooter))
+
+        # Assert
+        self.assertEqual(results, [("3", "4"), ("4", "1"), ("2", None), ("1", None)])
+
+
+    def test_station_lookup_fails(self):
+        """ Test to return a scooter where it is, if no station can be read, and count it. """
+        # Arrange
+        first, second = self.rent([1, 2])
+        first.state.battery = second.state.battery = 10
+        errors = []
+        self.engine.on_error = lambda scooter_id, error: errors.append((scooter_id, str(error)))
+        self.backend.stations = []
+        position = (first.state.lat, first.state.lon)
+
+        # Act
+        self.engine.end_rental(first)
+        self.engine.api.transport.retries = 0
+        self.backend.error_rate = 1.0
+        self.engine.charge_scooter(second)
+
+        # Assert
+        self.assertEqual((first.state.lat, first.state.lon), position)
+        self.assertEqual(first.state.status, "4")
+        self.assertEqual(errors[0], (1, "no station in zone 1"))
+        self.assertEqual(errors[1][0], 2)
+        self.assertEqual((self.engine.stats["returned"], self.engine.stats["errors"]), (2, 2))
+        self.assertEqual(len(self.engine.rentals), 0)
+
+
+    def test_charge_scooter(self):
+        """ Test to fully charge the scooter and leave it at a charging station. """
+        # Arrange
+        rental = self.rent([1])[0]
+        rental.state.battery = 10
+
+        # Act
+        self.engine.charge_scooter(rental)
+
+        # Assert
+        self.assertEqual(rental.state.battery, 100)
+        self.assertEqual(rental.state.status, "1")
+        self.assertEqual(self.backend.scooters["1"]["battery"], "100")
+
+
+    def test_serve(self):
+        """ Test that serve() moves a started scooter at once and ends on close(). """
+        # Arrange
+        engine = RentalEngine(FakeTransport(self.backend))
+        engine.on_stop = self.engine.on_stop
+        rental = engine.rent(1, 6, engine.api.get_scooter_data(1))
+        thread = engine.run_in_thread()
+
+        # Act
+        engine.start(rental)
+        time.sleep(0.1)
+        engine.close()
+
+        # Assert
+        self.assertEqual(engine.stats["moves"] + len(self.stops), 1)
+        self.assertFalse(thread.is_alive())
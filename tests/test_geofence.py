@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+""" Test cases for CityGeofence class. """
+
+
+import json
+import unittest
+
+import numpy as np
+
+from src.geofence import CityGeofence
+from src.geometry import GeodesicGeometry
+
+
+# dummy data
+with open('tests/dummy.json', 'r', encoding='utf-8') as file:
+    DATA = json.load(file)
+
+
+class TestCityGeofence(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.geofence = CityGeofence.from_data(DATA[0]["add_city_to_dict"])
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.geofence = None
+
+
+    def test_from_data(self):
+        """ Test to precompute radius in metres and bounding box from city data. """
+        # Assert
+        self.assertEqual(self.geofence.city_id, "2")
+        self.assertAlmostEqual(self.geofence.radius, 2867.95, places = 2)
+
+        min_lat, max_lat, min_lon, max_lon = self.geofence.bounds
+        self.assertLess(min_lat, 59.19554)
+        self.assertGreater(max_lat, 59.19554)
+        self.assertLess(min_lon, 17.62525)
+        self.assertGreater(max_lon, 17.62525)
+
+
+    def test_contains_edge(self):
+        """ Test that points just inside/outside the radius agree with the geodesic distance. """
+        for bearing in range(0, 360, 45):
+            # Arrange
+            inside = GeodesicGeometry.destination(59.19554, 17.62525, 2.866, bearing)
+            outside = GeodesicGeometry.destination(59.19554, 17.62525, 2.870, bearing)
+
+            # Assert
+            self.assertTrue(self.geofence.contains(*inside))
+            self.assertFalse(self.geofence.contains(*outside))
+
+
+    def test_contains_outside_bounds(self):
+        """ Test to reject points outside the bounding box. """
+        # Act
+        act = self.geofence.contains(59.159111, 17.606871)
+
+        # Assert
+        self.assertFalse(act)
+
+
+    def test_contains_many(self):
+        """ Test that contains_many returns the same as contains for every point. """
+        # Arrange
+        lats = np.array([59.193475, 59.159111, 59.19554, 59.3])
+        lons = np.array([17.640142, 17.606871, 17.62525, 17.62525])
+
+        # Act
+        act = self.geofence.contains_many(lats, lons)
+
+        # Assert
+        self.assertEqual(
+            list(act),
+            [self.geofence.contains(lat, lon) for lat, lon in zip(lats, lons)]
+        )
+        self.assertEqual(list(act), [True, False, True, False])
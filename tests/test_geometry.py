@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+""" Test cases for geometry classes. """
+
+
+import unittest
+import numpy as np
+
+from src.geometry import GeodesicGeometry, SphericalGeometry, get_geometry
+
+
+# a scooter and the city center
+SCOOTER = (59.193475, 17.640142)
+CITY = (59.19554, 17.62525)
+
+
+class TestGeometry(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.exact = GeodesicGeometry()
+        self.fast = SphericalGeometry()
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.exact = None
+        self.fast = None
+
+
+    def test_distance_error_bound(self):
+        """ Test that spherical distance is within 0.5% of geodesic distance. """
+        # Act
+        exact = self.exact.distance(*SCOOTER, *CITY)
+        fast = self.fast.distance(*SCOOTER, *CITY)
+
+        # Assert
+        self.assertAlmostEqual(exact, 0.88, places = 2)
+        self.assertLess(abs(fast - exact) / exact, 0.005)
+
+
+    def test_destination_error_bound(self):
+        """ Test that spherical destination is within 0.5 m of geodesic destination. """
+        for bearing in (0, 90, 180, 270):
+            # Act
+            exact = self.exact.destination(*SCOOTER, 20 * 15 / 3600, bearing)
+            fast = self.fast.destination(*SCOOTER, 20 * 15 / 3600, bearing)
+
+            # Assert
+            self.assertLess(self.exact.distance(*exact, *fast), 0.0005)
+
+
+    def test_arrays_match_scalars(self):
+        """ Test that array methods return the same as scalar methods. """
+        # Arrange
+        lats = np.array([SCOOTER[0], 59.159111])
+        lons = np.array([SCOOTER[1], 17.606871])
+
+        for geometry in (self.exact, self.fast):
+            # Act
+            distances = geometry.distances(lats, lons, *CITY)
+            new_lats, new_lons = geometry.destinations(lats, lons, 0.05, np.array([0, 90]))
+
+            # Assert
+            self.assertAlmostEqual(distances[1], geometry.distance(lats[1], lons[1], *CITY))
+            lat, lon = geometry.destination(lats[1], lons[1], 0.05, 90)
+            self.assertAlmostEqual(new_lats[1], lat)
+            self.assertAlmostEqual(new_lons[1], lon)
+
+
+    def test_get_geometry(self):
+        """ Test to return a geometry by name. """
+        # Assert
+        self.assertIsInstance(get_geometry("spherical"), SphericalGeometry)
+        self.assertIsInstance(get_geometry("geodesic"), GeodesicGeometry)
+
+
+    def test_get_geometry_unknown(self):
+        """ Test to raise ValueError for an unknown geometry. """
+        # Assert
+        with self.assertRaises(ValueError):
+            get_geometry("flat")
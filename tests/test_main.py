@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+""" Test cases for Handler class. """
+
+
+import time
+import threading
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from main import Handler
+from src.api import ApiData
+from src.backend import FakeBackend, FakeTransport
+from src.clock import VirtualClock
+
+
+class TestHandler(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        ApiData.clear_cache()
+        self.backend = FakeBackend(scooters = 10, seed = 1)
+        self.handler = Handler(FakeTransport(self.backend))
+        self.handler.rent(1)
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.handler.engine.close()
+        self.handler = None
+        self.backend = None
+
+
+    def test_rent(self):
+        """ Test to rent an available scooter and refuse a rented one. """
+        # Arrange
+        other = Handler(FakeTransport(self.backend))
+
+        # Act
+        with patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            rented = other.rent(1)
+
+        # Assert
+        self.assertFalse(rented)
+        self.assertIn("Scooter is not available", mock_stdout.getvalue())
+        self.assertEqual(self.handler.scooter.data, self.handler.rental.state)
+        self.assertEqual(self.backend.scooters["1"]["status"]["id"], "7")
+
+
+    def test_idle_engine_does_nothing(self):
+        """ Test that the engine doesn't move the scooter while it isn't running. """
+        # Arrange
+        battery = self.handler.rental.state.battery
+
+        # Act
+        self.handler.engine.run_in_thread()
+        time.sleep(0.1)
+
+        # Assert
+        self.assertEqual(self.handler.rental.state.battery, battery)
+        self.assertEqual(self.handler.engine.stats["ticks"], 0)
+
+
+    def test_start_wakes_engine(self):
+        """ Test that starting the scooter moves it at once, without a thread of its own. """
+        # Arrange
+        self.handler.engine.run_in_thread()
+        threads = threading.active_count()
+
+        # Act
+        self.handler.start_scooter()
+        time.sleep(0.1)
+
+        # Assert
+        self.assertEqual(self.handler.engine.stats["moves"], 1)
+        self.assertLessEqual(threading.active_count(), threads + 1)   # the batch's worker
+
+
+    def test_stop_and_return(self):
+        """ Test that a stopped and returned scooter ends the rental without waiting 5 seconds. """
+        # Arrange
+        self.handler.engine.run_in_thread()
+        self.handler.start_scooter()
+        time.sleep(0.1)
+
+        # Act
+        start = time.time()
+        self.handler.stop_running()
+
+        with self.assertRaises(SystemExit):
+            self.handler.return_scooter()
+
+        # Assert
+        self.assertLess(time.time() - start, 1)
+        self.assertFalse(self.handler.engine.run_in_thread().is_alive())
+        self.assertEqual(len(self.handler.engine.rentals), 0)
+        self.assertNotEqual(self.backend.scooters["1"]["status"]["id"], "7")
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_outside_city_stops_scooter(self, mock_stdout):
+        """ Test that the scooter is stopped when it is outside the city. """
+        # Arrange
+        self.handler.rental.state.lat += 1
+        self.handler.engine.run_in_thread()
+
+        # Act
+        self.handler.start_scooter()
+        time.sleep(0.1)
+
+        # Assert
+        self.assertFalse(self.handler.rental.running)
+        self.assertEqual(self.handler.engine.stats["moves"], 0)
+        self.assertIn("Scooter is outside of the city", mock_stdout.getvalue())
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_low_battery_does_not_start(self, mock_stdout):
+        """ Test that a scooter with low battery can't be started. """
+        # Arrange
+        self.handler.rental.state.battery = 10
+
+        # Act
+        self.handler.start_scooter()
+
+        # Assert
+        self.assertFalse(self.handler.rental.running)
+        self.assertIn("Low battery", mock_stdout.getvalue())
+
+
+    def test_rental_time(self):
+        """ Test to return the rent time read from the handler's clock. """
+        # Arrange
+        clock = VirtualClock(start = 50)
+        handler = Handler(FakeTransport(self.backend), clock = clock)
+        handler.rent(2)
+
+        # Act
+        clock.sleep(125.7)
+
+        # Assert
+        self.assertEqual(str(handler.rental_time()), "0:02:05")
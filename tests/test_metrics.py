@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+""" Test cases for metrics. """
+
+
+import os
+import tempfile
+import unittest
+import urllib.request
+from unittest.mock import MagicMock
+
+from src.metrics import REGISTRY, Registry, Exporter, timed
+from src.transport import Transport, operation
+from src.api import SCOOTER_QUERY
+
+
+class TestMetrics(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.registry = Registry()
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.registry = None
+
+
+    def test_counter_and_gauge(self):
+        """ Test to return the same metric for the same name and labels. """
+        # Act
+        self.registry.counter("requests_total", operation = "a").inc()
+        self.registry.counter("requests_total", operation = "a").inc(2)
+        self.registry.gauge("rentals").set(7)
+
+        # Assert
+        self.assertEqual(self.registry.counter("requests_total", operation = "a").value, 3)
+        self.assertEqual(self.registry.counter("requests_total", operation = "b").value, 0)
+        self.assertEqual(self.registry.gauge("rentals").value, 7)
+
+
+    def test_kind_conflict(self):
+        """ Test to raise ValueError when a name is used for another kind of metric. """
+        # Arrange
+        self.registry.counter("ticks")
+
+        # Act, Assert
+        with self.assertRaises(ValueError):
+            self.registry.gauge("ticks")
+
+
+    def test_percentile(self):
+        """ Test to estimate percentiles within the bucket width (sqrt(2)). """
+        # Arrange
+        histogram = self.registry.histogram("seconds")
+
+        for millisecond in range(1, 101):
+            histogram.observe(millisecond / 1000)
+
+        # Act, Assert
+        for fraction in (0.5, 0.95, 0.99):
+            value = histogram.percentile(fraction)
+            self.assertGreater(value, fraction / 10 / 1.42)
+            self.assertLess(value, fraction / 10 * 1.42)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertAlmostEqual(histogram.sum, 5.05)
+
+
+    def test_text(self):
+        """ Test to export metrics in the Prometheus text format. """
+        # Arrange
+        self.registry.counter("requests_total", "Requests", operation = "a").inc()
+        self.registry.histogram("seconds", "Seconds").observe(0.001)
+
+        # Act
+        text = self.registry.text()
+
+        # Assert
+        self.assertIn("# TYPE requests_total counter\n", text)
+        self.assertIn('requests_total{operation="a"} 1\n', text)
+        self.assertIn("# TYPE seconds histogram\n", text)
+        self.assertIn('seconds_bucket{le="+Inf"} 1\n', text)
+        self.assertIn("seconds_count 1\n", text)
+        self.assertIn("# TYPE seconds_percentile gauge\n", text)
+        self.assertIn('seconds_percentile{quantile="0.99"} ', text)
+
+
+    def test_timed(self):
+        """ Test to time one in every calls. """
+        # Arrange
+        histogram = self.registry.histogram("seconds")
+        function = timed(histogram, 4)(lambda value: value * 2)
+
+        # Act
+        results = [function(value) for value in range(8)]
+
+        # Assert
+        self.assertEqual(results, [0, 2, 4, 6, 8, 10, 12, 14])
+        self.assertEqual(histogram.count, 2)
+
+
+    def test_transport_metrics(self):
+        """ Test that the transport counts calls and seconds per GraphQL operation. """
+        # Arrange
+        transport = Transport("http://localhost")
+        transport._session = MagicMock()
+        requests = REGISTRY.counter("api_requests_total", operation = "getScooterById", result = "ok")
+        before = requests.value
+
+        # Act
+        transport.post({"query": SCOOTER_QUERY, "variables": {"id": "1"}})
+
+        # Assert
+        self.assertEqual(operation({"query": SCOOTER_QUERY}), "getScooterById")
+        self.assertEqual(operation({"query": "{ getUsers { id } }"}), "anonymous")
+        self.assertEqual(requests.value, before + 1)
+        seconds = REGISTRY.histogram("api_request_seconds", operation = "getScooterById")
+        self.assertGreater(seconds.count, 0)
+
+
+    def test_exporter(self):
+        """ Test to write the metrics to a file and serve them over HTTP. """
+        # Arrange
+        self.registry.gauge("rentals").set(3)
+        path = os.path.join(tempfile.mkdtemp(), "metrics.prom")
+        exporter = Exporter(self.registry, path = path, port = 0, interval = 60).start()
+
+        # Act
+        host, port = exporter.server.server_address[:2]
+        with urllib.request.urlopen("http://{0}:{1}/metrics".format(host, port)) as response:
+            served = response.read().decode("utf-8")
+
+        exporter.stop()
+
+        # Assert
+        with open(path, 'r', encoding='utf-8') as file:
+            self.assertEqual(file.read(), served)
+        self.assertIn("rentals 3\n", served)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+""" Test cases for profiling. """
+
+
+import os
+import tempfile
+import time
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from src.profiling import profiled, SamplingProfiler
+
+
+def busy(seconds: float) -> None:
+    """ Keep the thread busy for seconds. """
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestProfiling(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.output = os.path.join(tempfile.mkdtemp(), "profile")
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.output = None
+
+
+    @patch.dict(os.environ, {}, clear = True)
+    def test_off(self):
+        """ Test that nothing is profiled without SCOOTER_PROFILE. """
+        # Act
+        with profiled() as profiler:
+            busy(0.01)
+
+        # Assert
+        self.assertIsNone(profiler)
+
+
+    def test_unknown(self):
+        """ Test to raise ValueError for an unknown profiler. """
+        # Act, Assert
+        with self.assertRaises(ValueError):
+            with profiled("perf"):
+                pass
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_cprofile(self, _mock_stdout):
+        """ Test to write stats, pstats and collapsed call edges. """
+        # Act
+        with profiled("cprofile", self.output):
+            busy(0.01)
+
+        # Assert
+        for suffix in (".txt", ".pstats", ".collapsed"):
+            self.assertTrue(os.path.exists(self.output + suffix))
+
+        with open(self.output + ".collapsed", 'r', encoding='utf-8') as file:
+            self.assertIn("busy (test_profiling.py:", file.read())
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch.dict(os.environ, {"SCOOTER_PROFILE": "sample"})
+    def test_sample_from_environment(self, _mock_stdout):
+        """ Test to sample the stacks when SCOOTER_PROFILE is set, also on sys.exit(). """
+        # Act
+        with self.assertRaises(SystemExit):
+            with profiled(output = self.output, interval = 0.001) as profiler:
+                busy(0.1)
+                raise SystemExit
+
+        # Assert
+        self.assertIsInstance(profiler, SamplingProfiler)
+
+        with open(self.output + ".collapsed", 'r', encoding='utf-8') as file:
+            stacks = file.read()
+
+        self.assertIn("MainThread;", stacks)
+        self.assertIn(";busy (test_profiling.py:", stacks)
+
+        total, own, function = next(
+            function for function in profiler.functions() if function[2].startswith("busy")
+        )
+        self.assertGreater(total, 0)
+        self.assertLessEqual(own, total)
+        self.assertIn("test_profiling.py", function)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+""" Test cases for RecordingTransport and ReplayTransport class. """
+
+
+import json
+import os
+import tempfile
+import unittest
+
+import requests
+
+from src.api import ApiData
+from src.backend import FakeBackend, FakeSession
+from src.clock import VirtualClock
+from src.recording import RecordingTransport, ReplayTransport, read
+from src.transport import TransportError
+
+
+class TestRecording(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.path = os.path.join(tempfile.mkdtemp(), "session.jsonl")
+        self.backend = FakeBackend(scooters = 10, seed = 1)
+
+        # requests go to the fake backend instead of the network
+        self.transport = RecordingTransport(self.path, "http://backend/api/v1/graphql")
+        self.transport._session = FakeSession(self.backend)  # pylint: disable=protected-access
+
+        self.api = ApiData(user_id = 6, transport = self.transport)
+        ApiData.clear_cache()
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.transport.close()
+        self.api = None
+        self.backend = None
+
+
+    def record(self) -> list:
+        """ Returns the scooters read while recording. """
+        scooters = [self.api.get_scooter_data(scooter_id) for scooter_id in (1, 2, 1)]
+        self.transport.close()
+        ApiData.clear_cache()
+        return scooters
+
+
+    def replay(self, **settings) -> ReplayTransport:
+        """ Returns a ReplayTransport of the recording used by self.api. """
+        transport = ReplayTransport(self.path, retries = 0, **settings)
+        self.api = ApiData(user_id = 6, transport = transport)
+        return transport
+
+
+    def test_record(self):
+        """ Test to write a header, every document once and one line per request. """
+        # Act
+        self.record()
+
+        # Assert
+        with open(self.path, 'r', encoding='utf-8') as file:
+            lines = [json.loads(line) for line in file]
+
+        self.assertEqual(lines[0]["format"], "scooter-traffic")
+        self.assertEqual(lines[0]["url"], "http://backend/api/v1/graphql")
+        self.assertEqual(sum("query" in line for line in lines), 1)
+
+        entries = read(self.path)
+        self.assertEqual([entry["q"]["variables"]["id"] for entry in entries], ["1", "2", "1"])
+        self.assertIn("getScooterById", entries[0]["q"]["query"])
+        self.assertEqual(entries[0]["c"], 200)
+        self.assertGreaterEqual(entries[0]["s"], 0)
+
+
+    def test_record_appends(self):
+        """ Test that a second recording is appended to the same file. """
+        # Act
+        self.record()
+        self.transport._session = FakeSession(self.backend)  # pylint: disable=protected-access
+        self.record()
+
+        # Assert
+        self.assertEqual(len(read(self.path)), 6)
+
+
+    def test_replay(self):
+        """ Test to answer the recorded requests without the backend. """
+        # Arrange
+        scooters = self.record()
+        transport = self.replay()
+
+        # Act
+        replayed = [self.api.get_scooter_data(scooter_id) for scooter_id in (1, 2, 1)]
+
+        # Assert
+        self.assertEqual(replayed, scooters)
+        self.assertEqual(transport.url, "http://backend/api/v1/graphql")
+        self.assertEqual(transport.stats, {
+            "payload": 3, "operation": 0, "repeated": 0, "missing": 0
+        })
+
+
+    def test_replay_persisted_queries(self):
+        """ Test to record and replay persisted queries sent as hash only. """
+        # Arrange
+        self.transport.persisted_queries = True
+        scooters = self.record()
+        transport = self.replay()
+
+        # Act
+        replayed = [self.api.get_scooter_data(scooter_id) for scooter_id in (1, 2, 1)]
+
+        # Assert, the first request is sent again with its text
+        entries = read(self.path)
+        self.assertNotIn("query", entries[0]["q"])
+        self.assertEqual(entries[0]["o"], "getScooterById")
+        self.assertIn("query", entries[1]["q"])
+        self.assertTrue(transport.persisted_queries)
+        self.assertEqual(replayed, scooters)
+        self.assertEqual(transport.stats, {
+            "payload": 4, "operation": 0, "repeated": 0, "missing": 0
+        })
+
+
+    def test_replay_fallbacks(self):
+        """ Test to answer other payloads by operation and unknown operations with an error. """
+        # Arrange
+        self.record()
+        transport = self.replay()
+
+        # Act
+        for scooter_id in (5, 6, 7, 8):
+            self.api.add_scooter_to_dict(self.api.get_scooter_data(scooter_id))
+        city = self.api.get_city_data()
+
+        # Assert
+        self.assertEqual(city, -1)
+        self.assertEqual(transport.stats, {
+            "payload": 0, "operation": 3, "repeated": 1, "missing": 1
+        })
+
+
+    def test_replay_error(self):
+        """ Test to raise a recorded timeout again. """
+        # Arrange
+        def timeout(*_args, **_kwargs):
+            raise requests.Timeout("read timed out")
+
+        self.transport.session.session.post = timeout
+
+        with self.assertRaises(TransportError):
+            self.transport.post({"query": "query getScooterById { x }"})
+
+        self.transport.close()
+
+        # Act, Assert
+        with self.assertRaises(TransportError) as error:
+            self.replay().post({"query": "query getScooterById { x }"})
+
+        self.assertEqual(error.exception.kind, "timeout")
+
+
+    def test_replay_latency(self):
+        """ Test to wait the recorded seconds with latency. """
+        # Arrange
+        self.record()
+        clock = VirtualClock()
+        recorded = sum(entry["s"] for entry in read(self.path))
+        self.replay(latency = True, clock = clock)
+
+        # Act
+        for scooter_id in (1, 2, 1):
+            self.api.get_scooter_data(scooter_id)
+
+        # Assert
+        self.assertAlmostEqual(clock.now(), recorded)
+
+
+    def test_not_a_recording(self):
+        """ Test to raise ValueError for a file that is not a recording. """
+        # Arrange
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write('{"data": {}}\n')
+
+        # Act, Assert
+        with self.assertRaises(ValueError):
+            ReplayTransport(self.path)
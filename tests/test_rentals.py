@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+""" Test cases for Rental and RentalRegistry class. """
+
+
+import unittest
+
+from src.rentals import Rental, RentalRegistry
+
+
+class TestRentalRegistry(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.rentals = RentalRegistry()
+
+        for scooter_id in range(1, 4):
+            self.rentals.add(Rental(scooter_id, scooter_id + 5, "1", {"id": "2"}))
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.rentals = None
+
+
+    def test_add_and_get(self):
+        """ Test to find a rental by scooter id. """
+        # Assert
+        self.assertEqual(len(self.rentals), 3)
+        self.assertIn(2, self.rentals)
+        self.assertEqual(self.rentals.get(2).user_id, 7)
+        self.assertIsNone(self.rentals.get(9))
+
+
+    def test_remove(self):
+        """ Test to remove and return a rental. """
+        # Act
+        rental = self.rentals.remove(2)
+
+        # Assert
+        self.assertEqual(rental.scooter_id, 2)
+        self.assertNotIn(2, self.rentals)
+        self.assertIsNone(self.rentals.remove(2))
+
+
+    def test_remove_while_iterating(self):
+        """ Test that rentals can end while the registry is iterated. """
+        # Act
+        visited = []
+
+        for rental in self.rentals:
+            visited.append(rental.scooter_id)
+            self.rentals.remove(rental.scooter_id)
+
+        # Assert
+        self.assertEqual(visited, [1, 2, 3])
+        self.assertEqual(len(self.rentals), 0)
+
+
+    def test_rental_slots(self):
+        """ Test that a rental has no attribute dictionary. """
+        # Assert
+        with self.assertRaises(AttributeError):
+            Rental(1, 6, "1", {}).extra = 1
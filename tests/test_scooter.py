@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
-""" Test cases for Scooter class. """
+""" Test cases for Scooter and Fleet class. """
 
 
+import random
 import unittest
 from unittest.mock import patch
 import json
+import numpy as np
 
-from src.scooter import Scooter
+from src.geometry import SphericalGeometry
+from src.scooter import Scooter, Fleet, scooter_rng
+from src.state import CityState, ScooterState
 
 
 # dummy data
@@ -22,21 +26,21 @@ class TestScooter(unittest.TestCase):
         self.scooter = Scooter()
 
         # creates fake city and scooter data
-        self.scooter.data = {
-            "id": "1",
-            "lat": 59.193475,
-            "lon":  17.640142,
-            "speed": 0,
-            "battery": 100,
-            "status": "1",
-        }
-
-        self.scooter.city = {
-            "id": "2",
-            "area": 25.84,
-            "lat": 59.19554,
-            "lon": 17.62525
-        }
+        self.scooter.data = ScooterState(
+            id = "1",
+            lat = 59.193475,
+            lon = 17.640142,
+            speed = 0,
+            battery = 100,
+            status = "1"
+        )
+
+        self.scooter.city = CityState(
+            id = "2",
+            area = 25.84,
+            lat = 59.19554,
+            lon = 17.62525
+        )
 
 
     def tearDown(self) -> None:
@@ -111,7 +115,7 @@ class TestScooter(unittest.TestCase):
     def test_move_scooter(self):
         """ Test to move the scooter to a random location. """
         # Arrange
-        self.scooter.location = "Point(56.00000, 18.0000, 0.0)"
+        self.scooter.new_location = (56.00000, 18.0000)
 
         # Act
         self.scooter.move_scooter()
@@ -122,13 +126,45 @@ class TestScooter(unittest.TestCase):
         self.assertEqual(self.scooter.data["battery"], 99)
 
 
+    def test_seeded_rng(self):
+        """ Test that scooters with the same seeded stream take the same steps. """
+        # Arrange
+        first = Scooter(scooter_rng(7, 1))
+        second = Scooter(scooter_rng(7, 1))
+        tracks = []
+
+        # Act
+        for scooter in (first, second):
+            scooter.data = self.scooter.data.copy()
+            track = []
+
+            for _ in range(10):
+                scooter.change_location()
+                scooter.move_scooter()
+                track.append((scooter.data["lat"], scooter.data["lon"], scooter.data["speed"]))
+
+            track.append(scooter.check_maintenance())
+            tracks.append(track)
+
+        # Assert
+        self.assertEqual(tracks[0], tracks[1])
+        self.assertIsNot(first.rng, second.rng)
+        self.assertIsNot(scooter_rng(7, 1), scooter_rng(7, 2))
+        self.assertIs(scooter_rng(None, 1), random)
+
+
     def test_change_location(self):
         """ Test to change scooter location. """
         # Act
         self.scooter.change_location()
 
         # Assert
-        self.assertNotEqual(self.scooter.location, "")
+        self.assertIsInstance(self.scooter.new_location[0], float)
+        self.assertIsInstance(self.scooter.new_location[1], float)
+        self.assertEqual(
+            self.scooter.location,
+            "Point({0}, {1}, 0.0)".format(*self.scooter.new_location)
+        )
 
 
     def test_stop_scooter(self):
@@ -222,3 +258,173 @@ class TestScooter(unittest.TestCase):
 
         # Assert
         self.assertFalse(act)
+
+
+
+class TestFleet(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        scooter = {
+            "id": "1",
+            "latitude": "59.193475",
+            "longitude": "17.640142",
+            "speed": "10",
+            "battery": "100",
+        }
+
+        # second scooter is outside the city and has low battery
+        outside = dict(scooter, id = "2", latitude = "59.159111", longitude = "17.606871")
+        outside["battery"] = "10"
+
+        self.fleet = Fleet.from_data(
+            [scooter, outside],
+            [DATA[0]["add_city_to_dict"], DATA[0]["add_city_to_dict"]]
+        )
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.fleet = None
+
+
+    def test_from_data(self):
+        """ Test to add scooters and cities data to the arrays. """
+        # Assert
+        self.assertEqual(len(self.fleet), 2)
+        self.assertEqual(list(self.fleet.id), [1, 2])
+        self.assertEqual(list(self.fleet.battery), [100, 10])
+        self.assertEqual(list(self.fleet.status), [7, 7])
+        self.assertAlmostEqual(self.fleet.city_area[1], 25.84)
+
+
+    def test_scooter_view(self):
+        """ Test that a Scooter reads and writes one row of the fleet. """
+        # Act
+        scooter = self.fleet.scooter(1)
+        scooter.stop_scooter("2")
+
+        # Assert
+        self.assertEqual(scooter.data["id"], "2")
+        self.assertEqual(scooter.city["id"], "2")
+        self.assertEqual(self.fleet.status[1], 2)
+        self.assertEqual(self.fleet.speed[1], 0)
+        self.assertEqual(self.fleet.speed[0], 10)
+        self.assertTrue(scooter.check_battery())
+        self.assertFalse(scooter.check_scooter_in_city())
+
+
+    def test_scooter_view_parse(self):
+        """ Test that a Scooter parses API data into one row of the fleet. """
+        # Arrange
+        scooter = self.fleet.scooter(0)
+
+        # Act
+        act = scooter.check_scooter_status(DATA[0]["add_scooter_to_dict"])
+        scooter.add_city_to_dict(DATA[0]["add_city_to_dict"])
+
+        # Assert
+        self.assertTrue(act)
+        self.assertEqual(list(self.fleet.id), [12, 2])
+        self.assertEqual(list(self.fleet.battery), [90, 10])
+        self.assertEqual(self.fleet.status[0], 7)
+        self.assertAlmostEqual(self.fleet.lat[0], 59.0)
+        self.assertAlmostEqual(scooter.city["area"], 25.84)
+        self.assertEqual(scooter.city.geofence.city_id, "2")
+
+
+    def test_change_location_and_move(self):
+        """ Test to move all scooters speed * 15 seconds in one call. """
+        # Arrange
+        lat = self.fleet.lat.copy()
+        lon = self.fleet.lon.copy()
+
+        # Act
+        self.fleet.change_location()
+        self.fleet.move_scooter()
+
+        # Assert, 10km/h for 15 seconds is about 41.7 meters
+        moved = SphericalGeometry.distances(lat, lon, self.fleet.lat, self.fleet.lon)
+        self.assertTrue(np.allclose(moved, 10 * 15 / 3600))
+        self.assertEqual(list(self.fleet.battery), [99, 9])
+        self.assertTrue(np.all((self.fleet.speed >= 1) & (self.fleet.speed <= 20)))
+
+
+    def test_move_with_mask(self):
+        """ Test to move only the scooters selected by the mask. """
+        # Arrange
+        mask = np.array([False, True])
+
+        # Act
+        self.fleet.change_location(mask)
+        self.fleet.move_scooter(mask)
+
+        # Assert
+        self.assertEqual(list(self.fleet.battery), [100, 9])
+        self.assertEqual(self.fleet.lat[0], 59.193475)
+
+
+    def test_stop_scooter(self):
+        """ Test to stop all scooters. """
+        # Act
+        self.fleet.stop_scooter(status = "1")
+
+        # Assert
+        self.assertEqual(list(self.fleet.status), [1, 1])
+        self.assertEqual(list(self.fleet.speed), [0, 0])
+
+
+    def test_check_battery(self):
+        """ Test to return True for scooters with battery level < 20%. """
+        # Act
+        act = self.fleet.check_battery()
+
+        # Assert
+        self.assertEqual(list(act), [False, True])
+
+
+    def test_check_scooter_in_city(self):
+        """ Test to return True for scooters inside the city zone, same as Scooter. """
+        # Act
+        act = self.fleet.check_scooter_in_city()
+
+        # Assert
+        self.assertEqual(list(act), [True, False])
+
+
+    def test_check_scooter_in_city_many_cities(self):
+        """ Test to check every scooter against the zone of its own city. """
+        # Arrange, second scooter is in a city centered on it
+        self.fleet.city_id[1] = 3
+        self.fleet.city_lat[1] = self.fleet.lat[1]
+        self.fleet.city_lon[1] = self.fleet.lon[1]
+
+        # Act
+        act = self.fleet.check_scooter_in_city()
+
+        # Assert
+        self.assertEqual(list(act), [True, True])
+        self.assertEqual(sorted(self.fleet.geofences), [2, 3])
+
+
+    def test_seed(self):
+        """ Test that fleets with the same seed draw the same bearings and speeds. """
+        # Arrange
+        scooters = [
+            {"id": str(index), "latitude": "59.193475", "longitude": "17.640142",
+             "speed": "10", "battery": "100"}
+            for index in range(1, 51)
+        ]
+        cities = [DATA[0]["add_city_to_dict"]] * 50
+        fleets = [Fleet.from_data(scooters, cities, seed = 3) for _ in range(2)]
+
+        # Act
+        for fleet in fleets:
+            for _ in range(5):
+                fleet.change_location()
+                fleet.move_scooter()
+
+        # Assert
+        self.assertTrue(np.array_equal(fleets[0].lat, fleets[1].lat))
+        self.assertTrue(np.array_equal(fleets[0].lon, fleets[1].lon))
+        self.assertTrue(np.array_equal(fleets[0].speed, fleets[1].speed))
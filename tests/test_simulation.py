@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+""" Test cases for Simulation class. """
+
+
+import threading
+import time
+import unittest
+from io import StringIO
+from unittest.mock import MagicMock, patch
+import json
+
+from simulation import AsyncSimulation, Simulation, run_sharded
+from src.api import ApiData
+from src.backend import FakeBackend, FakeTransport, serve, url
+from src.clock import VirtualClock
+from src.transport import CircuitOpenError, Transport
+
+
+# dummy data
+with open('tests/dummy.json', 'r', encoding='utf-8') as file:
+    DATA = json.load(file)
+
+
+def fake_post(payload: dict, idempotent: bool = False) -> MagicMock:
+    """ Returns a response like the API's for a GraphQL payload. """
+    query = payload["query"]
+    response = MagicMock()
+
+    if "getScootersById" in query:
+        data = {
+            "s" + key[2:]: [dict(DATA[0]["getScooterById"][0], id = value, battery = "100")]
+            for key, value in payload["variables"].items()
+        }
+    elif "getCityByScooterId" in query:
+        data = {"getCityByScooterId": DATA[0]["getCityByScooterId"]}
+    elif "getStationByCityIdAndZoneId" in query:
+        data = {"getStationByCityIdAndZoneId": DATA[0]["getStationByCityIdAndZoneId"]}
+    elif "rentScooter" in query:
+        data = {"rentScooter": {"id": "1", "success": "1"}}
+    else:
+        data = {}
+
+    response.json.return_value = {"data": data}
+    return response
+
+
+class TestSimulation(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.transport = MagicMock()
+        self.transport.post.side_effect = fake_post
+
+        self.simulation = Simulation(self.transport, local_state = True, clock = VirtualClock())
+        self.simulation.duration = 60
+        self.simulation.tick = 15
+        ApiData.clear_cache()
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.simulation = None
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_simulate(self, _mock_stdout):
+        """ Test to rent, move and return scooters on a virtual clock. """
+        # Act
+        stats = self.simulation.simulate(range(1, 4))
+
+        # Assert, 5 passes at 0, 15, 30, 45 and 60 seconds
+        self.assertEqual(
+            stats,
+            {"rented": 3, "moves": 15, "returned": 3, "ticks": 5, "errors": 0}
+        )
+        self.assertEqual(self.simulation.clock.now(), 60)
+        self.assertEqual(len(self.simulation.rentals), 0)
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_simulate_reads_scooters_once(self, _mock_stdout):
+        """ Test that scooters are read in one request when the state is kept locally. """
+        # Act
+        self.simulation.simulate(range(1, 4))
+
+        # Assert
+        queries = [call[0][0]["query"] for call in self.transport.post.call_args_list]
+        self.assertEqual(sum("getScootersById" in query for query in queries), 1)
+        self.assertEqual(sum("query getScooterById" in query for query in queries), 0)
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_return_uses_rental_station(self, _mock_stdout):
+        """ Test that every scooter is returned with the user and station of its rental. """
+        # Act
+        self.simulation.simulate(range(1, 3), user = 10)
+
+        # Assert
+        returns = [
+            call[0][0]["variables"] for call in self.transport.post.call_args_list
+            if "returnScooter" in call[0][0]["query"]
+        ]
+        self.assertEqual([(ret["user_id"], ret["station"]) for ret in returns], [
+            ("10", "1"),
+            ("11", "1")
+        ])
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_simulate_skips_failed_reads(self, mock_stdout):
+        """ Test that a scooter whose read fails is skipped and counted, the others still run. """
+        # Arrange
+        def post(payload: dict, idempotent: bool = False) -> MagicMock:
+            if "getCityByScooterId" in payload["query"] and payload["variables"]["id"] == "2":
+                raise CircuitOpenError(12)
+            return fake_post(payload, idempotent)
+
+        self.transport.post.side_effect = post
+
+        # Act
+        stats = self.simulation.simulate(range(1, 4))
+
+        # Assert
+        self.assertEqual((stats["rented"], stats["returned"], stats["errors"]), (2, 2, 1))
+        self.assertIn("Scooter 2 skipped: circuit_open", mock_stdout.getvalue())
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_simulate_without_stations(self, mock_stdout):
+        """ Test that scooters with low battery are returned where they are without stations. """
+        # Arrange
+        backend = FakeBackend(scooters = 5, seed = 0)
+        backend.stations = []
+        simulation = Simulation(FakeTransport(backend), local_state = True, clock = VirtualClock())
+        simulation.duration = 15 * 100
+        simulation.tick = 15
+
+        # Act
+        stats = simulation.simulate(range(1, 6))
+
+        # Assert
+        self.assertEqual((stats["rented"], stats["returned"]), (5, 5))
+        self.assertGreater(stats["errors"], 0)
+        self.assertIn("no station in zone", mock_stdout.getvalue())
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_seed_repeats_run(self, _mock_stdout):
+        """ Test that runs with the same seed send the same requests, in any scooter order. """
+        # Arrange
+        def run(scooter_ids) -> tuple:
+            ApiData.clear_cache()
+            backend = FakeBackend(scooters = 20, seed = 0)
+            simulation = Simulation(
+                FakeTransport(backend),
+                local_state = True,
+                clock = VirtualClock(),
+                seed = 42
+            )
+            simulation.duration = 120
+            simulation.tick = 15
+            payloads = []
+            handle = backend.handle
+
+            def record(payload: dict) -> tuple:
+                payloads.append(json.dumps(payload, sort_keys = True))
+                return handle(payload)
+
+            backend.handle = record
+            stats = simulation.simulate(scooter_ids)
+            return stats, backend.scooters, payloads
+
+        # Act
+        first = run(range(1, 21))
+        second = run(range(1, 21))
+        reversed_order = run(range(20, 0, -1))
+
+        # Assert
+        self.assertEqual(first, second)
+        self.assertEqual(first[1], reversed_order[1])
+
+
+
+class TestRunSharded(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.backend = FakeBackend(scooters = 20, seed = 0)
+        self.server = serve(self.backend, port = 0)
+        threading.Thread(target = self.server.serve_forever, daemon = True).start()
+        self.transport = Transport(url(self.server), retries = 0)
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.server.shutdown()
+        self.server.server_close()
+        self.transport.close()
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_run_sharded(self, _mock_stdout):
+        """ Test to merge the stats of two shards, every shard with its own user ids. """
+        # Act
+        stats = run_sharded(
+            20, 2, self.transport, virtual = True, duration = 30, tick = 15, seed = 1
+        )
+
+        # Assert, 3 passes at 0, 15 and 30 seconds
+        self.assertEqual(
+            {key: value for key, value in stats.items() if key != "seconds"},
+            {"rented": 20, "moves": 60, "returned": 20, "ticks": 3, "errors": 0, "shards": 2}
+        )
+        self.assertEqual(
+            sorted((int(log["id"]), int(log["user_id"])) for log in self.backend.logs),
+            [(scooter_id, scooter_id + 5) for scooter_id in range(1, 21)]
+        )
+        self.assertTrue(all("time" in log for log in self.backend.logs))
+
+
+    def test_no_scooters(self):
+        """ Test that a run without scooters has empty stats. """
+        # Act
+        stats = run_sharded(0, 2, self.transport, virtual = True)
+
+        # Assert
+        self.assertEqual((stats["rented"], stats["shards"]), (0, 0))
+
+
+class TestAsyncSimulation(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        ApiData.clear_cache()
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        ApiData.clear_cache()
+
+
+    def simulation(self, backend: FakeBackend) -> AsyncSimulation:
+        """ Returns a short AsyncSimulation against backend, without retries. """
+        return AsyncSimulation(
+            FakeTransport(backend, retries = 0),
+            concurrency = 10,
+            duration = 0.05,
+            step = 0.01,
+            seed = 1
+        )
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_main(self, _mock_stdout):
+        """ Test to rent, move and return all scooters concurrently. """
+        # Arrange
+        backend = FakeBackend(scooters = 20, seed = 0)
+
+        # Act
+        stats = self.simulation(backend).main(20)
+
+        # Assert
+        self.assertEqual((stats["rented"], stats["returned"], stats["errors"]), (20, 20, 0))
+        self.assertGreater(stats["moves"], 0)
+        self.assertEqual(
+            sum(scooter["status"]["id"] == "7" for scooter in backend.scooters.values()), 0
+        )
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_virtual_clock(self, _mock_stdout):
+        """ Test that steps, end time and rental minutes are read from a virtual clock. """
+        # Arrange
+        backend = FakeBackend(scooters = 5, seed = 0)
+        simulation = AsyncSimulation(
+            FakeTransport(backend, retries = 0),
+            duration = 60,
+            step = 15,
+            clock = VirtualClock()
+        )
+
+        # Act
+        start = time.time()
+        stats = simulation.main(5)
+
+        # Assert, steps at 0, 15, 30, 45 and 60 seconds, returned at 75 seconds
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual((stats["rented"], stats["moves"]), (5, 25))
+        self.assertEqual(simulation.clock.now(), 75)
+        self.assertEqual([log["time"] for log in backend.logs], ["2"] * 5)
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_failed_reads(self, mock_stdout):
+        """ Test that scooters whose reads fail are counted and the others still run. """
+        # Arrange
+        backend = FakeBackend(scooters = 20, seed = 0, error_rate = 0.5)
+
+        # Act
+        stats = self.simulation(backend).main(20)
+
+        # Assert
+        self.assertGreater(stats["errors"], 0)
+        self.assertGreater(stats["rented"], 0)
+        self.assertEqual(stats["rented"], stats["returned"])
+        self.assertIn("skipped", mock_stdout.getvalue())
+
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_no_station(self, _mock_stdout):
+        """ Test that a scooter with low battery is returned where it is without stations. """
+        # Arrange
+        backend = FakeBackend(scooters = 1, seed = 0)
+        backend.scooters["1"]["battery"] = "19"
+        backend.stations = []
+
+        # Act
+        stats = self.simulation(backend).main(1)
+
+        # Assert
+        self.assertEqual((stats["rented"], stats["returned"], stats["errors"]), (1, 1, 1))
+        self.assertEqual(backend.scooters["1"]["status"]["id"], "4")
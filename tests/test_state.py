@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+""" Test cases for ScooterState and CityState class. """
+
+
+import unittest
+import json
+
+from src.scooter import Scooter
+from src.state import CityState, ScooterState
+
+
+# dummy data
+with open('tests/dummy.json', 'r', encoding='utf-8') as file:
+    DATA = json.load(file)
+
+
+class TestState(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.state = ScooterState.from_api(DATA[0]["add_scooter_to_dict"])
+        self.city = CityState.from_api(DATA[0]["add_city_to_dict"])
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.state = None
+        self.city = None
+
+
+    def test_from_api(self):
+        """ Test to parse the API's strings into numbers once. """
+        # Assert
+        self.assertEqual(self.state.id, "12")
+        self.assertIsInstance(self.state.lat, float)
+        self.assertIsInstance(self.state.battery, int)
+        self.assertIsNone(self.state.status)
+        self.assertEqual((self.city.id, self.city.area), ("2", 25.84))
+
+
+    def test_no_dict(self):
+        """ Test that states have slots only. """
+        # Act, Assert
+        with self.assertRaises(AttributeError):
+            self.state.color = "red"
+
+        self.assertFalse(hasattr(self.state, "__dict__"))
+        self.assertFalse(hasattr(self.city, "__dict__"))
+
+
+    def test_mapping(self):
+        """ Test to read and write a state like the dictionary it replaces. """
+        # Act
+        self.state["battery"] = 50
+
+        # Assert
+        self.assertEqual(self.state.battery, 50)
+        self.assertEqual(self.state["lat"], self.state.lat)
+        self.assertNotIn("station", self.state)
+        self.assertEqual(sorted(self.state), ["battery", "id", "lat", "lon", "speed"])
+        self.assertEqual(self.state, dict(self.state.items()))
+        self.assertEqual(self.state.get("station", "none"), "none")
+
+        with self.assertRaises(KeyError):
+            _ = self.state["station"]
+        with self.assertRaises(KeyError):
+            self.state["color"] = "red"
+
+
+    def test_copy(self):
+        """ Test that a copy is a new state with the same fields. """
+        # Act
+        copy = self.state.copy()
+        copy.battery -= 1
+
+        # Assert
+        self.assertEqual(self.state.battery, 90)
+        self.assertEqual(copy.battery, 89)
+
+
+    def test_geofence(self):
+        """ Test to build the city's zone once and again for another city id. """
+        # Act
+        geofence = self.city.geofence
+        same = self.city.geofence
+        self.city.id = "3"
+
+        # Assert
+        self.assertIs(geofence, same)
+        self.assertEqual(self.city.geofence.city_id, "3")
+
+
+    def test_scooters_have_own_state(self):
+        """ Test that two scooters do not share their data or city. """
+        # Arrange
+        first, second = Scooter(), Scooter()
+
+        # Act
+        first.add_scooter_to_dict(DATA[0]["add_scooter_to_dict"])
+
+        # Assert
+        self.assertEqual(first.data.status, "7")
+        self.assertEqual(second.data, {})
+        self.assertIsNot(first.city, second.city)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+""" Test cases for StationIndex class. """
+
+
+import math
+import random
+import unittest
+
+import numpy as np
+
+from src.stations import StationIndex
+
+
+class TestStationIndex(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        rng = random.Random(1)
+
+        self.stations = [
+            {
+                "id": str(index),
+                "latitude": str(59.19 + rng.uniform(-0.05, 0.05)),
+                "longitude": str(17.64 + rng.uniform(-0.1, 0.1))
+            }
+            for index in range(200)
+        ]
+        self.index = StationIndex(self.stations)
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.index = None
+
+
+    def brute_force(self, lat, lon):
+        """ Returns the nearest station by comparing with all stations. """
+        scale = math.cos(math.radians(59.19))
+
+        return min(
+            self.stations,
+            key = lambda station: math.hypot(
+                (float(station["longitude"]) - lon) * scale,
+                float(station["latitude"]) - lat
+            )
+        )
+
+
+    def test_nearest(self):
+        """ Test that nearest returns the same station as a brute force search. """
+        rng = random.Random(2)
+
+        for _ in range(200):
+            # Arrange, also points outside the grid
+            lat = 59.19 + rng.uniform(-0.2, 0.2)
+            lon = 17.64 + rng.uniform(-0.4, 0.4)
+
+            # Act
+            station = self.index.nearest(lat, lon)
+
+            # Assert
+            self.assertIs(station, self.brute_force(lat, lon))
+
+
+    def test_nearest_many(self):
+        """ Test that nearest_many returns the index of nearest for every point. """
+        # Arrange
+        lats = np.array([59.15, 59.19, 59.25])
+        lons = np.array([17.55, 17.64, 17.80])
+
+        # Act
+        nearest = self.index.nearest_many(lats, lons, chunk_size = 2)
+
+        # Assert
+        self.assertEqual(
+            [self.stations[index] for index in nearest],
+            [self.index.nearest(lat, lon) for lat, lon in zip(lats, lons)]
+        )
+
+
+    def test_empty(self):
+        """ Test that an index without stations returns None. """
+        # Act
+        index = StationIndex([])
+
+        # Assert
+        self.assertEqual(len(index), 0)
+        self.assertIsNone(index.nearest(59.19, 17.64))
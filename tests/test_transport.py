@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+""" Test cases for Transport class. """
+
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from src.api import ApiData
+from src.clock import VirtualClock
+from src.transport import Transport, TransportError, CircuitOpenError
+
+
+class TestTransport(unittest.TestCase):
+    """ Submodule for unittests, derives from unittest.TestCase """
+
+    def setUp(self) -> None:
+        """ Create object for all tests """
+        self.transport = Transport(
+            "http://localhost:1337/api/v1/graphql",
+            { "Content-Type": "application/json"},
+            pool_size = 4,
+            timeout = 2.5
+        )
+
+    def tearDown(self) -> None:
+        """ Remove dependencies after test. """
+        self.transport.close()
+        self.transport = None
+
+
+    def test_session_is_reused(self):
+        """ Test that the same pooled session is returned on every call. """
+        # Act
+        first = self.transport.session
+        second = self.transport.session
+
+        # Assert
+        self.assertIs(first, second)
+        self.assertEqual(first.get_adapter("http://localhost")._pool_maxsize, 4)
+
+
+    @patch('requests.Session.post')
+    def test_post(self, mock_post):
+        """ Test to post payload with url, headers and timeout. """
+        # Act
+        self.transport.post({"query": "q"})
+
+        # Assert
+        mock_post.assert_called_once_with(
+            "http://localhost:1337/api/v1/graphql",
+            json = {"query": "q"},
+            headers = { "Content-Type": "application/json"},
+            timeout = 2.5
+        )
+
+
+    def test_no_keep_alive(self):
+        """ Test to close connection after every request when keep alive is off. """
+        # Act
+        transport = Transport("http://localhost", keep_alive = False)
+
+        # Assert
+        self.assertEqual(transport.headers["Connection"], "close")
+
+
+    def test_config(self):
+        """ Test to create a transport with the same settings from config. """
+        # Act
+        copy = Transport(**self.transport.config())
+
+        # Assert
+        self.assertEqual(copy.config(), self.transport.config())
+        self.assertIsNot(copy, self.transport)
+
+
+    def test_close(self):
+        """ Test that a new session is created after close. """
+        # Arrange
+        first = self.transport.session
+
+        # Act
+        self.transport.close()
+
+        # Assert
+        self.assertIsNot(self.transport.session, first)
+
+
+    def test_api_shares_transport(self):
+        """ Test that ApiData instances share the default transport unless one is injected. """
+        # Act
+        first = ApiData(user_id = 1)
+        second = ApiData(user_id = 2)
+        injected = ApiData(user_id = 3, transport = self.transport)
+
+        # Assert
+        self.assertIs(first.transport, second.transport)
+        self.assertIs(injected.transport, self.transport)
+
+
+    @patch('requests.Session.post')
+    def test_retry_idempotent(self, mock_post):
+        """ Test to retry a query after a timeout with exponential backoff. """
+        # Arrange
+        clock = VirtualClock()
+        transport = Transport("http://localhost", retries = 2, backoff = 0.5, clock = clock)
+        mock_post.side_effect = [requests.Timeout("slow"), requests.Timeout("slow"), MagicMock()]
+
+        # Act
+        transport.post({"query": "q"}, idempotent = True)
+
+        # Assert, waited 0.5 + 1 seconds
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(clock.now(), 1.5)
+        self.assertEqual(transport.breaker.failures, 0)
+
+
+    @patch('requests.Session.post')
+    def test_no_retry_mutation(self, mock_post):
+        """ Test to send a mutation once and raise a structured error. """
+        # Arrange
+        mock_post.side_effect = requests.ConnectionError("refused")
+
+        # Act
+        with self.assertRaises(TransportError) as context:
+            self.transport.post({"query": "mutation"})
+
+        # Assert
+        mock_post.assert_called_once()
+        self.assertEqual(context.exception.kind, "connection")
+        self.assertEqual(context.exception.attempts, 1)
+
+
+    @patch('requests.Session.post')
+    def test_retry_server_error(self, mock_post):
+        """ Test to retry 5xx responses and raise an http error when all attempts fail. """
+        # Arrange
+        transport = Transport("http://localhost", retries = 1, clock = VirtualClock())
+        mock_post.return_value.status_code = 503
+
+        # Act
+        with self.assertRaises(TransportError) as context:
+            transport.post({"query": "q"}, idempotent = True)
+
+        # Assert
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(context.exception.kind, "http")
+        self.assertEqual(context.exception.status, 503)
+        self.assertEqual(context.exception.attempts, 2)
+
+
+    @patch('requests.Session.post')
+    def test_circuit_breaker(self, mock_post):
+        """ Test to fail fast while the circuit is open and close it after a successful trial. """
+        # Arrange
+        clock = VirtualClock()
+        transport = Transport(
+            "http://localhost",
+            retries = 0,
+            failure_threshold = 2,
+            reset_timeout = 30,
+            clock = clock
+        )
+        mock_post.side_effect = requests.Timeout("slow")
+
+        for _ in range(2):
+            with self.assertRaises(TransportError):
+                transport.post({"query": "q"}, idempotent = True)
+
+        # Act, open
+        with self.assertRaises(CircuitOpenError):
+            transport.post({"query": "q"}, idempotent = True)
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(transport.breaker.state, "open")
+
+        # Act, half-open trial succeeds
+        clock.sleep(30)
+        mock_post.side_effect = None
+        transport.post({"query": "q"}, idempotent = True)
+
+        # Assert
+        self.assertEqual(transport.breaker.state, "closed")
+        self.assertEqual(mock_post.call_count, 3)